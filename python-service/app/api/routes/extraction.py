@@ -1,29 +1,105 @@
-from fastapi import APIRouter, UploadFile, File, Form, HTTPException
-from typing import Optional
+import asyncio
+import hashlib
+import json
+import os
+import tempfile
+import time
+from fastapi import APIRouter, UploadFile, File, Form, HTTPException, Request
+from fastapi.responses import Response, StreamingResponse
+from starlette.concurrency import run_in_threadpool
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Optional, Tuple, TypeVar, Union
 
 from app.config import settings
-from app.models.schemas import ExtractionResponse, ExtractionMetadata
-from app.services.pdf_extractor import PDFExtractor
-from app.services.text_chunker import TextChunker
+from app.models.schemas import (
+    BatchExtractionResponse,
+    BatchFileResult,
+    CompactExtractionResponse,
+    ExtractionResponse,
+    ExtractionMetadata,
+    ExtractionStreamSummary,
+    JobStatusResponse,
+    PageProbe,
+    ProbeResponse,
+    RequestProfile
+)
+from app.services.admission import AdmissionRejected, extraction_admission
+from app.services.extraction_cache import extraction_cache
+from app.services.extraction_jobs import extraction_jobs, COMPLETED, FAILED
+from app.services.extraction_pool import extraction_pool
+from app.services.fingerprints import ChunkDeduplicator, DEDUP_MODES, fingerprint_index
+from app.services.metrics import (
+    cache_requests_total,
+    characters_total,
+    chunks_total,
+    documents_total,
+    duplicate_chunks_total,
+    extraction_cancellations_total,
+    observe_stage_ms,
+    pages_total,
+    stage_seconds
+)
+from app.services.pdf_extractor import PDFExtractor, EXTRACTION_MODES, parse_page_ranges
+from app.services.profiling import ProfilerBusy, RequestProfiler, profile_store, profiled_iter
+from app.services.text_chunker import (
+    ChunkDiff,
+    ChunkRecord,
+    LayoutChunker,
+    TextChunker,
+    TokenTextChunker,
+    CHUNK_STRATEGIES,
+    CHUNK_UNITS
+)
+from app.services.tokenizers import get_tokenizer
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
 
 router = APIRouter()
 
+# Response formats of /extract-pdf: every chunk with its content, or the
+# document text once with columnar chunk offsets
+RESPONSE_FORMATS = ("full", "compact")
+
+# extraction_mode letting /extract-pdf pick fast or ocr from a pre-flight
+# probe of the document
+AUTO_EXTRACTION_MODE = "auto"
+
 # Maximum file size in bytes
 MAX_FILE_SIZE = settings.max_file_size_mb * 1024 * 1024
 
+# Maximum combined size of a batch in bytes
+MAX_BATCH_SIZE = settings.max_batch_size_mb * 1024 * 1024
 
-@router.post("/extract-pdf", response_model=ExtractionResponse)
-async def extract_pdf(
-    file: UploadFile = File(..., description="PDF file to extract text from"),
-    chunk_size: Optional[int] = Form(default=None, description="Chunk size in characters"),
-    chunk_overlap: Optional[int] = Form(default=None, description="Overlap between chunks")
-) -> ExtractionResponse:
+
+# Tokenizer measuring chunk_size and chunk_overlap when chunk_unit=tokens
+TOKENIZER = get_tokenizer(settings.tokenizer)
+
+# Uploads are copied to disk in blocks of this size
+UPLOAD_BLOCK_SIZE = 1024 * 1024
+
+# How often a running extraction checks whether its client has gone away,
+# in seconds
+DISCONNECT_POLL_SECONDS = 0.5
+
+T = TypeVar("T")
+
+# Page cache key of each selected page, cached pages by page number, and
+# the extractor for the remaining pages (None if all are cached)
+PagePlan = Tuple[Dict[int, str], Dict[int, dict], Optional[PDFExtractor]]
+
+SHA256_HEX_LENGTH = 64
+
+
+async def _save_upload(file: UploadFile) -> Tuple[str, str]:
     """
-    Extract text from a PDF file and return chunked text for AI processing.
+    Validate the uploaded file's type and size and copy it to a temporary
+    file in bounded blocks, rejecting it as soon as it exceeds the limit.
 
-    - **file**: PDF file (max 10MB)
-    - **chunk_size**: Size of each text chunk (default: 1000)
-    - **chunk_overlap**: Overlap between consecutive chunks (default: 200)
+    Returns:
+        (path, content_hash) with the SHA-256 of the content. The caller
+        owns the file and must remove it with _remove_upload.
     """
     # Validate file type
     if not file.filename or not file.filename.lower().endswith('.pdf'):
@@ -32,19 +108,310 @@ async def extract_pdf(
             detail="File must be a PDF document"
         )
 
-    # Read file content
-    content = await file.read()
+    too_large = HTTPException(
+        status_code=400,
+        detail=f"File size exceeds maximum allowed size of {settings.max_file_size_mb}MB"
+    )
+
+    # The multipart parser reports the spooled size up front
+    if file.size is not None and file.size > MAX_FILE_SIZE:
+        raise too_large
+
+    digest = hashlib.sha256()
+    size = 0
+    read_seconds = 0.0
+    write_seconds = 0.0
+    fd, path = tempfile.mkstemp(suffix=".pdf")
+    try:
+        with os.fdopen(fd, "wb") as tmp:
+            while True:
+                read_start = time.perf_counter()
+                block = await file.read(UPLOAD_BLOCK_SIZE)
+                read_seconds += time.perf_counter() - read_start
+                if not block:
+                    break
+
+                # Validate file size
+                size += len(block)
+                if size > MAX_FILE_SIZE:
+                    raise too_large
+
+                write_start = time.perf_counter()
+                digest.update(block)
+                await run_in_threadpool(tmp.write, block)
+                write_seconds += time.perf_counter() - write_start
+    except BaseException:
+        _remove_upload(path)
+        raise
+
+    stage_seconds.observe(read_seconds, stage="upload_read")
+    stage_seconds.observe(write_seconds, stage="temp_file_write")
+    return path, digest.hexdigest()
+
+
+def _remove_upload(path: str) -> None:
+    try:
+        os.unlink(path)
+    except FileNotFoundError:
+        pass
+
+
+def _resolve_deadline(deadline_seconds: Optional[float]) -> Optional[float]:
+    """
+    Apply the default to the deadline_seconds request parameter and
+    validate it. Returns None when extraction has no deadline.
+    """
+    if deadline_seconds is None:
+        deadline_seconds = settings.extraction_deadline_seconds or None
+    elif deadline_seconds <= 0:
+        raise HTTPException(
+            status_code=400,
+            detail="deadline_seconds must be positive"
+        )
+    return deadline_seconds
+
+
+def _resolve_dedup(dedup: Optional[str]) -> str:
+    """
+    Apply the default to the dedup request parameter and validate it.
+    """
+    dedup = dedup or settings.default_dedup
+    if dedup not in DEDUP_MODES:
+        raise HTTPException(
+            status_code=400,
+            detail=f"dedup must be one of: {', '.join(DEDUP_MODES)}"
+        )
+    return dedup
+
+
+def _new_profiler(request: Request) -> Optional[RequestProfiler]:
+    """
+    Profiler for a request asking to be profiled with the X-Profile header
+    or the profile query parameter.
+
+    Raises:
+        HTTPException: 403 unless DEBUG is on
+    """
+    flag = request.headers.get("X-Profile") or request.query_params.get("profile")
+    if flag is None or flag.strip().lower() in ("", "0", "false", "no", "off"):
+        return None
+    if not settings.debug:
+        raise HTTPException(status_code=403, detail="Request profiling requires DEBUG")
+    return RequestProfiler(profile_store, settings.profile_top_functions)
+
+
+def _request_profile(summary: dict) -> RequestProfile:
+    download_url = f"/debug/profiles/{summary['profile_id']}"
+    return RequestProfile(
+        **summary,
+        pstats_url=f"{download_url}?format=pstats",
+        speedscope_url=f"{download_url}?format=speedscope"
+    )
+
 
-    # Validate file size
-    if len(content) > MAX_FILE_SIZE:
+def _resolve_previous_version(previous_version: Optional[str]) -> Optional[str]:
+    """
+    Validate the previous_version request parameter, the content hash of an
+    earlier version of the document.
+    """
+    if previous_version is None:
+        return None
+    previous_version = previous_version.lower()
+    if len(previous_version) != SHA256_HEX_LENGTH or not all(c in "0123456789abcdef" for c in previous_version):
         raise HTTPException(
             status_code=400,
-            detail=f"File size exceeds maximum allowed size of {settings.max_file_size_mb}MB"
+            detail="previous_version must be the content_hash of an earlier extraction"
+        )
+    return previous_version
+
+
+async def _new_diff(
+    previous_version: Optional[str],
+    chunker: TextChunker,
+    extractor: PDFExtractor
+) -> Optional[ChunkDiff]:
+    """
+    Diff against the chunks of the previous version of the document, if
+    its extraction is still cached with the same extraction parameters.
+    """
+    if previous_version is None:
+        return None
+    cache_key = extraction_cache.make_key(previous_version, **extractor.cache_params())
+    previous = await run_in_threadpool(extraction_cache.get, cache_key)
+    if previous is None:
+        return None
+    return ChunkDiff(chunk.content for chunk in chunker.chunk_extraction(previous))
+
+
+def _add_to_diff(diff: Optional[ChunkDiff], chunks: List[ChunkRecord]) -> None:
+    if diff is not None:
+        diff.add(chunks)
+
+
+def _finish_diff(diff: Optional[ChunkDiff], extraction_result: dict) -> None:
+    if diff is not None:
+        extraction_result["changed_chunks"] = diff.changed
+        extraction_result["removed_chunks"] = diff.removed
+
+
+def _new_deduplicator(dedup: str, content_hash: str) -> Optional[ChunkDeduplicator]:
+    if dedup == "off":
+        return None
+    return ChunkDeduplicator(content_hash, fingerprint_index, settings.near_duplicate_threshold)
+
+
+async def _deduplicate(
+    deduplicator: Optional[ChunkDeduplicator],
+    chunks: List[ChunkRecord],
+    dedup: str
+) -> List[ChunkRecord]:
+    """
+    Fingerprint chunks and flag repeats, returning the chunks to send:
+    all of them, or only the unique ones with dedup=collapse.
+    """
+    if deduplicator is None or not chunks:
+        return chunks
+    with stage_seconds.time(stage="fingerprinting"):
+        unique = await run_in_threadpool(deduplicator.add, chunks)
+    return unique if dedup == "collapse" else chunks
+
+
+async def _finish_deduplication(deduplicator: Optional[ChunkDeduplicator], extraction_result: dict) -> None:
+    """
+    Record the document's fingerprints in the index and its duplicate
+    count in the extraction result's metadata.
+    """
+    if deduplicator is None:
+        return
+    await run_in_threadpool(deduplicator.finish)
+    duplicate_chunks_total.inc(deduplicator.duplicates)
+    extraction_result["duplicate_chunks"] = deduplicator.duplicates
+
+
+def _deadline_exceeded(deadline_seconds: float) -> HTTPException:
+    return HTTPException(
+        status_code=504,
+        detail=f"Extraction exceeded the deadline of {deadline_seconds:g} seconds"
+    )
+
+
+async def _wait_for_disconnect(request: Request) -> None:
+    while not await request.is_disconnected():
+        await asyncio.sleep(DISCONNECT_POLL_SECONDS)
+
+
+async def _run_cancellable(request: Request, work: Awaitable[T], deadline_seconds: Optional[float]) -> T:
+    """
+    Await work, cancelling it if the client disconnects or deadline_seconds
+    pass first. Cancelling stops the extraction in the worker pool.
+
+    Raises:
+        HTTPException: 504 past the deadline, 499 if the client went away
+    """
+    task = asyncio.ensure_future(work)
+    disconnected = asyncio.ensure_future(_wait_for_disconnect(request))
+    try:
+        done, _ = await asyncio.wait(
+            {task, disconnected}, timeout=deadline_seconds, return_when=asyncio.FIRST_COMPLETED
         )
+    except asyncio.CancelledError:
+        task.cancel()
+        raise
+    finally:
+        disconnected.cancel()
+
+    if task in done:
+        return task.result()
 
+    # Wait for the work to unwind, so the worker has been told to stop and
+    # the admitted cost is released before responding
+    task.cancel()
+    await asyncio.gather(task, return_exceptions=True)
+
+    if disconnected in done:
+        extraction_cancellations_total.inc(reason="client_disconnect")
+        raise HTTPException(status_code=499, detail="Client closed the request")
+    extraction_cancellations_total.inc(reason="deadline")
+    raise _deadline_exceeded(deadline_seconds)
+
+
+async def _until(items: AsyncIterator[Any], deadline: Optional[float]) -> AsyncIterator[Any]:
+    """
+    Yield from items, raising asyncio.TimeoutError once the event loop's
+    clock passes deadline. The pending item is cancelled, which stops an
+    extraction pool stream in its worker.
+    """
+    if deadline is None:
+        async for item in items:
+            yield item
+        return
+
+    loop = asyncio.get_running_loop()
+    iterator = items.__aiter__()
+    while True:
+        try:
+            item = await asyncio.wait_for(iterator.__anext__(), deadline - loop.time())
+        except StopAsyncIteration:
+            return
+        yield item
+
+
+def _resolve_params(
+    chunk_size: Optional[int],
+    chunk_overlap: Optional[int],
+    extraction_mode: Optional[str],
+    chunk_unit: Optional[str] = None,
+    chunk_strategy: Optional[str] = None,
+    pages: Optional[str] = None,
+    max_pages: Optional[int] = None,
+    allow_auto: bool = False
+) -> Tuple[TextChunker, PDFExtractor]:
+    """
+    Apply defaults to the request parameters, validate them and build the
+    chunker and extractor they describe. With allow_auto, extraction_mode
+    may be auto; the extractor is then in fast mode until the caller
+    picks a mode with PDFExtractor.with_mode.
+    """
     # Use defaults if not provided
-    chunk_size = chunk_size or settings.default_chunk_size
-    chunk_overlap = chunk_overlap or settings.default_chunk_overlap
+    chunk_unit = chunk_unit or settings.default_chunk_unit
+    chunk_strategy = chunk_strategy or settings.default_chunk_strategy
+    if chunk_unit == "tokens":
+        chunk_size = chunk_size or settings.default_token_chunk_size
+        chunk_overlap = chunk_overlap or settings.default_token_chunk_overlap
+    else:
+        chunk_size = chunk_size or settings.default_chunk_size
+        chunk_overlap = chunk_overlap or settings.default_chunk_overlap
+    extraction_mode = extraction_mode or settings.default_extraction_mode
+
+    # Validate chunk unit
+    if chunk_unit not in CHUNK_UNITS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"chunk_unit must be one of: {', '.join(CHUNK_UNITS)}"
+        )
+
+    # Validate chunk strategy
+    if chunk_strategy not in CHUNK_STRATEGIES:
+        raise HTTPException(
+            status_code=400,
+            detail=f"chunk_strategy must be one of: {', '.join(CHUNK_STRATEGIES)}"
+        )
+
+    if chunk_strategy == "layout" and chunk_unit == "tokens":
+        raise HTTPException(
+            status_code=400,
+            detail="chunk_strategy layout requires chunk_unit characters"
+        )
+
+    # Validate extraction mode
+    extraction_modes = EXTRACTION_MODES + ((AUTO_EXTRACTION_MODE,) if allow_auto else ())
+    if extraction_mode not in extraction_modes:
+        raise HTTPException(
+            status_code=400,
+            detail=f"extraction_mode must be one of: {', '.join(extraction_modes)}"
+        )
+    if extraction_mode == AUTO_EXTRACTION_MODE:
+        extraction_mode = "fast"
 
     # Validate chunking parameters
     if chunk_overlap >= chunk_size:
@@ -53,34 +420,912 @@ async def extract_pdf(
             detail="chunk_overlap must be less than chunk_size"
         )
 
+    # Validate page selection
     try:
-        # Extract text from PDF
-        extractor = PDFExtractor()
-        extraction_result = extractor.extract_from_bytes(content, file.filename)
+        page_ranges = parse_page_ranges(pages) if pages else None
+    except ValueError:
+        raise HTTPException(
+            status_code=400,
+            detail="pages must be page numbers or ranges, e.g. 1-3,5"
+        )
+
+    if max_pages is not None and max_pages < 1:
+        raise HTTPException(
+            status_code=400,
+            detail="max_pages must be at least 1"
+        )
 
-        # Chunk the extracted text
+    if chunk_unit == "tokens":
+        chunker = TokenTextChunker(chunk_size=chunk_size, chunk_overlap=chunk_overlap, tokenizer=TOKENIZER)
+    elif chunk_strategy == "layout":
+        chunker = LayoutChunker(chunk_size=chunk_size, chunk_overlap=chunk_overlap)
+    else:
         chunker = TextChunker(chunk_size=chunk_size, chunk_overlap=chunk_overlap)
-        chunks = chunker.chunk_text(
-            extraction_result["text"],
-            extraction_result["page_boundaries"]
+
+    extractor = PDFExtractor(mode=extraction_mode, pages=page_ranges, max_pages=max_pages)
+    return chunker, extractor
+
+
+def _record_document(extraction_result: dict, total_chunks: int, cache_hit: bool) -> None:
+    """
+    Update the document counters and, for fresh extractions, the
+    extraction stage histograms.
+    """
+    cache_requests_total.inc(result="hit" if cache_hit else "miss")
+    if not cache_hit:
+        observe_stage_ms(extraction_result.get("stage_timings_ms", {}))
+
+    documents_total.inc(ocr=str(bool(extraction_result["ocr_applied"])).lower())
+    pages_total.inc(extraction_result["total_pages"])
+    characters_total.inc(len(extraction_result["text"]))
+    chunks_total.inc(total_chunks)
+
+
+def _build_metadata(extraction_result: dict, cache_hit: bool) -> ExtractionMetadata:
+    return ExtractionMetadata(
+        extractor=extraction_result.get("extractor", "unstructured"),
+        processing_time_ms=extraction_result["processing_time_ms"],
+        ocr_applied=extraction_result["ocr_applied"],
+        page_ocr_applied=extraction_result.get("page_ocr_applied", []),
+        page_timings_ms=extraction_result.get("page_timings_ms", []),
+        extracted_pages=extraction_result.get("extracted_pages"),
+        duplicate_chunks=extraction_result.get("duplicate_chunks"),
+        content_hash=extraction_result.get("content_hash"),
+        reused_pages=extraction_result.get("reused_pages"),
+        changed_chunks=extraction_result.get("changed_chunks"),
+        removed_chunks=extraction_result.get("removed_chunks"),
+        cache_hit=cache_hit
+    )
+
+
+@router.post("/extract-pdf", response_model=Union[ExtractionResponse, CompactExtractionResponse])
+async def extract_pdf(
+    request: Request,
+    file: UploadFile = File(..., description="PDF file to extract text from"),
+    chunk_size: Optional[int] = Form(default=None, description="Chunk size in chunk_unit"),
+    chunk_overlap: Optional[int] = Form(default=None, description="Overlap between chunks in chunk_unit"),
+    extraction_mode: Optional[str] = Form(default=None, description="Extraction mode: unstructured, fast, ocr or auto"),
+    chunk_unit: Optional[str] = Form(default=None, description="Unit of chunk_size and chunk_overlap: characters or tokens"),
+    chunk_strategy: Optional[str] = Form(default=None, description="Chunk placement: sliding or layout"),
+    pages: Optional[str] = Form(default=None, description="Pages to extract, e.g. 1-3,5"),
+    max_pages: Optional[int] = Form(default=None, description="Extract at most this many pages"),
+    dedup: Optional[str] = Form(default=None, description="Repeated chunks: off, flag or collapse"),
+    response_format: Optional[str] = Form(default=None, description="Response format: full or compact"),
+    deadline_seconds: Optional[float] = Form(default=None, description="Give up on extraction after this many seconds"),
+    previous_version: Optional[str] = Form(default=None, description="content_hash of the previous version, to diff chunks against")
+) -> Response:
+    """
+    Extract text from a PDF file and return chunked text for AI processing.
+
+    - **file**: PDF file (max 10MB)
+    - **chunk_size**: Size of each text chunk (default: 1000 characters or
+      256 tokens)
+    - **chunk_overlap**: Overlap between consecutive chunks (default: 200
+      characters or 32 tokens)
+    - **extraction_mode**: `unstructured` layout pipeline, `fast` text-layer
+      extraction with per-page OCR fallback, `ocr` page-parallel OCR, or
+      `auto` for `ocr` if no selected page has a text layer and `fast`
+      otherwise (default: unstructured)
+    - **chunk_unit**: `characters`, or `tokens` as counted by the configured
+      tokenizer; offsets are always in characters (default: characters)
+    - **chunk_strategy**: `sliding` window over the text, or `layout` to
+      pack whole titles, list items, tables and paragraphs into each chunk
+      (default: sliding)
+    - **response_format**: `full` chunks with their content, or `compact`
+      document text once plus columnar chunk offsets (default: full)
+    - **pages**: only extract these pages, e.g. `1-3,5` (default: all)
+    - **max_pages**: extract at most this many of the selected pages, e.g.
+      `2` for a preview (default: all)
+    - **deadline_seconds**: fail with 504 if extraction takes longer
+      (default: no deadline)
+    - **dedup**: `off`, `flag` to fingerprint chunks and flag those
+      repeating an earlier chunk of the document or of another document,
+      or `collapse` to also leave them out (default: off)
+    - **previous_version**: `extraction_metadata.content_hash` of an earlier
+      version of the document, to list the chunks that changed since
+
+    Partial extractions keep the document's page numbering: `total_pages`
+    is the document's page count, skipped pages are empty and
+    `extraction_metadata.extracted_pages` lists the pages extracted.
+
+    Pages whose content is unchanged from an earlier upload are not
+    extracted again (`extraction_metadata.reused_pages`). With
+    `previous_version`, `extraction_metadata.changed_chunks` lists the
+    chunks whose text is new, so only those need re-embedding.
+
+    Extraction is cancelled in the worker pool when the client disconnects
+    or the deadline passes. Files that cannot be extracted, e.g. password
+    protected or unreadable PDFs, are rejected with 422 by a pre-flight
+    probe before any extraction work (see `/extract-pdf/probe`).
+
+    With DEBUG on, an `X-Profile: 1` header or `?profile=1` profiles the
+    request, extraction workers included, and adds a `profile` with its
+    hottest functions and links to download the full profile.
+    """
+    chunker, extractor = _resolve_params(
+        chunk_size, chunk_overlap, extraction_mode, chunk_unit, chunk_strategy, pages, max_pages,
+        allow_auto=True
+    )
+    auto_mode = (extraction_mode or settings.default_extraction_mode) == AUTO_EXTRACTION_MODE
+    deadline_seconds = _resolve_deadline(deadline_seconds)
+    dedup = _resolve_dedup(dedup)
+    previous_version = _resolve_previous_version(previous_version)
+    response_format = response_format or "full"
+    if response_format not in RESPONSE_FORMATS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"response_format must be one of: {', '.join(RESPONSE_FORMATS)}"
+        )
+    profiler = _new_profiler(request)
+    path, content_hash = await _save_upload(file)
+
+    try:
+        probe = None
+        if auto_mode:
+            probe = await _preflight(path, extractor)
+            extractor = extractor.with_mode(probe["recommended_mode"])
+        if profiler is not None:
+            profiler.start()
+
+        if response_format == "compact":
+            extraction_result, chunks, cache_hit = await _run_cancellable(
+                request,
+                _extract_chunks(
+                    path, content_hash, chunker, extractor, dedup, previous_version,
+                    profiler=profiler, probe=probe
+                ),
+                deadline_seconds
+            )
+            with stage_seconds.time(stage="serialization"):
+                compact = _compact_response(file.filename, extraction_result, chunks, cache_hit)
+                body = _dumps(compact)
+        else:
+            response = await _run_cancellable(
+                request,
+                _extract(
+                    path, content_hash, file.filename, chunker, extractor, dedup, previous_version,
+                    profiler=profiler, probe=probe
+                ),
+                deadline_seconds
+            )
+            with stage_seconds.time(stage="serialization"):
+                body = response.model_dump_json()
+
+        if profiler is not None:
+            # Serialization is part of the profile, so the response is
+            # serialized again to include it
+            profile = _request_profile(profiler.finish())
+            if response_format == "compact":
+                body = _dumps({**compact, "profile": profile.model_dump()})
+            else:
+                response.profile = profile
+                body = response.model_dump_json()
+        return Response(content=body, media_type="application/json")
+
+    except HTTPException:
+        raise
+    except ProfilerBusy as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    except Exception as e:
+        raise HTTPException(
+            status_code=500,
+            detail=f"Failed to process PDF: {str(e)}"
+        )
+    finally:
+        if profiler is not None:
+            profiler.discard()
+        _remove_upload(path)
+
+
+async def _preflight(path: str, extractor: PDFExtractor) -> dict:
+    """
+    Probe the PDF at path before extracting it.
+
+    Raises:
+        HTTPException: 422 if it cannot be extracted
+    """
+    probe = await run_in_threadpool(extractor.probe, path)
+    if probe["error"] is not None:
+        raise HTTPException(status_code=422, detail=probe["error"])
+    return probe
+
+
+def _estimate_cost(extractor: PDFExtractor, probe: dict) -> float:
+    """
+    Admission cost of extracting the pages extractor selects, from a probe
+    of the document.
+    """
+    if probe["total_pages"] is None:
+        return extraction_admission.estimate_cost(None, ocr_likely=True)
+    return extraction_admission.estimate_cost(
+        len(extractor.select_pages(probe["total_pages"])),
+        ocr_likely=True,
+        ocr_pages=len(extractor.likely_ocr_pages(probe["pages"]))
+    )
+
+
+async def _admit(path: str, extractor: PDFExtractor, probe: Optional[dict] = None) -> float:
+    """
+    Wait for admission to extract the PDF at path, with the cost estimated
+    from a probe of the file, or the given probe of the whole document.
+
+    Returns:
+        The cost held, to release once extraction is done
+
+    Raises:
+        HTTPException: 503 with Retry-After if the request is not admitted
+    """
+    if probe is None:
+        probe = await run_in_threadpool(extractor.probe, path)
+    cost = _estimate_cost(extractor, probe)
+    try:
+        return await extraction_admission.acquire(cost)
+    except AdmissionRejected as e:
+        raise HTTPException(
+            status_code=503,
+            detail=str(e),
+            headers={"Retry-After": str(e.retry_after)}
+        )
+
+
+async def _extract(
+    path: str,
+    content_hash: str,
+    filename: str,
+    chunker: TextChunker,
+    extractor: PDFExtractor,
+    dedup: str = "off",
+    previous_version: Optional[str] = None,
+    progress: Optional[Callable[[int], None]] = None,
+    profiler: Optional[RequestProfiler] = None,
+    probe: Optional[dict] = None
+) -> ExtractionResponse:
+    """
+    Extract and chunk the PDF at path into an /extract-pdf response.
+    """
+    extraction_result, chunks, cache_hit = await _extract_chunks(
+        path, content_hash, chunker, extractor, dedup, previous_version, progress, profiler, probe
+    )
+
+    # Chunk records are already valid, so they are converted to models
+    # without a second validation pass
+    return ExtractionResponse.model_construct(
+        success=True,
+        filename=filename,
+        total_pages=extraction_result["total_pages"],
+        total_characters=len(extraction_result["text"]),
+        total_chunks=len(chunks),
+        chunks=[chunk.to_model() for chunk in chunks],
+        extraction_metadata=_build_metadata(extraction_result, cache_hit)
+    )
+
+
+async def _extract_chunks(
+    path: str,
+    content_hash: str,
+    chunker: TextChunker,
+    extractor: PDFExtractor,
+    dedup: str = "off",
+    previous_version: Optional[str] = None,
+    progress: Optional[Callable[[int], None]] = None,
+    profiler: Optional[RequestProfiler] = None,
+    probe: Optional[dict] = None
+) -> Tuple[dict, List[ChunkRecord], bool]:
+    """
+    Extract and chunk the PDF at path, reusing a cached extraction of the
+    same content when available, or else the cached pages it shares with
+    other documents.
+
+    Unless dedup is off, chunks are fingerprinted and repeats flagged, or
+    left out with dedup=collapse. With previous_version, chunks are diffed
+    against those of that version.
+
+    If progress is given, it is called with the number of pages done after
+    each page is extracted. Jobs pass progress and skip admission control:
+    they already run in the background. With profiler, extraction workers
+    are profiled too.
+
+    Otherwise, files that cannot be extracted are rejected by a pre-flight
+    probe, unless one is given, before any extraction work.
+
+    Returns:
+        (extraction result, chunks, whether the cache was used)
+    """
+    # Reuse a previous extraction of identical content if available
+    lookup_start = time.time()
+    cache_key = extraction_cache.make_key(content_hash, **extractor.cache_params())
+    extraction_result = await run_in_threadpool(extraction_cache.get, cache_key)
+    cache_hit = extraction_result is not None
+
+    if cache_hit:
+        extraction_result["processing_time_ms"] = int((time.time() - lookup_start) * 1000)
+        if progress is not None:
+            progress(len(extraction_result["page_boundaries"]))
+    else:
+        # Extract the pages not in the page cache in the worker pool so the
+        # event loop stays free, once admission control lets the request
+        # in. Pages are streamed back so a cancelled request stops after
+        # the current page
+        if progress is None and probe is None:
+            probe = await _preflight(path, extractor)
+        page_plan = await _plan_pages(path, extractor)
+        page_extractor = page_plan[2]
+        cost = (
+            await _admit(path, page_extractor, probe)
+            if progress is None and page_extractor is not None else 0.0
+        )
+        try:
+            pages = []
+            async for page in _extract_pages(path, page_plan, profiler):
+                pages.append(page)
+                if progress is not None:
+                    progress(len(pages))
+        finally:
+            extraction_admission.release(cost)
+        extraction_result = await _assemble(extractor, pages, path)
+        extraction_result["processing_time_ms"] = int((time.time() - lookup_start) * 1000)
+        await run_in_threadpool(extraction_cache.put, cache_key, extraction_result)
+
+    extraction_result["content_hash"] = content_hash
+
+    # Chunk the extracted text
+    with stage_seconds.time(stage="chunking"):
+        chunks = chunker.chunk_extraction(extraction_result)
+    diff = await _new_diff(previous_version, chunker, extractor)
+    _add_to_diff(diff, chunks)
+    _finish_diff(diff, extraction_result)
+    deduplicator = _new_deduplicator(dedup, content_hash)
+    chunks = await _deduplicate(deduplicator, chunks, dedup)
+    await _finish_deduplication(deduplicator, extraction_result)
+    _record_document(extraction_result, len(chunks), cache_hit)
+
+    return extraction_result, chunks, cache_hit
+
+
+async def _assemble(extractor: PDFExtractor, pages: List[dict], path: str) -> dict:
+    """
+    Build the extraction result of the pages extracted from the PDF at
+    path. A partial extraction also needs the document's page count.
+    """
+    total_pages = await run_in_threadpool(PDFExtractor.count_pages, path) if extractor.partial else None
+    extraction_result = extractor.assemble_result(pages, total_pages)
+    extraction_result["reused_pages"] = [page["page_number"] for page in pages if page.get("reused")]
+    return extraction_result
+
+
+async def _plan_pages(path: str, extractor: PDFExtractor) -> PagePlan:
+    """
+    Look up the pages extractor selects from the PDF at path in the page
+    cache, by the hash of each page.
+    """
+    if not extraction_cache.enabled:
+        return {}, {}, extractor
+    try:
+        page_hashes = await run_in_threadpool(PDFExtractor.page_hashes, path)
+    except Exception:
+        # Unreadable by pypdf; left to the extractor to fail or cope
+        return {}, {}, extractor
+
+    params = extractor.page_cache_params()
+    page_keys = {
+        page_number: extraction_cache.make_page_key(page_hashes[page_number - 1], **params)
+        for page_number in extractor.select_pages(len(page_hashes))
+    }
+    cached = await run_in_threadpool(
+        lambda: {page_number: extraction_cache.get_page(key) for page_number, key in page_keys.items()}
+    )
+    cached_pages = {page_number: page for page_number, page in cached.items() if page is not None}
+
+    missing = [page_number for page_number in page_keys if page_number not in cached_pages]
+    if not missing:
+        return page_keys, cached_pages, None
+    if not cached_pages:
+        return page_keys, cached_pages, extractor
+    return page_keys, cached_pages, extractor.restricted_to(missing)
+
+
+async def _extract_pages(
+    path: str,
+    page_plan: PagePlan,
+    profiler: Optional[RequestProfiler] = None
+) -> AsyncIterator[dict]:
+    """
+    Yield the pages of the PDF at path selected by page_plan in page
+    order: cached pages right away, the others as the worker pool
+    extracts them, under cProfile if profiler is given. Extracted pages
+    are added to the page cache.
+    """
+    page_keys, cached_pages, extractor = page_plan
+    reused = sorted(cached_pages)
+    missing = [page_number for page_number in page_keys if page_number not in cached_pages]
+
+    def reuse_until(page_number: Optional[int]) -> List[dict]:
+        pages = []
+        while reused and (page_number is None or reused[0] < page_number):
+            reused_number = reused.pop(0)
+            pages.append({
+                **cached_pages[reused_number],
+                "page_number": reused_number,
+                "elapsed_ms": 0,
+                "stage_timings_ms": {},
+                "reused": True
+            })
+        return pages
+
+    for page in reuse_until(missing[0] if missing else None):
+        yield page
+    if extractor is None:
+        return
+
+    if profiler is not None:
+        pages = extraction_pool.stream(profiled_iter, extractor.iter_pages, profiler.worker_path(), path)
+    else:
+        pages = extraction_pool.stream(extractor.iter_pages, path)
+    try:
+        async for page in pages:
+            for cached_page in reuse_until(page["page_number"]):
+                yield cached_page
+            key = page_keys.get(page["page_number"])
+            if key is not None:
+                await run_in_threadpool(extraction_cache.put_page, key, page)
+            yield page
+    finally:
+        await pages.aclose()
+
+    for page in reuse_until(None):
+        yield page
+
+
+def _compact_response(filename: str, extraction_result: dict, chunks: List[ChunkRecord], cache_hit: bool) -> dict:
+    """
+    Build the response_format=compact body: the text once and one list per
+    chunk field, in the layout of CompactExtractionResponse.
+    """
+    return {
+        "success": True,
+        "filename": filename,
+        "total_pages": extraction_result["total_pages"],
+        "total_characters": len(extraction_result["text"]),
+        "total_chunks": len(chunks),
+        "text": extraction_result["text"],
+        "chunks": {
+            "start_char": [chunk.start_char for chunk in chunks],
+            "end_char": [chunk.end_char for chunk in chunks],
+            "page_numbers": [chunk.page_numbers for chunk in chunks],
+            "has_overlap_with_previous": [chunk.has_overlap_with_previous for chunk in chunks],
+            "has_overlap_with_next": [chunk.has_overlap_with_next for chunk in chunks],
+            "element_categories": [list(chunk.element_categories) for chunk in chunks],
+            **_compact_fingerprints(chunks)
+        },
+        "extraction_metadata": _build_metadata(extraction_result, cache_hit).model_dump()
+    }
+
+
+def _compact_fingerprints(chunks: List[ChunkRecord]) -> dict:
+    """
+    Fingerprint columns of a compact response, if chunks were fingerprinted.
+    """
+    if not chunks or chunks[0].fingerprint is None:
+        return {}
+    return {
+        field: [chunk.fingerprint[field] for chunk in chunks]
+        for field in ("content_hash", "minhash", "duplicate_of", "seen_before")
+    }
+
+
+def _dumps(body: dict) -> bytes:
+    """
+    Encode a JSON response body, with orjson when it is installed.
+    """
+    if orjson is not None:
+        return orjson.dumps(body)
+    return json.dumps(body, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+@router.post("/extract-pdf/probe", response_model=ProbeResponse)
+async def probe_pdf(
+    file: UploadFile = File(..., description="PDF file to probe"),
+    extraction_mode: Optional[str] = Form(default=None, description="Extraction mode: unstructured, fast, ocr or auto"),
+    pages: Optional[str] = Form(default=None, description="Pages to extract, e.g. 1-3,5"),
+    max_pages: Optional[int] = Form(default=None, description="Extract at most this many pages")
+) -> ProbeResponse:
+    """
+    Pre-flight look at a PDF, reading only its structure, to decide how to
+    extract it: page count, encryption, whether each page has a text layer
+    and how much of it images cover, and the estimated cost and time of
+    extracting it with the given parameters.
+
+    Documents without a text layer are best extracted with `ocr`, others
+    with `fast`; `async_recommended` suggests submitting a long extraction
+    as a job. Unprocessable files have `processable: false` and an `error`.
+    """
+    _, extractor = _resolve_params(None, None, extraction_mode, pages=pages, max_pages=max_pages, allow_auto=True)
+    auto_mode = (extraction_mode or settings.default_extraction_mode) == AUTO_EXTRACTION_MODE
+    path, _ = await _save_upload(file)
+
+    try:
+        probe_start = time.perf_counter()
+        probe = await run_in_threadpool(extractor.probe, path)
+        probe_time_ms = int((time.perf_counter() - probe_start) * 1000)
+    finally:
+        _remove_upload(path)
+
+    if auto_mode:
+        extractor = extractor.with_mode(probe["recommended_mode"])
+    return ProbeResponse(
+        filename=file.filename,
+        total_pages=probe["total_pages"],
+        encrypted=probe["encrypted"],
+        processable=probe["error"] is None,
+        error=probe["error"],
+        pages=[PageProbe(**page) for page in probe["pages"]],
+        selected_pages=probe["selected_pages"],
+        ocr_pages=probe["ocr_pages"],
+        text_layer=probe["text_layer"],
+        extraction_mode=extractor.mode,
+        recommended_mode=probe["recommended_mode"],
+        estimated_cost=_estimate_cost(extractor, probe) if probe["error"] is None else 0.0,
+        estimated_seconds=probe["estimated_seconds"],
+        async_recommended=probe["estimated_seconds"] >= settings.probe_async_threshold_seconds,
+        probe_time_ms=probe_time_ms
+    )
+
+
+@router.post("/extract-pdf/batch", response_model=BatchExtractionResponse)
+async def extract_pdf_batch(
+    request: Request,
+    files: List[UploadFile] = File(..., description="PDF files to extract text from"),
+    chunk_size: Optional[int] = Form(default=None, description="Chunk size in chunk_unit"),
+    chunk_overlap: Optional[int] = Form(default=None, description="Overlap between chunks in chunk_unit"),
+    extraction_mode: Optional[str] = Form(default=None, description="Extraction mode: unstructured, fast or ocr"),
+    chunk_unit: Optional[str] = Form(default=None, description="Unit of chunk_size and chunk_overlap: characters or tokens"),
+    chunk_strategy: Optional[str] = Form(default=None, description="Chunk placement: sliding or layout"),
+    pages: Optional[str] = Form(default=None, description="Pages to extract, e.g. 1-3,5"),
+    max_pages: Optional[int] = Form(default=None, description="Extract at most this many pages"),
+    dedup: Optional[str] = Form(default=None, description="Repeated chunks: off, flag or collapse"),
+    deadline_seconds: Optional[float] = Form(default=None, description="Give up on a file after this many seconds")
+) -> Response:
+    """
+    Extract several PDF files in one request.
+
+    Files are extracted concurrently in the worker pool and results are
+    returned in upload order. A file that is invalid, fails to extract or
+    exceeds `deadline_seconds` gets a per-file error without failing the
+    rest of the batch. Parameters apply to every file and are the same as
+    `/extract-pdf`.
+
+    - **files**: PDF files (max 10MB each, 50MB and 20 files in total)
+    """
+    chunker, extractor = _resolve_params(
+        chunk_size, chunk_overlap, extraction_mode, chunk_unit, chunk_strategy, pages, max_pages
+    )
+    deadline_seconds = _resolve_deadline(deadline_seconds)
+    dedup = _resolve_dedup(dedup)
+
+    if len(files) > settings.max_batch_files:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Batch exceeds maximum of {settings.max_batch_files} files"
         )
 
-        return ExtractionResponse(
-            success=True,
-            filename=file.filename,
+    # Uploads are already spooled by the multipart parser, so the combined
+    # size can be checked before copying any of them
+    if sum(file.size or 0 for file in files) > MAX_BATCH_SIZE:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Batch size exceeds maximum allowed size of {settings.max_batch_size_mb}MB"
+        )
+
+    async def extract_file(file: UploadFile) -> BatchFileResult:
+        filename = file.filename or ""
+        try:
+            path, content_hash = await _save_upload(file)
+        except HTTPException as e:
+            return BatchFileResult(filename=filename, success=False, error=e.detail)
+
+        try:
+            result = await asyncio.wait_for(
+                _extract(path, content_hash, filename, chunker, extractor, dedup), deadline_seconds
+            )
+        except asyncio.TimeoutError:
+            extraction_cancellations_total.inc(reason="deadline")
+            return BatchFileResult(filename=filename, success=False, error=_deadline_exceeded(deadline_seconds).detail)
+        except HTTPException as e:
+            return BatchFileResult(filename=filename, success=False, error=e.detail)
+        except Exception as e:
+            return BatchFileResult(filename=filename, success=False, error=f"Failed to process PDF: {str(e)}")
+        finally:
+            _remove_upload(path)
+        return BatchFileResult(filename=filename, success=True, result=result)
+
+    results = await _run_cancellable(
+        request, asyncio.gather(*(extract_file(file) for file in files)), None
+    )
+    succeeded = sum(1 for result in results if result.success)
+
+    response = BatchExtractionResponse.model_construct(
+        success=succeeded == len(results),
+        total_files=len(results),
+        succeeded=succeeded,
+        failed=len(results) - succeeded,
+        results=results
+    )
+    with stage_seconds.time(stage="serialization"):
+        body = response.model_dump_json()
+    return Response(content=body, media_type="application/json")
+
+
+@router.post("/extract-pdf/stream")
+async def extract_pdf_stream(
+    file: UploadFile = File(..., description="PDF file to extract text from"),
+    chunk_size: Optional[int] = Form(default=None, description="Chunk size in chunk_unit"),
+    chunk_overlap: Optional[int] = Form(default=None, description="Overlap between chunks in chunk_unit"),
+    extraction_mode: Optional[str] = Form(default=None, description="Extraction mode: unstructured, fast or ocr"),
+    chunk_unit: Optional[str] = Form(default=None, description="Unit of chunk_size and chunk_overlap: characters or tokens"),
+    chunk_strategy: Optional[str] = Form(default=None, description="Chunk placement: sliding or layout"),
+    pages: Optional[str] = Form(default=None, description="Pages to extract, e.g. 1-3,5"),
+    max_pages: Optional[int] = Form(default=None, description="Extract at most this many pages"),
+    dedup: Optional[str] = Form(default=None, description="Repeated chunks: off, flag or collapse"),
+    deadline_seconds: Optional[float] = Form(default=None, description="Give up on extraction after this many seconds"),
+    previous_version: Optional[str] = Form(default=None, description="content_hash of the previous version, to diff chunks against")
+) -> StreamingResponse:
+    """
+    Extract text from a PDF file and stream chunks as newline-delimited JSON.
+
+    Each chunk is sent as a `{"type": "chunk", ...}` line as soon as the
+    pages it covers have been extracted. The stream ends with a
+    `{"type": "summary", ...}` line carrying `total_pages` and
+    `extraction_metadata`, or a `{"type": "error", "detail": ...}` line if
+    extraction fails or exceeds `deadline_seconds` part-way. Parameters are
+    the same as `/extract-pdf`; closing the connection cancels extraction.
+
+    Only the `fast` and `ocr` modes extract page by page; `unstructured`
+    partitions the whole document before the first chunk can be sent, so
+    use `fast` for low time-to-first-chunk.
+    """
+    chunker, extractor = _resolve_params(
+        chunk_size, chunk_overlap, extraction_mode, chunk_unit, chunk_strategy, pages, max_pages
+    )
+    deadline_seconds = _resolve_deadline(deadline_seconds)
+    dedup = _resolve_dedup(dedup)
+    previous_version = _resolve_previous_version(previous_version)
+    path, content_hash = await _save_upload(file)
+    start_time = time.time()
+    deadline = asyncio.get_running_loop().time() + deadline_seconds if deadline_seconds else None
+
+    # Admission is decided before streaming starts, so a rejection is a 503
+    try:
+        cache_key = extraction_cache.make_key(content_hash, **extractor.cache_params())
+        cached_result = await run_in_threadpool(extraction_cache.get, cache_key)
+        page_plan = None
+        cost = 0.0
+        if cached_result is None:
+            page_plan = await _plan_pages(path, extractor)
+            if page_plan[2] is not None:
+                cost = await _admit(path, page_plan[2])
+        diff = await _new_diff(previous_version, chunker, extractor)
+    except BaseException:
+        _remove_upload(path)
+        raise
+
+    return StreamingResponse(
+        _stream_extraction(
+            path, content_hash, file.filename, chunker, extractor, cache_key, cached_result, page_plan, cost,
+            start_time, deadline, deadline_seconds, _new_deduplicator(dedup, content_hash), dedup, diff
+        ),
+        media_type="application/x-ndjson"
+    )
+
+
+async def _stream_extraction(
+    path: str,
+    content_hash: str,
+    filename: str,
+    chunker: TextChunker,
+    extractor: PDFExtractor,
+    cache_key: str,
+    extraction_result: Optional[dict],
+    page_plan: Optional[PagePlan],
+    admitted_cost: float,
+    start_time: float,
+    deadline: Optional[float] = None,
+    deadline_seconds: Optional[float] = None,
+    deduplicator: Optional[ChunkDeduplicator] = None,
+    dedup: str = "off",
+    diff: Optional[ChunkDiff] = None
+) -> AsyncIterator[str]:
+    """
+    Generate the NDJSON lines for /extract-pdf/stream from the cached
+    extraction_result, or by extracting the pages of page_plan from the PDF
+    at path before deadline (event loop time). Chunks are added to diff and
+    go through deduplicator, if any. Removes the uploaded file and
+    releases admitted_cost once done.
+    """
+    total_chunks = 0
+
+    try:
+        cache_hit = extraction_result is not None
+
+        if cache_hit:
+            chunks = chunker.chunk_extraction(extraction_result)
+            _add_to_diff(diff, chunks)
+            for chunk in await _deduplicate(deduplicator, chunks, dedup):
+                total_chunks += 1
+                yield _chunk_line(chunk)
+            extraction_result["processing_time_ms"] = int((time.time() - start_time) * 1000)
+        elif not chunker.supports_incremental:
+            # Chunks need the whole document, so they follow the last page
+            pages = [page async for page in _until(_extract_pages(path, page_plan), deadline)]
+            extraction_result = await _assemble(extractor, pages, path)
+
+            with stage_seconds.time(stage="chunking"):
+                chunks = chunker.chunk_extraction(extraction_result)
+            _add_to_diff(diff, chunks)
+            for chunk in await _deduplicate(deduplicator, chunks, dedup):
+                total_chunks += 1
+                yield _chunk_line(chunk)
+
+            extraction_result["processing_time_ms"] = int((time.time() - start_time) * 1000)
+            await run_in_threadpool(extraction_cache.put, cache_key, extraction_result)
+        else:
+            # Chunk pages as they arrive, emitting every chunk as soon as
+            # no later page can change it
+            incremental_chunker = chunker.incremental(records=True)
+            pages = []
+            chunking_seconds = 0.0
+
+            async for page in _until(_extract_pages(path, page_plan), deadline):
+                chunking_start = time.perf_counter()
+                chunks = []
+                # Pages skipped by a partial extraction are empty, so later
+                # pages keep their numbers
+                for _ in range(len(incremental_chunker.page_boundaries) + 1, page["page_number"]):
+                    chunks.extend(incremental_chunker.add_page(""))
+                pages.append(page)
+                chunks.extend(incremental_chunker.add_page(page["text"]))
+                chunking_seconds += time.perf_counter() - chunking_start
+                _add_to_diff(diff, chunks)
+                for chunk in await _deduplicate(deduplicator, chunks, dedup):
+                    total_chunks += 1
+                    yield _chunk_line(chunk)
+
+            chunking_start = time.perf_counter()
+            chunks = incremental_chunker.finish()
+            stage_seconds.observe(chunking_seconds + time.perf_counter() - chunking_start, stage="chunking")
+            _add_to_diff(diff, chunks)
+            for chunk in await _deduplicate(deduplicator, chunks, dedup):
+                total_chunks += 1
+                yield _chunk_line(chunk)
+
+            extraction_result = await _assemble(extractor, pages, path)
+            extraction_result["processing_time_ms"] = int((time.time() - start_time) * 1000)
+            await run_in_threadpool(extraction_cache.put, cache_key, extraction_result)
+
+        extraction_result["content_hash"] = content_hash
+        _finish_diff(diff, extraction_result)
+        await _finish_deduplication(deduplicator, extraction_result)
+        _record_document(extraction_result, total_chunks, cache_hit)
+        summary = ExtractionStreamSummary(
+            filename=filename,
             total_pages=extraction_result["total_pages"],
             total_characters=len(extraction_result["text"]),
-            total_chunks=len(chunks),
-            chunks=chunks,
-            extraction_metadata=ExtractionMetadata(
-                extractor="unstructured",
-                processing_time_ms=extraction_result["processing_time_ms"],
-                ocr_applied=extraction_result["ocr_applied"]
-            )
+            total_chunks=total_chunks,
+            extraction_metadata=_build_metadata(extraction_result, cache_hit)
         )
+        yield summary.model_dump_json() + "\n"
 
+    except asyncio.TimeoutError:
+        extraction_cancellations_total.inc(reason="deadline")
+        yield json.dumps({"type": "error", "detail": _deadline_exceeded(deadline_seconds).detail}) + "\n"
+    except (asyncio.CancelledError, GeneratorExit):
+        # The client disconnected; leaving the loop stops the worker
+        extraction_cancellations_total.inc(reason="client_disconnect")
+        raise
     except Exception as e:
+        yield json.dumps({"type": "error", "detail": f"Failed to process PDF: {str(e)}"}) + "\n"
+    finally:
+        extraction_admission.release(admitted_cost)
+        _remove_upload(path)
+
+
+def _chunk_line(chunk: ChunkRecord) -> str:
+    return json.dumps({"type": "chunk", **chunk.to_dict()}) + "\n"
+
+
+@router.post("/extract-pdf/jobs", response_model=JobStatusResponse, status_code=202)
+async def submit_extraction_job(
+    file: UploadFile = File(..., description="PDF file to extract text from"),
+    chunk_size: Optional[int] = Form(default=None, description="Chunk size in chunk_unit"),
+    chunk_overlap: Optional[int] = Form(default=None, description="Overlap between chunks in chunk_unit"),
+    extraction_mode: Optional[str] = Form(default=None, description="Extraction mode: unstructured, fast or ocr"),
+    chunk_unit: Optional[str] = Form(default=None, description="Unit of chunk_size and chunk_overlap: characters or tokens"),
+    chunk_strategy: Optional[str] = Form(default=None, description="Chunk placement: sliding or layout"),
+    pages: Optional[str] = Form(default=None, description="Pages to extract, e.g. 1-3,5"),
+    max_pages: Optional[int] = Form(default=None, description="Extract at most this many pages"),
+    dedup: Optional[str] = Form(default=None, description="Repeated chunks: off, flag or collapse"),
+    previous_version: Optional[str] = Form(default=None, description="content_hash of the previous version, to diff chunks against")
+) -> JobStatusResponse:
+    """
+    Start extracting a PDF in the background and return its job right away.
+
+    Poll `/extract-pdf/jobs/{job_id}` for progress and fetch the
+    `/extract-pdf` response from `/extract-pdf/jobs/{job_id}/result` once
+    the job is completed. Submitting the same file with the same parameters
+    again returns the existing job instead of starting over. Parameters are
+    the same as `/extract-pdf`.
+    """
+    chunker, extractor = _resolve_params(
+        chunk_size, chunk_overlap, extraction_mode, chunk_unit, chunk_strategy, pages, max_pages
+    )
+    dedup = _resolve_dedup(dedup)
+    previous_version = _resolve_previous_version(previous_version)
+    path, content_hash = await _save_upload(file)
+
+    job_key = extraction_cache.make_key(
+        content_hash,
+        **chunker.params(),
+        **extractor.cache_params(),
+        dedup=dedup,
+        previous_version=previous_version
+    )
+    existing = extraction_jobs.find_active(job_key)
+    if existing is not None:
+        _remove_upload(path)
+        return JobStatusResponse(**existing)
+
+    total_pages = await run_in_threadpool(PDFExtractor.count_pages, path)
+    if total_pages is not None and extractor.partial:
+        total_pages = len(extractor.select_pages(total_pages))
+    filename = file.filename
+
+    async def work(progress: Callable[[int], None]) -> dict:
+        try:
+            response = await _extract(
+                path, content_hash, filename, chunker, extractor, dedup, previous_version, progress
+            )
+        finally:
+            _remove_upload(path)
+        return response.model_dump()
+
+    job = extraction_jobs.submit(job_key, work, total_pages=total_pages)
+    return JobStatusResponse(**job)
+
+
+def _get_job(job_id: str) -> dict:
+    job = extraction_jobs.get(job_id)
+    if job is None:
+        raise HTTPException(
+            status_code=404,
+            detail="Job not found or its result has expired"
+        )
+    return job
+
+
+@router.get("/extract-pdf/jobs/{job_id}", response_model=JobStatusResponse)
+async def get_extraction_job(job_id: str) -> JobStatusResponse:
+    """
+    Status of an extraction job, including the number of pages extracted.
+    """
+    return JobStatusResponse(**_get_job(job_id))
+
+
+@router.get("/extract-pdf/jobs/{job_id}/result", response_model=ExtractionResponse)
+async def get_extraction_job_result(job_id: str) -> Response:
+    """
+    Result of a completed extraction job, in the `/extract-pdf` format.
+    """
+    job = _get_job(job_id)
+
+    if job["status"] == FAILED:
         raise HTTPException(
             status_code=500,
-            detail=f"Failed to process PDF: {str(e)}"
+            detail=f"Failed to process PDF: {job['error']}"
+        )
+    if job["status"] != COMPLETED:
+        raise HTTPException(
+            status_code=409,
+            detail=f"Job is {job['status']}"
         )
+
+    # Stored results were dumped from an ExtractionResponse; send them as is
+    return Response(content=_dumps(job["result"]), media_type="application/json")
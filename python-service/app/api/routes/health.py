@@ -1,5 +1,6 @@
-from fastapi import APIRouter
-from app.models.schemas import HealthResponse
+from fastapi import APIRouter, Response
+from app.models.schemas import HealthResponse, PoolStatusResponse, ReadinessResponse
+from app.services.extraction_pool import extraction_pool
 
 router = APIRouter()
 
@@ -11,3 +12,35 @@ async def health_check() -> HealthResponse:
     Returns the service status, name, and version.
     """
     return HealthResponse()
+
+
+@router.get("/health/live", response_model=HealthResponse)
+async def liveness() -> HealthResponse:
+    """
+    Liveness probe: the server process is up and serving requests.
+    """
+    return HealthResponse()
+
+
+@router.get("/health/ready", response_model=ReadinessResponse)
+async def readiness(response: Response) -> ReadinessResponse:
+    """
+    Readiness probe: 200 once the extraction workers are warmed up, 503
+    while warming up or if warm-up failed.
+    """
+    if extraction_pool.ready:
+        return ReadinessResponse(status="ready")
+
+    response.status_code = 503
+    if extraction_pool.warm_up_error is not None:
+        return ReadinessResponse(status="failed", error=extraction_pool.warm_up_error)
+    return ReadinessResponse(status="warming_up")
+
+
+@router.get("/health/pool", response_model=PoolStatusResponse)
+async def pool_status() -> PoolStatusResponse:
+    """
+    Extraction worker pool utilisation, including the number of requests
+    waiting for a free slot.
+    """
+    return PoolStatusResponse(**extraction_pool.stats())
@@ -0,0 +1,45 @@
+from fastapi import APIRouter
+from fastapi.responses import Response
+
+from app.services.admission import extraction_admission
+from app.services.extraction_pool import extraction_pool
+from app.services.metrics import Gauge, MetricsRegistry, registry
+
+router = APIRouter()
+
+registry.register(Gauge(
+    "ttmm_extractions_in_flight",
+    "Extractions currently holding a worker pool slot.",
+    lambda: extraction_pool.stats()["in_flight"]
+))
+registry.register(Gauge(
+    "ttmm_extractions_queued",
+    "Requests waiting for a worker pool slot.",
+    lambda: extraction_pool.stats()["queued"]
+))
+registry.register(Gauge(
+    "ttmm_worker_rss_bytes",
+    "Resident set size of each extraction worker after its last task.",
+    lambda: {(str(worker["worker"]),): worker["rss_bytes"] for worker in extraction_pool.stats()["workers"]},
+    label_names=("worker",)
+))
+registry.register(Gauge(
+    "ttmm_admission_cost_in_use",
+    "Estimated cost of the extraction requests currently admitted.",
+    lambda: extraction_admission.stats()["in_use"]
+))
+registry.register(Gauge(
+    "ttmm_admission_queued",
+    "Extraction requests waiting for admission.",
+    lambda: extraction_admission.stats()["queued"]
+))
+
+
+@router.get("/metrics")
+async def metrics() -> Response:
+    """
+    Service metrics in the Prometheus text exposition format: per-stage
+    latency histograms, document, page, character, chunk and cache
+    counters, worker pool gauges and worker recycling.
+    """
+    return Response(content=registry.render(), media_type=MetricsRegistry.CONTENT_TYPE)
@@ -0,0 +1,58 @@
+import json
+from typing import List
+
+from fastapi import APIRouter, HTTPException
+from fastapi.responses import FileResponse, Response
+from starlette.concurrency import run_in_threadpool
+
+from app.config import settings
+from app.models.schemas import ProfileInfo
+from app.services.profiling import PROFILE_FORMATS, profile_store, to_speedscope
+
+router = APIRouter()
+
+
+def _require_debug() -> None:
+    # Profiles expose code paths and timings, so they are only served in debug
+    if not settings.debug:
+        raise HTTPException(status_code=404, detail="Not Found")
+
+
+@router.get("/debug/profiles", response_model=List[ProfileInfo])
+async def list_profiles() -> List[ProfileInfo]:
+    """
+    Stored request profiles, newest first. Only available with DEBUG.
+    """
+    _require_debug()
+    return [ProfileInfo(**entry) for entry in await run_in_threadpool(profile_store.list)]
+
+
+@router.get("/debug/profiles/{profile_id}")
+async def download_profile(profile_id: str, format: str = "pstats") -> Response:
+    """
+    Download a request profile as a `pstats` file (for `python -m pstats`
+    or snakeviz) or as a `speedscope` JSON file (for speedscope.app). Only
+    available with DEBUG.
+    """
+    _require_debug()
+    if format not in PROFILE_FORMATS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"format must be one of: {', '.join(PROFILE_FORMATS)}"
+        )
+
+    if format == "pstats":
+        path = profile_store.path(profile_id)
+        if path is None:
+            raise HTTPException(status_code=404, detail="Profile not found")
+        return FileResponse(path, media_type="application/octet-stream", filename=f"{profile_id}.pstats")
+
+    stats = await run_in_threadpool(profile_store.load, profile_id)
+    if stats is None:
+        raise HTTPException(status_code=404, detail="Profile not found")
+    body = await run_in_threadpool(lambda: json.dumps(to_speedscope(stats, profile_id)))
+    return Response(
+        content=body,
+        media_type="application/json",
+        headers={"Content-Disposition": f'attachment; filename="{profile_id}.speedscope.json"'}
+    )
@@ -1,3 +1,6 @@
+import os
+import tempfile
+
 from pydantic_settings import BaseSettings
 from typing import List
 
@@ -15,10 +18,112 @@ class Settings(BaseSettings):
     # File upload settings
     max_file_size_mb: int = 10
 
+    # Batch extraction: limits on the number and combined size of files
+    max_batch_files: int = 20
+    max_batch_size_mb: int = 50
+
     # Chunking defaults
     default_chunk_size: int = 1000
     default_chunk_overlap: int = 200
 
+    # Token-budgeted chunking: chunk_unit "characters" or "tokens", and the
+    # tokenizer counting tokens ("regex", or "tiktoken:<encoding>" with the
+    # tiktoken package installed)
+    default_chunk_unit: str = "characters"
+    default_token_chunk_size: int = 256
+    default_token_chunk_overlap: int = 32
+    tokenizer: str = "regex"
+
+    # Chunk placement: "sliding" window over the text, or "layout" packing
+    # whole layout elements into each chunk
+    default_chunk_strategy: str = "sliding"
+
+    # Extraction mode: "unstructured" (layout pipeline), "fast" (text layer)
+    # or "ocr" (page-parallel OCR for scanned documents)
+    default_extraction_mode: str = "unstructured"
+
+    # Fast mode: pages whose text layer is shorter than text_layer_min_chars or
+    # has a lower share of readable characters than text_layer_min_quality
+    # are OCRed instead
+    text_layer_min_chars: int = 20
+    text_layer_min_quality: float = 0.5
+    ocr_dpi: int = 200
+
+    # OCR parallelism: page ranges of ocr_pages_per_task pages are OCRed on
+    # up to ocr_workers threads, each driving its own tesseract process
+    ocr_workers: int = 4
+    ocr_pages_per_task: int = 4
+
+    # Pre-flight probe: rough extraction time of a text-layer page and of an
+    # OCRed page on one OCR worker, and the estimated time above which the
+    # probe recommends an extraction job over /extract-pdf
+    estimated_text_page_seconds: float = 0.02
+    estimated_ocr_page_seconds: float = 2.0
+    probe_async_threshold_seconds: float = 30.0
+
+    # OpenMP threads per tesseract process, set as OMP_THREAD_LIMIT in the
+    # extraction workers so parallel OCR does not oversubscribe cores. This
+    # also applies to OCR run by the unstructured pipeline; 0 leaves it unset
+    tesseract_thread_limit: int = 1
+
+    # Extraction worker pool
+    extraction_workers: int = 2
+    max_concurrent_extractions: int = 2
+    # Workers are recycled between tasks after worker_max_tasks documents
+    # or once their RSS passes worker_max_rss_mb (0 disables either), and
+    # replaced by one of spare_workers pre-started, warmed-up processes
+    worker_max_tasks: int = 200
+    worker_max_rss_mb: int = 2048
+    spare_workers: int = 1
+
+    # Admission control: requests are admitted while the estimated cost of
+    # those in progress stays within admission_capacity. A page costs 1, or
+    # admission_ocr_page_cost if it will likely be OCRed. Others wait in a
+    # queue of admission_max_queue requests for up to
+    # admission_queue_timeout_seconds, then get 503 with Retry-After
+    admission_capacity: float = 200.0
+    admission_ocr_page_cost: float = 10.0
+    admission_max_queue: int = 32
+    admission_queue_timeout_seconds: float = 30.0
+    admission_retry_after_seconds: int = 5
+
+    # Extraction requests are cancelled after this many seconds unless they
+    # pass their own deadline_seconds; 0 means no deadline
+    extraction_deadline_seconds: float = 0
+
+    # Worker warm-up at startup, before /health/ready reports ready: "off",
+    # "imports" (load the unstructured pipeline) or "models" (also run it
+    # once so its layout and OCR models are loaded)
+    warm_up: str = "imports"
+
+    # Extraction jobs: finished jobs and their results are kept this long
+    job_result_ttl_seconds: int = 3600
+
+    # Chunk fingerprints: "off", "flag" repeated chunks or also "collapse"
+    # them out of responses. Chunks whose estimated word-shingle (MinHash)
+    # similarity is at least near_duplicate_threshold count as repeats;
+    # chunks of earlier documents are looked up in a local SQLite index
+    default_dedup: str = "off"
+    near_duplicate_threshold: float = 0.8
+    fingerprint_index_enabled: bool = True
+    fingerprint_index_path: str = os.path.join(tempfile.gettempdir(), "ttmm-fingerprints.sqlite3")
+    fingerprint_index_max_entries: int = 1_000_000
+
+    # Request profiling (X-Profile: 1 header or ?profile=1 on /extract-pdf),
+    # only allowed with debug. The newest profile_max_count profiles are
+    # kept in profile_dir for profile_ttl_seconds, for download from
+    # /debug/profiles; responses list the profile_top_functions hottest
+    profile_dir: str = os.path.join(tempfile.gettempdir(), "ttmm-profiles")
+    profile_max_count: int = 20
+    profile_ttl_seconds: int = 3600
+    profile_top_functions: int = 20
+
+    # Extraction cache
+    extraction_cache_enabled: bool = True
+    extraction_cache_dir: str = os.path.join(tempfile.gettempdir(), "ttmm-extraction-cache")
+    extraction_cache_memory_mb: int = 64
+    extraction_cache_disk_mb: int = 512
+
     class Config:
         env_file = ".env"
         env_file_encoding = "utf-8"
@@ -1,13 +1,34 @@
+import asyncio
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
 from app.config import settings
-from app.api.routes import health, extraction
+from app.api.routes import health, extraction, metrics, profiles
+from app.services.extraction_jobs import extraction_jobs
+from app.services.extraction_pool import extraction_pool
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Warm the extraction workers in the background; /health/ready reports
+    # when they are done
+    warm_up_task = asyncio.create_task(extraction_pool.warm_up()) if not extraction_pool.ready else None
+    yield
+    if warm_up_task is not None:
+        warm_up_task.cancel()
+        await asyncio.gather(warm_up_task, return_exceptions=True)
+    # Stop running jobs and extraction worker processes on shutdown
+    await extraction_jobs.shutdown()
+    extraction_pool.shutdown()
+
 
 app = FastAPI(
     title=settings.app_name,
     description="PDF extraction service for TTMM meeting minutes",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
 )
 
 # CORS middleware configuration
@@ -22,6 +43,8 @@ app.add_middleware(
 # Include routers
 app.include_router(health.router, tags=["Health"])
 app.include_router(extraction.router, tags=["Extraction"])
+app.include_router(metrics.router, tags=["Metrics"])
+app.include_router(profiles.router, tags=["Debug"])
 
 
 @app.get("/")
@@ -7,12 +7,25 @@ class ChunkMetadata(BaseModel):
     has_overlap_with_next: bool
 
 
+# Fingerprints of a chunk, with dedup enabled: a hash of the normalized text
+# and a MinHash sketch of its word shingles, as hex strings. duplicate_of is
+# the index of an earlier chunk of the document with the same or nearly the
+# same text; seen_before is set if another document had such a chunk
+class ChunkFingerprint(BaseModel):
+    content_hash: str
+    minhash: List[str]
+    duplicate_of: Optional[int] = None
+    seen_before: bool = False
+
+
 class TextChunk(BaseModel):
     index: int
     content: str
     start_char: int
     end_char: int
     page_numbers: List[int]
+    element_categories: List[str] = []
+    fingerprint: Optional[ChunkFingerprint] = None
     metadata: ChunkMetadata
 
 
@@ -20,6 +33,48 @@ class ExtractionMetadata(BaseModel):
     extractor: str = "unstructured"
     processing_time_ms: int
     ocr_applied: bool
+    page_ocr_applied: List[bool] = []
+    page_timings_ms: List[int] = []
+    # Pages extracted by a pages/max_pages request; None when all were
+    extracted_pages: Optional[List[int]] = None
+    # Chunks flagged as repeats, or left out with dedup=collapse
+    duplicate_chunks: Optional[int] = None
+    # SHA-256 of the uploaded file, to pass as previous_version when
+    # uploading a new version of the document
+    content_hash: Optional[str] = None
+    # Pages taken from the page cache instead of being extracted
+    reused_pages: Optional[List[int]] = None
+    # With previous_version: indexes of the chunks whose text is new, and
+    # how many of the previous version's chunk texts are gone. None if
+    # that version's extraction is no longer cached
+    changed_chunks: Optional[List[int]] = None
+    removed_chunks: Optional[int] = None
+    cache_hit: bool = False
+
+
+# Function of a request profile, with calls and time in its own code and
+# including what it called
+class ProfileFunction(BaseModel):
+    function: str
+    calls: int
+    self_ms: float
+    cumulative_ms: float
+
+
+# Summary of a profiled request (DEBUG only); the full profile is at
+# /debug/profiles/{profile_id}
+class RequestProfile(BaseModel):
+    profile_id: str
+    duration_ms: float
+    hot_functions: List[ProfileFunction]
+    pstats_url: str
+    speedscope_url: str
+
+
+class ProfileInfo(BaseModel):
+    profile_id: str
+    created_at: float
+    size_bytes: int
 
 
 class ExtractionResponse(BaseModel):
@@ -30,6 +85,101 @@ class ExtractionResponse(BaseModel):
     total_chunks: int
     chunks: List[TextChunk]
     extraction_metadata: ExtractionMetadata
+    profile: Optional[RequestProfile] = None
+
+
+# Chunk fields as parallel lists, one entry per chunk
+class CompactChunks(BaseModel):
+    start_char: List[int]
+    end_char: List[int]
+    page_numbers: List[List[int]]
+    has_overlap_with_previous: List[bool]
+    has_overlap_with_next: List[bool]
+    element_categories: List[List[str]]
+    # Fingerprint fields, with dedup enabled
+    content_hash: Optional[List[str]] = None
+    minhash: Optional[List[List[str]]] = None
+    duplicate_of: Optional[List[Optional[int]]] = None
+    seen_before: Optional[List[bool]] = None
+
+
+# /extract-pdf response with response_format=compact; chunk i is
+# text[chunks.start_char[i]:chunks.end_char[i]]
+class CompactExtractionResponse(BaseModel):
+    success: bool
+    filename: str
+    total_pages: int
+    total_characters: int
+    total_chunks: int
+    text: str
+    chunks: CompactChunks
+    extraction_metadata: ExtractionMetadata
+    profile: Optional[RequestProfile] = None
+
+
+class BatchFileResult(BaseModel):
+    filename: str
+    success: bool
+    result: Optional[ExtractionResponse] = None
+    error: Optional[str] = None
+
+
+class BatchExtractionResponse(BaseModel):
+    success: bool
+    total_files: int
+    succeeded: int
+    failed: int
+    results: List[BatchFileResult]
+
+
+class ExtractionStreamSummary(BaseModel):
+    type: str = "summary"
+    success: bool = True
+    filename: str
+    total_pages: int
+    total_characters: int
+    total_chunks: int
+    extraction_metadata: ExtractionMetadata
+
+
+class JobStatusResponse(BaseModel):
+    job_id: str
+    status: str
+    pages_done: int = 0
+    total_pages: Optional[int] = None
+    error: Optional[str] = None
+    created_at: float
+    finished_at: Optional[float] = None
+    expires_at: Optional[float] = None
+
+
+class PageProbe(BaseModel):
+    page_number: int
+    text_layer: bool
+    # Share of the page area covered by images, 0 to 1
+    image_coverage: float
+
+
+# Pre-flight probe of a PDF: its structure, and the estimated cost of
+# extracting the selected pages in extraction_mode
+class ProbeResponse(BaseModel):
+    filename: str
+    total_pages: Optional[int] = None
+    encrypted: bool
+    processable: bool
+    error: Optional[str] = None
+    pages: List[PageProbe]
+    selected_pages: int
+    ocr_pages: int
+    text_layer: bool
+    extraction_mode: str
+    recommended_mode: str
+    # Admission control cost units, and a rough extraction time
+    estimated_cost: float
+    estimated_seconds: float
+    # Whether to submit an extraction job rather than wait on /extract-pdf
+    async_recommended: bool
+    probe_time_ms: int
 
 
 class ExtractionErrorResponse(BaseModel):
@@ -42,3 +192,27 @@ class HealthResponse(BaseModel):
     status: str = "healthy"
     service: str = "ttmm-pdf-extraction"
     version: str = "1.0.0"
+
+
+class ReadinessResponse(BaseModel):
+    status: str
+    error: Optional[str] = None
+
+
+class WorkerStatus(BaseModel):
+    worker: int
+    pid: Optional[int] = None
+    # Tasks run, and RSS as of the last one
+    tasks: int
+    rss_bytes: int
+
+
+class PoolStatusResponse(BaseModel):
+    max_workers: int
+    max_concurrency: int
+    in_flight: int
+    queued: int
+    workers: List[WorkerStatus] = []
+    spare_workers: int = 0
+    # Workers replaced so far, recycled or dead
+    recycled_workers: int = 0
@@ -0,0 +1,155 @@
+import asyncio
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Deque, Optional, Tuple
+
+from app.config import settings
+from app.services.metrics import admission_rejections_total
+
+
+class AdmissionRejected(Exception):
+    """
+    A request could not be admitted. reason is "queue_full" or "timeout";
+    retry_after is the suggested wait in seconds before retrying.
+    """
+
+    def __init__(self, reason: str, retry_after: int):
+        super().__init__(
+            "Extraction queue is full" if reason == "queue_full"
+            else "Timed out waiting for extraction capacity"
+        )
+        self.reason = reason
+        self.retry_after = retry_after
+
+
+class AdmissionController:
+    """
+    Cost-based admission control for extraction requests.
+
+    Each request is admitted with an estimated cost and holds it until
+    released. While admitting a request would push the total above
+    `capacity`, requests wait in FIFO order in a queue of at most
+    `max_queue` entries, for up to `queue_timeout_seconds`. Requests that
+    find the queue full or time out are rejected with AdmissionRejected.
+    A request costing more than capacity is admitted once it can run alone.
+    """
+
+    def __init__(
+        self,
+        capacity: float = 200.0,
+        max_queue: int = 32,
+        queue_timeout_seconds: float = 30.0,
+        retry_after_seconds: int = 5,
+        ocr_page_cost: float = 10.0
+    ):
+        if capacity <= 0:
+            raise ValueError("capacity must be positive")
+        if max_queue < 0:
+            raise ValueError("max_queue must not be negative")
+        self.capacity = capacity
+        self.max_queue = max_queue
+        self.queue_timeout_seconds = queue_timeout_seconds
+        self.retry_after_seconds = retry_after_seconds
+        self.ocr_page_cost = ocr_page_cost
+        self._in_use = 0.0
+        self._waiters: Deque[Tuple[float, asyncio.Future]] = deque()
+
+    def estimate_cost(self, total_pages: Optional[int], ocr_likely: bool, ocr_pages: Optional[int] = None) -> float:
+        """
+        Cost of extracting a document: one unit per page, or ocr_page_cost
+        per page if it will likely be OCRed; that is every page if
+        ocr_likely, unless ocr_pages says how many. Unknown page counts
+        cost as one page.
+        """
+        total_pages = total_pages or 1
+        if ocr_pages is None:
+            ocr_pages = total_pages if ocr_likely else 0
+        ocr_pages = min(ocr_pages, total_pages)
+        return (total_pages - ocr_pages) + ocr_pages * self.ocr_page_cost
+
+    async def acquire(self, cost: float) -> float:
+        """
+        Wait until cost can be admitted.
+
+        Returns:
+            The cost actually held, to pass to release()
+
+        Raises:
+            AdmissionRejected: if the queue is full or the wait times out
+        """
+        cost = min(cost, self.capacity)
+
+        if not self._waiters and self._in_use + cost <= self.capacity:
+            self._in_use += cost
+            return cost
+
+        if len(self._waiters) >= self.max_queue:
+            admission_rejections_total.inc(reason="queue_full")
+            raise AdmissionRejected("queue_full", self.retry_after_seconds)
+
+        entry = (cost, asyncio.get_running_loop().create_future())
+        self._waiters.append(entry)
+        try:
+            await asyncio.wait_for(entry[1], self.queue_timeout_seconds)
+        except (asyncio.TimeoutError, asyncio.CancelledError) as e:
+            future = entry[1]
+            if future.done() and not future.cancelled():
+                # Admitted just as the wait ended
+                self.release(cost)
+            elif entry in self._waiters:
+                self._waiters.remove(entry)
+                self._wake()
+
+            if isinstance(e, asyncio.CancelledError):
+                raise
+            admission_rejections_total.inc(reason="timeout")
+            raise AdmissionRejected("timeout", self.retry_after_seconds) from None
+        return cost
+
+    def release(self, cost: float) -> None:
+        """
+        Return cost acquired with acquire() and admit waiting requests.
+        """
+        self._in_use = max(0.0, self._in_use - cost)
+        self._wake()
+
+    @asynccontextmanager
+    async def admit(self, cost: float) -> AsyncIterator[None]:
+        """
+        Hold cost for the duration of the block.
+        """
+        held = await self.acquire(cost)
+        try:
+            yield
+        finally:
+            self.release(held)
+
+    def _wake(self) -> None:
+        """
+        Admit waiting requests from the head of the queue while they fit.
+        """
+        while self._waiters and self._in_use + self._waiters[0][0] <= self.capacity:
+            cost, future = self._waiters.popleft()
+            if future.done():
+                continue
+            self._in_use += cost
+            future.set_result(None)
+
+    def stats(self) -> dict:
+        """
+        Current admitted cost and queue depth.
+        """
+        return {
+            "capacity": self.capacity,
+            "in_use": self._in_use,
+            "queued": len(self._waiters)
+        }
+
+
+extraction_admission = AdmissionController(
+    capacity=settings.admission_capacity,
+    max_queue=settings.admission_max_queue,
+    queue_timeout_seconds=settings.admission_queue_timeout_seconds,
+    retry_after_seconds=settings.admission_retry_after_seconds,
+    ocr_page_cost=settings.admission_ocr_page_cost
+)
@@ -0,0 +1,242 @@
+import hashlib
+import json
+import os
+import tempfile
+import threading
+from collections import OrderedDict
+from typing import Optional
+
+from app.config import settings
+
+
+class ExtractionCache:
+    """
+    Content-addressed cache of PDF extraction results.
+
+    Entries are keyed by the SHA-256 of the uploaded bytes and kept in a
+    bounded in-memory LRU backed by JSON files on local disk. Only the
+    extraction output is cached; chunking is cheap and redone per request.
+
+    Extracted pages are also cached on their own, keyed by the hash of the
+    page (PDFExtractor.page_hashes), so a new version of a document only
+    needs its changed pages extracted.
+    """
+
+    # Bump when the cached payload layout changes, so old entries are missed
+    FORMAT_VERSION = 2
+
+    CACHED_FIELDS = (
+        "text",
+        "page_boundaries",
+        "elements",
+        "total_pages",
+        "extracted_pages",
+        "ocr_applied",
+        "page_ocr_applied",
+        "page_timings_ms",
+        "extractor"
+    )
+
+    # Fields of a page from PDFExtractor.iter_pages kept in the page cache
+    CACHED_PAGE_FIELDS = ("text", "ocr_applied", "elements")
+
+    def __init__(
+        self,
+        cache_dir: Optional[str] = None,
+        max_memory_bytes: int = 64 * 1024 * 1024,
+        max_disk_bytes: int = 512 * 1024 * 1024,
+        enabled: bool = True
+    ):
+        self.cache_dir = cache_dir
+        self.max_memory_bytes = max_memory_bytes
+        self.max_disk_bytes = max_disk_bytes
+        self.enabled = enabled
+        self._memory: "OrderedDict[str, tuple]" = OrderedDict()
+        self._memory_bytes = 0
+        self._lock = threading.Lock()
+
+        if self.enabled and self.cache_dir:
+            os.makedirs(self.cache_dir, exist_ok=True)
+
+    @staticmethod
+    def hash_bytes(data: bytes) -> str:
+        """
+        SHA-256 hex digest used as the cache key for uploaded content.
+        """
+        return hashlib.sha256(data).hexdigest()
+
+    @classmethod
+    def make_key(cls, content_hash: str, **params) -> str:
+        """
+        Combine a content hash and the cache format version with the
+        extraction parameters that affect the result, e.g.
+        make_key(sha, **extractor.cache_params()).
+        """
+        suffix = "".join(f"-{name}={params[name]}" for name in sorted(params))
+        return f"{content_hash}-v{cls.FORMAT_VERSION}{suffix}"
+
+    @classmethod
+    def make_page_key(cls, page_hash: str, **params) -> str:
+        """
+        make_key for a single page, e.g.
+        make_page_key(page_hash, **extractor.page_cache_params()).
+        """
+        return f"page-{cls.make_key(page_hash, **params)}"
+
+    def get(self, key: str) -> Optional[dict]:
+        """
+        Return the cached extraction for key, or None on a miss.
+        """
+        payload = self._get_payload(key)
+        return self._decode(payload) if payload is not None else None
+
+    def put(self, key: str, result: dict) -> None:
+        """
+        Store the cacheable fields of an extraction result under key.
+        """
+        self._put_payload(key, {field: result[field] for field in self.CACHED_FIELDS if field in result})
+
+    def get_page(self, key: str) -> Optional[dict]:
+        """
+        Return the cached page for key, without its page number, or None
+        on a miss.
+        """
+        payload = self._get_payload(key)
+        return json.loads(payload) if payload is not None else None
+
+    def put_page(self, key: str, page: dict) -> None:
+        """
+        Store the cacheable fields of a page from iter_pages under key.
+        """
+        self._put_payload(key, {field: page[field] for field in self.CACHED_PAGE_FIELDS})
+
+    def clear(self) -> None:
+        """
+        Drop all entries from memory and disk.
+        """
+        with self._lock:
+            self._memory.clear()
+            self._memory_bytes = 0
+
+        if self.cache_dir and os.path.isdir(self.cache_dir):
+            for name in os.listdir(self.cache_dir):
+                if name.endswith(".json"):
+                    os.unlink(os.path.join(self.cache_dir, name))
+
+    def _get_payload(self, key: str) -> Optional[bytes]:
+        if not self.enabled:
+            return None
+
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                self._memory.move_to_end(key)
+                return entry[0]
+
+        payload = self._read_disk(key)
+        if payload is not None:
+            self._remember(key, payload)
+        return payload
+
+    def _put_payload(self, key: str, fields: dict) -> None:
+        if not self.enabled:
+            return
+
+        payload = json.dumps(fields).encode("utf-8")
+        self._remember(key, payload)
+        self._write_disk(key, payload)
+
+    def _decode(self, payload: bytes) -> dict:
+        result = json.loads(payload)
+        result["page_boundaries"] = [tuple(b) for b in result["page_boundaries"]]
+        return result
+
+    def _remember(self, key: str, payload: bytes) -> None:
+        """
+        Insert into the memory tier, evicting least recently used entries.
+        """
+        size = len(payload)
+        if size > self.max_memory_bytes:
+            return
+
+        with self._lock:
+            previous = self._memory.pop(key, None)
+            if previous is not None:
+                self._memory_bytes -= previous[1]
+
+            self._memory[key] = (payload, size)
+            self._memory_bytes += size
+
+            while self._memory_bytes > self.max_memory_bytes:
+                _, (_, evicted_size) = self._memory.popitem(last=False)
+                self._memory_bytes -= evicted_size
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, f"{key}.json")
+
+    def _read_disk(self, key: str) -> Optional[bytes]:
+        if not self.cache_dir:
+            return None
+
+        path = self._path(key)
+        try:
+            with open(path, "rb") as f:
+                payload = f.read()
+            # Touch the file so disk eviction follows access order
+            os.utime(path)
+        except OSError:
+            return None
+
+        return payload
+
+    def _write_disk(self, key: str, payload: bytes) -> None:
+        if not self.cache_dir or len(payload) > self.max_disk_bytes:
+            return
+
+        # Write atomically so concurrent readers never see a partial file
+        fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(payload)
+            os.replace(tmp_path, self._path(key))
+        except OSError:
+            if os.path.exists(tmp_path):
+                os.unlink(tmp_path)
+            return
+
+        self._evict_disk()
+
+    def _evict_disk(self) -> None:
+        """
+        Remove least recently used files until the disk tier fits its budget.
+        """
+        entries = []
+        total = 0
+        for name in os.listdir(self.cache_dir):
+            if not name.endswith(".json"):
+                continue
+            path = os.path.join(self.cache_dir, name)
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+            total += stat.st_size
+
+        entries.sort()
+        for _, size, path in entries:
+            if total <= self.max_disk_bytes:
+                break
+            try:
+                os.unlink(path)
+            except OSError:
+                continue
+            total -= size
+
+
+extraction_cache = ExtractionCache(
+    cache_dir=settings.extraction_cache_dir,
+    max_memory_bytes=settings.extraction_cache_memory_mb * 1024 * 1024,
+    max_disk_bytes=settings.extraction_cache_disk_mb * 1024 * 1024,
+    enabled=settings.extraction_cache_enabled
+)
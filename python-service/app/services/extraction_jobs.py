@@ -0,0 +1,190 @@
+import asyncio
+import copy
+import threading
+import time
+import uuid
+from typing import Awaitable, Callable, Dict, Optional, Set
+
+from app.config import settings
+
+# Job lifecycle states
+QUEUED = "queued"
+RUNNING = "running"
+COMPLETED = "completed"
+FAILED = "failed"
+
+# Work run by a job: receives a progress callback taking the number of pages
+# extracted so far, and returns the JSON-serialisable result
+JobWork = Callable[[Callable[[int], None]], Awaitable[dict]]
+
+
+class JobStore:
+    """
+    Storage backend for extraction job state.
+
+    Jobs are plain JSON-serialisable dicts so backends can keep them outside
+    the process. Implementations must be safe to call from several threads.
+    """
+
+    def save(self, job: dict) -> None:
+        """
+        Insert or replace a job.
+        """
+        raise NotImplementedError
+
+    def load(self, job_id: str) -> Optional[dict]:
+        """
+        Return a copy of the job, or None if it is unknown or expired.
+        """
+        raise NotImplementedError
+
+    def find(self, key: str) -> Optional[dict]:
+        """
+        Return the most recent job submitted with key, or None.
+        """
+        raise NotImplementedError
+
+    def purge(self, now: float) -> None:
+        """
+        Drop jobs whose expires_at is before now.
+        """
+        raise NotImplementedError
+
+
+class InMemoryJobStore(JobStore):
+    """
+    Job store kept in this process. Jobs are lost on restart and are not
+    shared between server processes.
+    """
+
+    def __init__(self):
+        self._jobs: Dict[str, dict] = {}
+        self._keys: Dict[str, str] = {}
+        self._lock = threading.Lock()
+
+    def save(self, job: dict) -> None:
+        with self._lock:
+            self._jobs[job["job_id"]] = copy.deepcopy(job)
+            self._keys[job["key"]] = job["job_id"]
+
+    def load(self, job_id: str) -> Optional[dict]:
+        with self._lock:
+            job = self._jobs.get(job_id)
+            return copy.deepcopy(job) if job is not None else None
+
+    def find(self, key: str) -> Optional[dict]:
+        with self._lock:
+            job_id = self._keys.get(key)
+            job = self._jobs.get(job_id) if job_id else None
+            return copy.deepcopy(job) if job is not None else None
+
+    def purge(self, now: float) -> None:
+        with self._lock:
+            expired = [
+                job_id for job_id, job in self._jobs.items()
+                if job["expires_at"] is not None and job["expires_at"] < now
+            ]
+            for job_id in expired:
+                job = self._jobs.pop(job_id)
+                if self._keys.get(job["key"]) == job_id:
+                    del self._keys[job["key"]]
+
+
+class ExtractionJobs:
+    """
+    Asynchronous extraction jobs run as tasks on the event loop, with the
+    extraction itself in the worker pool.
+
+    Submitting work under a key that already has a queued, running or
+    completed job returns that job instead of starting the work again, so
+    client retries are cheap. Finished jobs are kept for
+    `result_ttl_seconds` and then purged.
+    """
+
+    def __init__(self, store: Optional[JobStore] = None, result_ttl_seconds: int = 3600):
+        self.store = store or InMemoryJobStore()
+        self.result_ttl_seconds = result_ttl_seconds
+        self._tasks: Set[asyncio.Task] = set()
+
+    def submit(self, key: str, work: JobWork, total_pages: Optional[int] = None) -> dict:
+        """
+        Start work as a job, or return the existing job for key.
+
+        Must be called from the event loop.
+        """
+        existing = self.find_active(key)
+        if existing is not None:
+            return existing
+
+        now = time.time()
+        job = {
+            "job_id": uuid.uuid4().hex,
+            "key": key,
+            "status": QUEUED,
+            "pages_done": 0,
+            "total_pages": total_pages,
+            "error": None,
+            "created_at": now,
+            "finished_at": None,
+            "expires_at": None,
+            "result": None
+        }
+        self.store.save(job)
+
+        task = asyncio.create_task(self._run(job["job_id"], work))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        return job
+
+    def find_active(self, key: str) -> Optional[dict]:
+        """
+        Return the unexpired job for key unless it failed, or None.
+        """
+        self.store.purge(time.time())
+        job = self.store.find(key)
+        if job is None or job["status"] == FAILED:
+            return None
+        return job
+
+    def get(self, job_id: str) -> Optional[dict]:
+        """
+        Return the job, or None if it is unknown or its retention expired.
+        """
+        self.store.purge(time.time())
+        return self.store.load(job_id)
+
+    async def _run(self, job_id: str, work: JobWork) -> None:
+        self._update(job_id, status=RUNNING)
+
+        try:
+            result = await work(lambda pages_done: self._update(job_id, pages_done=pages_done))
+        except Exception as e:
+            self._finish(job_id, status=FAILED, error=str(e))
+        else:
+            self._finish(job_id, status=COMPLETED, result=result)
+
+    def _finish(self, job_id: str, **fields) -> None:
+        now = time.time()
+        self._update(job_id, finished_at=now, expires_at=now + self.result_ttl_seconds, **fields)
+
+    def _update(self, job_id: str, **fields) -> None:
+        job = self.store.load(job_id)
+        if job is None:
+            return
+        job.update(fields)
+        self.store.save(job)
+
+    async def shutdown(self) -> None:
+        """
+        Cancel running jobs.
+        """
+        for task in list(self._tasks):
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks.clear()
+
+
+extraction_jobs = ExtractionJobs(
+    store=InMemoryJobStore(),
+    result_ttl_seconds=settings.job_result_ttl_seconds
+)
@@ -0,0 +1,522 @@
+import asyncio
+import functools
+import multiprocessing
+import os
+import signal
+import sys
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional, Tuple
+
+from app.config import settings
+from app.services.metrics import worker_recycles_total
+from app.services.pdf_extractor import warm_up
+
+# Message kinds sent from a streaming worker back to the event loop
+_ITEM = "item"
+_DONE = "done"
+_ERROR = "error"
+
+# How often a worker checks whether its task was cancelled, in seconds
+CANCEL_POLL_SECONDS = 0.2
+
+
+def _init_worker(env: Dict[str, str], warm_up: Optional[Callable[[], None]]) -> None:
+    """
+    Apply environment settings and warm up once when a worker process starts.
+    """
+    os.environ.update(env)
+    if warm_up is not None:
+        warm_up()
+
+
+def _rss_bytes() -> int:
+    """
+    Resident set size of this process, from /proc on Linux and the peak
+    RSS elsewhere.
+    """
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        import resource
+
+        # ru_maxrss is in kilobytes on Linux, bytes on macOS
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak if sys.platform == "darwin" else peak * 1024
+
+
+def _child_pids() -> List[int]:
+    """
+    Process ids of this process's children, read from /proc (Linux only).
+    """
+    pid = os.getpid()
+    children = []
+    try:
+        entries = os.listdir("/proc")
+    except OSError:
+        return children
+
+    for entry in entries:
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f"/proc/{entry}/stat") as f:
+                stat = f.read()
+        except OSError:
+            continue
+        # The parent pid follows the state, after the parenthesised command
+        fields = stat[stat.rfind(")") + 2:].split()
+        if len(fields) > 1 and int(fields[1]) == pid:
+            children.append(int(entry))
+    return children
+
+
+def _kill_children() -> None:
+    """
+    Kill the subprocesses of this worker, i.e. tesseract and pdftoppm
+    processes started for OCR, so the task waiting on them fails fast.
+    """
+    for pid in _child_pids():
+        try:
+            os.kill(pid, signal.SIGKILL)
+        except OSError:
+            pass
+
+
+def _watch_cancel(cancel, finished: threading.Event) -> None:
+    """
+    Kill the worker's subprocesses if cancel is set before finished.
+    """
+    try:
+        while not finished.is_set():
+            if cancel.wait(CANCEL_POLL_SECONDS):
+                _kill_children()
+                return
+    except Exception:
+        # The manager went away, e.g. on shutdown
+        return
+
+
+def _cancellable(fn: Callable[..., Any]) -> Callable[..., Any]:
+    """
+    Run a worker task with a thread watching its cancel event, passed as
+    the task's first argument. Returns (result, (pid, RSS in bytes)), so
+    the pool can tell when the worker is due for recycling.
+    """
+    @functools.wraps(fn)
+    def wrapper(cancel, *args: Any) -> Tuple[Any, Tuple[int, int]]:
+        finished = threading.Event()
+        watcher = threading.Thread(target=_watch_cancel, args=(cancel, finished), daemon=True)
+        watcher.start()
+        try:
+            return fn(cancel, *args), (os.getpid(), _rss_bytes())
+        finally:
+            finished.set()
+    return wrapper
+
+
+@_cancellable
+def _call(cancel, fn: Callable[..., Any], args: tuple) -> Any:
+    """
+    Run fn(*args) in a worker process.
+    """
+    return fn(*args)
+
+
+@_cancellable
+def _pump(cancel, queue, fn: Callable[..., Any], args: tuple) -> None:
+    """
+    Run a generator function in a worker process, forwarding each item
+    until the generator is exhausted or cancel is set.
+    """
+    items = iter(fn(*args))
+    try:
+        for item in items:
+            if cancel.is_set():
+                break
+            queue.put((_ITEM, item))
+    except BaseException as e:
+        try:
+            queue.put((_ERROR, e))
+        except Exception:
+            # The exception itself could not be pickled
+            queue.put((_ERROR, RuntimeError(str(e))))
+    else:
+        queue.put((_DONE, None))
+    finally:
+        # Runs a generator's cleanup, e.g. stopping its OCR threads
+        if hasattr(items, "close"):
+            items.close()
+
+
+class _Worker:
+    """
+    One worker process, run by a single-process ProcessPoolExecutor so
+    workers can be replaced one at a time.
+    """
+
+    def __init__(self, executor: ProcessPoolExecutor):
+        self.executor = executor
+        self.pid: Optional[int] = None
+        self.tasks = 0
+        self.rss_bytes = 0
+        self.in_flight = 0
+        # Spares: the task starting the process and running its warm-up
+        self.warming: Optional[asyncio.Future] = None
+
+    def started(self, future: asyncio.Future) -> None:
+        if not future.cancelled() and future.exception() is None:
+            self.pid = future.result()
+
+    @property
+    def warm_up_failed(self) -> bool:
+        return self.warming is not None and self.warming.done() and (
+            self.warming.cancelled() or self.warming.exception() is not None
+        )
+
+
+class ExtractionPool:
+    """
+    Bounded process pool for running PDF extraction off the event loop.
+
+    Work is dispatched to `max_workers` worker processes with at most
+    `max_concurrency` tasks submitted at once, each to the least busy
+    worker; callers beyond that limit wait in a queue whose depth is
+    reported by `stats()`. `worker_env` is applied to each worker
+    process's environment when it starts, followed by `worker_warm_up` if
+    given.
+
+    The pool is `ready` once `warm_up()` has started and warmed every
+    worker, or right away without a `worker_warm_up`.
+
+    A worker is recycled once it has finished `max_tasks_per_worker`
+    tasks or its RSS passes `max_rss_bytes` after a task (0 disables
+    either limit): it stops taking tasks, finishes those it has and exits.
+    Its place is taken by one of `spare_workers` processes started and
+    warmed up ahead of time, and a new spare is started. Dead workers are
+    replaced the same way.
+
+    Cancelling the task awaiting `run()` or `stream()` cancels the work in
+    the worker: generators stop at the next item and the worker's OCR
+    subprocesses are killed. The concurrency slot is held until the worker
+    is free again.
+    """
+
+    def __init__(
+        self,
+        max_workers: int = 2,
+        max_concurrency: int = 2,
+        worker_env: Optional[Dict[str, str]] = None,
+        worker_warm_up: Optional[Callable[[], None]] = None,
+        max_tasks_per_worker: int = 0,
+        max_rss_bytes: int = 0,
+        spare_workers: int = 0
+    ):
+        if max_workers < 1:
+            raise ValueError("max_workers must be at least 1")
+        if max_concurrency < 1:
+            raise ValueError("max_concurrency must be at least 1")
+        if max_tasks_per_worker < 0 or max_rss_bytes < 0 or spare_workers < 0:
+            raise ValueError("worker limits and spare_workers must not be negative")
+        self.max_workers = max_workers
+        self.max_concurrency = max_concurrency
+        self.worker_env = dict(worker_env or {})
+        self.worker_warm_up = worker_warm_up
+        self.max_tasks_per_worker = max_tasks_per_worker
+        self.max_rss_bytes = max_rss_bytes
+        self.spare_workers = spare_workers
+        self.ready = worker_warm_up is None
+        self.warm_up_error: Optional[str] = None
+        self._workers: Optional[List[_Worker]] = None
+        self._spares: List[_Worker] = []
+        self._recycled = 0
+        self._manager = None
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._in_flight = 0
+        self._queued = 0
+
+    def _new_worker(self) -> _Worker:
+        return _Worker(ProcessPoolExecutor(
+            max_workers=1,
+            initializer=_init_worker,
+            initargs=(self.worker_env, self.worker_warm_up)
+        ))
+
+    def _get_workers(self) -> List[_Worker]:
+        if self._workers is None:
+            self._workers = [self._new_worker() for _ in range(self.max_workers)]
+        return self._workers
+
+    def _fill_spares(self) -> None:
+        """
+        Start spare workers, up to spare_workers, in the background.
+        """
+        loop = asyncio.get_running_loop()
+        self._spares = [spare for spare in self._spares if not spare.warm_up_failed]
+        while len(self._spares) < self.spare_workers:
+            spare = self._new_worker()
+            # The task only starts once the process has run the initializer
+            spare.warming = loop.run_in_executor(spare.executor, os.getpid)
+            spare.warming.add_done_callback(spare.started)
+            self._spares.append(spare)
+
+    async def warm_up(self) -> None:
+        """
+        Start every worker process so each runs worker_warm_up before the
+        first request, then mark the pool ready. A failed warm-up is
+        recorded in warm_up_error and leaves the pool not ready. Spare
+        workers are started too, but not waited for.
+        """
+        workers = self._get_workers()
+        loop = asyncio.get_running_loop()
+        self.warm_up_error = None
+
+        # A task only starts once its worker has run the initializer
+        try:
+            pids = await asyncio.gather(*(
+                loop.run_in_executor(worker.executor, os.getpid) for worker in workers
+            ))
+        except BrokenProcessPool as e:
+            for worker in workers:
+                worker.executor.shutdown(wait=False, cancel_futures=True)
+            if self._workers is workers:
+                self._workers = None
+            self.warm_up_error = f"worker warm-up failed: {e}"
+            return
+        for worker, pid in zip(workers, pids):
+            worker.pid = pid
+        self._fill_spares()
+        self.ready = True
+
+    def _replace(self, worker: _Worker, reason: str) -> None:
+        """
+        Replace a worker with a spare, or a new worker if none is left, and
+        start a new spare. The old worker finishes the tasks it has and
+        exits, unless it died.
+
+        A worker that dies (OOM kill, crash in tesseract or poppler) leaves
+        its ProcessPoolExecutor permanently unusable.
+        """
+        if self._workers is None or worker not in self._workers:
+            # Already replaced
+            return
+
+        spares = [spare for spare in self._spares if not spare.warm_up_failed]
+        # Prefer a spare that is already warm
+        spares.sort(key=lambda spare: not (spare.warming is not None and spare.warming.done()))
+        replacement = spares[0] if spares else self._new_worker()
+        if replacement in self._spares:
+            self._spares.remove(replacement)
+        self._workers[self._workers.index(worker)] = replacement
+
+        worker.executor.shutdown(wait=False, cancel_futures=reason == "died")
+        self._recycled += 1
+        worker_recycles_total.inc(reason=reason)
+        self._fill_spares()
+
+    def _submit(self, fn: Callable[..., Any], *args: Any) -> Tuple[_Worker, asyncio.Future]:
+        """
+        Submit a _cancellable task to the least busy worker.
+        """
+        loop = asyncio.get_running_loop()
+        workers = self._get_workers()
+        if len(self._spares) < self.spare_workers:
+            self._fill_spares()
+        index = min(range(len(workers)), key=lambda index: workers[index].in_flight)
+        worker = workers[index]
+        try:
+            future = loop.run_in_executor(worker.executor, fn, *args)
+        except BrokenProcessPool:
+            # The worker died while idle
+            self._replace(worker, "died")
+            worker = workers[index]
+            future = loop.run_in_executor(worker.executor, fn, *args)
+
+        worker.in_flight += 1
+        future.add_done_callback(functools.partial(self._task_done, worker))
+        return worker, future
+
+    def _task_done(self, worker: _Worker, future: asyncio.Future) -> None:
+        """
+        Record a finished task and recycle its worker if it is due.
+        """
+        worker.in_flight -= 1
+        worker.tasks += 1
+        error = None if future.cancelled() else future.exception()
+        if isinstance(error, BrokenProcessPool):
+            self._replace(worker, "died")
+            return
+        if error is None and not future.cancelled():
+            worker.pid, worker.rss_bytes = future.result()[1]
+
+        if self.max_tasks_per_worker and worker.tasks >= self.max_tasks_per_worker:
+            self._replace(worker, "tasks")
+        elif self.max_rss_bytes and worker.rss_bytes >= self.max_rss_bytes:
+            self._replace(worker, "rss")
+
+    def _get_manager(self):
+        if self._manager is None:
+            self._manager = multiprocessing.Manager()
+        return self._manager
+
+    def _get_semaphore(self) -> asyncio.Semaphore:
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        return self._semaphore
+
+    async def _acquire(self) -> asyncio.Semaphore:
+        """
+        Wait for a concurrency slot, counting the caller as queued meanwhile.
+        """
+        semaphore = self._get_semaphore()
+        self._queued += 1
+        try:
+            await semaphore.acquire()
+        finally:
+            self._queued -= 1
+
+        self._in_flight += 1
+        return semaphore
+
+    def _release(self, semaphore: asyncio.Semaphore) -> None:
+        self._in_flight -= 1
+        semaphore.release()
+
+    async def run(self, fn: Callable[..., Any], *args: Any) -> Any:
+        """
+        Run fn(*args) in a worker process once a concurrency slot is free.
+
+        fn and its arguments must be picklable. If the worker process dies,
+        BrokenProcessPool is raised and the worker is replaced for later
+        jobs.
+        """
+        semaphore = await self._acquire()
+        try:
+            cancel = self._get_manager().Event()
+            _, future = self._submit(_call, cancel, fn, args)
+        except BaseException:
+            self._release(semaphore)
+            raise
+
+        try:
+            # Shielded so cancelling the caller does not abandon the task
+            # while the worker is still busy with it
+            result, _ = await asyncio.shield(future)
+            return result
+        except asyncio.CancelledError:
+            cancel.set()
+            raise
+        finally:
+            self._release_when_done(semaphore, future)
+
+    def _release_when_done(self, semaphore: asyncio.Semaphore, future: asyncio.Future) -> None:
+        """
+        Release the slot once the worker running future is free.
+        """
+        if future.done():
+            self._release(semaphore)
+        else:
+            future.add_done_callback(lambda _: self._release(semaphore))
+
+    async def stream(self, fn: Callable[..., Any], *args: Any) -> AsyncIterator[Any]:
+        """
+        Run the generator function fn(*args) in a worker process and yield
+        its items as they are produced.
+
+        fn, its arguments and the yielded items must be picklable. Exceptions
+        raised by the generator are re-raised here, and BrokenProcessPool is
+        raised if the worker process dies part-way.
+
+        If the consumer stops early or is cancelled, the generator is
+        stopped in the worker; the concurrency slot is held until it has.
+        """
+        semaphore = await self._acquire()
+        loop = asyncio.get_running_loop()
+        try:
+            manager = self._get_manager()
+            queue = manager.Queue()
+            cancel = manager.Event()
+            _, future = self._submit(_pump, cancel, queue, fn, args)
+        except BaseException:
+            self._release(semaphore)
+            raise
+        get = loop.run_in_executor(None, queue.get)
+
+        try:
+            while True:
+                # Wait for the next message, or for the worker to exit without
+                # sending one
+                waiting = {get} if future.done() else {get, future}
+                await asyncio.wait(waiting, return_when=asyncio.FIRST_COMPLETED)
+
+                if not get.done():
+                    error = future.exception()
+                    if error is None:
+                        # Finished normally; its last messages are still queued
+                        continue
+                    raise error
+
+                kind, payload = get.result()
+                if kind == _ITEM:
+                    yield payload
+                    get = loop.run_in_executor(None, queue.get)
+                else:
+                    # The worker is about to return
+                    await future
+                    if kind == _ERROR:
+                        raise payload
+                    break
+        finally:
+            if not future.done():
+                cancel.set()
+            if not get.done():
+                # Unblock the thread waiting on the queue
+                queue.put((_DONE, None))
+            self._release_when_done(semaphore, future)
+
+    def stats(self) -> dict:
+        """
+        Current pool utilisation, and the tasks run by and the RSS (as of
+        its last task) of each worker.
+        """
+        return {
+            "max_workers": self.max_workers,
+            "max_concurrency": self.max_concurrency,
+            "in_flight": self._in_flight,
+            "queued": self._queued,
+            "workers": [
+                {"worker": index, "pid": worker.pid, "tasks": worker.tasks, "rss_bytes": worker.rss_bytes}
+                for index, worker in enumerate(self._workers or [])
+            ],
+            "spare_workers": len(self._spares),
+            "recycled_workers": self._recycled
+        }
+
+    def shutdown(self) -> None:
+        """
+        Stop the worker processes. The pool is recreated lazily on next use.
+        """
+        for worker in (self._workers or []) + self._spares:
+            worker.executor.shutdown(wait=True, cancel_futures=True)
+        self._workers = None
+        self._spares = []
+        if self._manager is not None:
+            self._manager.shutdown()
+            self._manager = None
+        self._semaphore = None
+
+
+extraction_pool = ExtractionPool(
+    max_workers=settings.extraction_workers,
+    max_concurrency=settings.max_concurrent_extractions,
+    worker_env=(
+        {"OMP_THREAD_LIMIT": str(settings.tesseract_thread_limit)}
+        if settings.tesseract_thread_limit > 0 else {}
+    ),
+    worker_warm_up=functools.partial(warm_up, settings.warm_up) if settings.warm_up != "off" else None,
+    max_tasks_per_worker=settings.worker_max_tasks,
+    max_rss_bytes=settings.worker_max_rss_mb * 1024 * 1024,
+    spare_workers=settings.spare_workers
+)
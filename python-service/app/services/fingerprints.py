@@ -0,0 +1,323 @@
+import functools
+import hashlib
+import heapq
+import os
+import sqlite3
+import threading
+import time
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from app.config import settings
+from app.services.text_chunker import ChunkRecord
+
+# What to do with repeated chunks: leave them alone without fingerprints,
+# flag them in the response, or also leave them out of it
+DEDUP_MODES = ("off", "flag", "collapse")
+
+# Values kept in a bottom-k MinHash sketch
+MINHASH_SIZE = 16
+
+SHINGLE_WORDS = 3
+
+# Chunks sharing fewer sketch values than this are not compared; chunks
+# with a similarity of 0.8 share about 14 on average
+MIN_SHARED_VALUES = MINHASH_SIZE // 4
+
+_BITS = 64
+_MASK = (1 << _BITS) - 1
+
+# A fingerprint: (content hash, MinHash sketch)
+Fingerprint = Tuple[str, Tuple[int, ...]]
+
+
+def normalize(text: str) -> str:
+    """
+    Lowercase text and collapse whitespace, so formatting differences do
+    not change fingerprints.
+    """
+    return " ".join(text.lower().split())
+
+
+def content_hash(normalized: str) -> str:
+    """
+    Exact fingerprint of normalized text.
+    """
+    return hashlib.blake2b(normalized.encode("utf-8"), digest_size=16).hexdigest()
+
+
+@functools.lru_cache(maxsize=65536)
+def _word_hashes(word: str) -> Tuple[int, int, int]:
+    """
+    A word's 64-bit hash, rotated by 0, 1 and 2 bits for its position in a
+    shingle. Cached, since vocabulary repeats across chunks.
+    """
+    value = int.from_bytes(hashlib.blake2b(word.encode("utf-8"), digest_size=8).digest(), "little")
+    return value, _rotate(value, 1), _rotate(value, 2)
+
+
+def _rotate(value: int, bits: int) -> int:
+    return ((value << bits) | (value >> (_BITS - bits))) & _MASK
+
+
+def minhash(normalized: str) -> Tuple[int, ...]:
+    """
+    Bottom-k MinHash sketch of the word shingles of normalized text: the
+    MINHASH_SIZE smallest distinct shingle hashes, in increasing order.
+    """
+    words = [_word_hashes(word) for word in normalized.split()]
+    if len(words) < SHINGLE_WORDS:
+        shingles = {word[0] for word in words}
+    else:
+        # Rotating by position makes each shingle hash its words in order
+        shingles = {
+            first[0] ^ second[1] ^ third[2]
+            for first, second, third in zip(words, words[1:], words[2:])
+        }
+    return tuple(heapq.nsmallest(MINHASH_SIZE, shingles))
+
+
+def fingerprint(text: str) -> Fingerprint:
+    """
+    (content hash, MinHash sketch) of a chunk's text.
+    """
+    normalized = normalize(text)
+    return content_hash(normalized), minhash(normalized)
+
+
+def similarity(a: Sequence[int], b: Sequence[int]) -> float:
+    """
+    Estimated Jaccard similarity of the shingle sets behind two sketches:
+    the share of the smallest values of their union found in both.
+    """
+    if not a or not b:
+        return float(not a and not b)
+    shared = set(a).intersection(b)
+    union = heapq.nsmallest(MINHASH_SIZE, set(a).union(b))
+    return sum(1 for value in union if value in shared) / len(union)
+
+
+def _min_shared(sketch: Sequence[int]) -> int:
+    return max(1, min(MIN_SHARED_VALUES, len(sketch)))
+
+
+def _to_signed(value: int) -> int:
+    # SQLite integers are signed 64-bit
+    return value - (1 << _BITS) if value >= 1 << (_BITS - 1) else value
+
+
+def _encode_sketch(sketch: Sequence[int]) -> str:
+    return ",".join(f"{value:016x}" for value in sketch)
+
+
+def _decode_sketch(encoded: str) -> Tuple[int, ...]:
+    return tuple(int(value, 16) for value in encoded.split(",")) if encoded else ()
+
+
+class FingerprintIndex:
+    """
+    SQLite index of the chunk fingerprints of previously processed
+    documents, for finding chunks repeated across documents.
+
+    Each fingerprint is recorded with the first document (content hash)
+    it was seen in, so re-processing a document does not match itself.
+    Near duplicates are found among the chunks sharing sketch values.
+    The oldest entries are dropped beyond `max_entries`.
+    """
+
+    def __init__(
+        self,
+        path: Optional[str] = None,
+        max_entries: int = 1_000_000,
+        threshold: float = 0.8,
+        enabled: bool = True
+    ):
+        self.path = path or ":memory:"
+        self.max_entries = max_entries
+        self.threshold = threshold
+        self.enabled = enabled
+        self._connection: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._connection is None:
+            if self.path != ":memory:":
+                os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            connection = sqlite3.connect(self.path, check_same_thread=False, timeout=10)
+            connection.executescript(
+                "CREATE TABLE IF NOT EXISTS fingerprints ("
+                "id INTEGER PRIMARY KEY, content_hash TEXT NOT NULL UNIQUE, minhash TEXT NOT NULL, "
+                "document TEXT NOT NULL, seen_at REAL NOT NULL);"
+                "CREATE TABLE IF NOT EXISTS minhash_values (value INTEGER NOT NULL, fingerprint_id INTEGER NOT NULL);"
+                "CREATE INDEX IF NOT EXISTS minhash_values_value ON minhash_values (value);"
+                "CREATE INDEX IF NOT EXISTS minhash_values_fingerprint ON minhash_values (fingerprint_id);"
+            )
+            self._connection = connection
+        return self._connection
+
+    def seen_elsewhere(self, fingerprints: Sequence[Fingerprint], document: str) -> List[bool]:
+        """
+        Whether each fingerprint, or one at least threshold similar to it,
+        was seen in a document other than document.
+        """
+        if not self.enabled or not fingerprints:
+            return [False] * len(fingerprints)
+
+        results = []
+        with self._lock:
+            connection = self._connect()
+            for hash_, sketch in fingerprints:
+                seen = connection.execute(
+                    "SELECT 1 FROM fingerprints WHERE content_hash = ? AND document != ?",
+                    (hash_, document)
+                ).fetchone() is not None
+                if not seen and sketch and self.threshold < 1:
+                    candidates = connection.execute(
+                        "SELECT minhash FROM fingerprints WHERE document != ? AND id IN ("
+                        "SELECT fingerprint_id FROM minhash_values "
+                        f"WHERE value IN ({', '.join('?' * len(sketch))}) "
+                        "GROUP BY fingerprint_id HAVING COUNT(*) >= ?)",
+                        (document, *map(_to_signed, sketch), _min_shared(sketch))
+                    )
+                    seen = any(
+                        similarity(sketch, _decode_sketch(other)) >= self.threshold
+                        for (other,) in candidates
+                    )
+                results.append(seen)
+        return results
+
+    def add(self, fingerprints: Sequence[Fingerprint], document: str) -> None:
+        """
+        Record the fingerprints of document's chunks.
+        """
+        if not self.enabled or not fingerprints:
+            return
+
+        now = time.time()
+        with self._lock:
+            connection = self._connect()
+            for hash_, sketch in fingerprints:
+                cursor = connection.execute(
+                    "INSERT OR IGNORE INTO fingerprints (content_hash, minhash, document, seen_at) "
+                    "VALUES (?, ?, ?, ?)",
+                    (hash_, _encode_sketch(sketch), document, now)
+                )
+                if cursor.rowcount:
+                    connection.executemany(
+                        "INSERT INTO minhash_values VALUES (?, ?)",
+                        [(_to_signed(value), cursor.lastrowid) for value in sketch]
+                    )
+
+            excess = connection.execute("SELECT COUNT(*) FROM fingerprints").fetchone()[0] - self.max_entries
+            if excess > 0:
+                oldest = "SELECT id FROM fingerprints ORDER BY seen_at, id LIMIT ?"
+                connection.execute(f"DELETE FROM minhash_values WHERE fingerprint_id IN ({oldest})", (excess,))
+                connection.execute(f"DELETE FROM fingerprints WHERE id IN ({oldest})", (excess,))
+            connection.commit()
+
+    def clear(self) -> None:
+        """
+        Drop every entry.
+        """
+        with self._lock:
+            connection = self._connect()
+            connection.execute("DELETE FROM minhash_values")
+            connection.execute("DELETE FROM fingerprints")
+            connection.commit()
+
+    def close(self) -> None:
+        with self._lock:
+            if self._connection is not None:
+                self._connection.close()
+                self._connection = None
+
+
+class ChunkDeduplicator:
+    """
+    Fingerprints the chunks of one document as they are produced and flags
+    those repeating an earlier chunk of the document (duplicate_of) or a
+    chunk of another document in the index (seen_before). Chunks repeat
+    each other if their normalized text is the same or their estimated
+    similarity is at least threshold.
+
+    Call finish() once the document is done to add its fingerprints to
+    the index.
+    """
+
+    def __init__(self, document: str, index: Optional[FingerprintIndex] = None, threshold: float = 0.8):
+        self.document = document
+        self.index = index
+        self.threshold = threshold
+        self.duplicates = 0
+        self._fingerprints: List[Fingerprint] = []
+        self._by_hash: Dict[str, int] = {}
+        # Sketch value -> indexes of earlier unique chunks whose sketch has it
+        self._by_value: Dict[int, List[int]] = {}
+        self._sketches: Dict[int, Tuple[int, ...]] = {}
+
+    def add(self, records: Sequence[ChunkRecord]) -> List[ChunkRecord]:
+        """
+        Fingerprint and flag records, in document order.
+
+        Returns:
+            The records that are not duplicates
+        """
+        fingerprints = [fingerprint(record.content) for record in records]
+        seen = (
+            self.index.seen_elsewhere(fingerprints, self.document)
+            if self.index is not None else [False] * len(records)
+        )
+
+        unique = []
+        for record, (hash_, sketch), seen_before in zip(records, fingerprints, seen):
+            duplicate_of = self._find(hash_, sketch)
+            if duplicate_of is None:
+                self._remember(record.index, hash_, sketch)
+            record.fingerprint = {
+                "content_hash": hash_,
+                "minhash": [f"{value:016x}" for value in sketch],
+                "duplicate_of": duplicate_of,
+                "seen_before": seen_before
+            }
+            self._fingerprints.append((hash_, sketch))
+
+            if duplicate_of is None and not seen_before:
+                unique.append(record)
+            else:
+                self.duplicates += 1
+        return unique
+
+    def finish(self) -> None:
+        if self.index is not None:
+            self.index.add(self._fingerprints, self.document)
+
+    def _find(self, hash_: str, sketch: Tuple[int, ...]) -> Optional[int]:
+        """
+        Index of the earlier chunk this one repeats, if any.
+        """
+        if hash_ in self._by_hash:
+            return self._by_hash[hash_]
+        if not sketch or self.threshold >= 1:
+            return None
+
+        shared: Dict[int, int] = {}
+        for value in sketch:
+            for index in self._by_value.get(value, ()):
+                shared[index] = shared.get(index, 0) + 1
+        for index, count in shared.items():
+            if count >= _min_shared(sketch) and similarity(sketch, self._sketches[index]) >= self.threshold:
+                return index
+        return None
+
+    def _remember(self, index: int, hash_: str, sketch: Tuple[int, ...]) -> None:
+        self._by_hash[hash_] = index
+        self._sketches[index] = sketch
+        for value in sketch:
+            self._by_value.setdefault(value, []).append(index)
+
+
+fingerprint_index = FingerprintIndex(
+    path=settings.fingerprint_index_path,
+    max_entries=settings.fingerprint_index_max_entries,
+    threshold=settings.near_duplicate_threshold,
+    enabled=settings.fingerprint_index_enabled
+)
@@ -1,15 +1,328 @@
+import hashlib
+import io
+import os
+import re
 import time
-from typing import List, Tuple
-from unstructured.partition.pdf import partition_pdf
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+import pytesseract
+from pdf2image import convert_from_path
+from pypdf import PdfReader, PdfWriter
+from pypdf.generic import ArrayObject, DictionaryObject, IndirectObject, StreamObject
+
+from app.config import settings
+
+# Supported extraction modes:
+#   unstructured - full partition_pdf layout pipeline, OCR when needed
+#   fast         - embedded text layer per page, OCR only pages lacking one
+#   ocr          - rasterize and OCR every page, page ranges in parallel
+EXTRACTION_MODES = ("unstructured", "fast", "ocr")
+
+# Bump when a change to extraction alters its output, so cached results
+# from the previous version are not served
+EXTRACTOR_VERSION = 1
+
+EXTRACTOR_NAMES = {
+    "unstructured": "unstructured",
+    "fast": "pypdf",
+    "ocr": "tesseract"
+}
+
+# Warm-up levels: off, imports (load the unstructured pipeline) or models
+# (also partition a blank page so its layout and OCR models are loaded)
+WARM_UP_LEVELS = ("off", "imports", "models")
+
+
+def parse_page_ranges(spec: str) -> List[Tuple[int, int]]:
+    """
+    Parse a page selection such as "1-3,5" into sorted, inclusive
+    (first_page, last_page) ranges of 1-based page numbers.
+
+    Raises:
+        ValueError: if the selection is empty or malformed
+    """
+    ranges = []
+    for part in spec.split(","):
+        first, dash, last = part.strip().partition("-")
+        try:
+            page_range = (int(first), int(last) if dash else int(first))
+        except ValueError:
+            raise ValueError(f"invalid page range: {part.strip()!r}") from None
+        if page_range[0] < 1 or page_range[1] < page_range[0]:
+            raise ValueError(f"invalid page range: {part.strip()!r}")
+        ranges.append(page_range)
+    return sorted(ranges)
+
+
+def format_page_ranges(ranges: Sequence[Tuple[int, int]]) -> str:
+    """
+    Inverse of parse_page_ranges.
+    """
+    return ",".join(str(first) if first == last else f"{first}-{last}" for first, last in ranges)
+
+
+def to_page_ranges(page_numbers: Sequence[int]) -> List[Tuple[int, int]]:
+    """
+    Group page numbers into inclusive (first_page, last_page) runs of
+    consecutive pages, the form parse_page_ranges returns.
+    """
+    ranges: List[Tuple[int, int]] = []
+    for page_number in sorted(set(page_numbers)):
+        if ranges and page_number == ranges[-1][1] + 1:
+            ranges[-1] = (ranges[-1][0], page_number)
+        else:
+            ranges.append((page_number, page_number))
+    return ranges
+
+
+# Page attributes that determine what a page renders to; resources,
+# boxes and rotation are inherited from the page tree by PdfReader
+HASHED_PAGE_KEYS = ("/Contents", "/Resources", "/MediaBox", "/CropBox", "/Rotate")
+
+
+def _hash_pdf_object(obj, digest, memo: Dict[int, bytes]) -> None:
+    """
+    Feed a PDF object into digest: dictionaries by sorted key, streams by
+    their raw (still encoded) data. Indirect objects are hashed once per
+    document and memoized by object number, so shared fonts and images
+    are only read once; links back up the page tree are skipped.
+    """
+    if isinstance(obj, IndirectObject):
+        key = obj.idnum
+        if key not in memo:
+            # Placeholder against reference cycles
+            memo[key] = b"cycle"
+            sub_digest = hashlib.sha256()
+            _hash_pdf_object(obj.get_object(), sub_digest, memo)
+            memo[key] = sub_digest.digest()
+        digest.update(memo[key])
+    elif isinstance(obj, DictionaryObject):
+        digest.update(b"<<")
+        for name in sorted(obj):
+            if name in ("/Parent", "/P"):
+                continue
+            digest.update(name.encode("utf-8", "surrogateescape"))
+            _hash_pdf_object(obj.raw_get(name), digest, memo)
+        if isinstance(obj, StreamObject):
+            digest.update(b"stream")
+            digest.update(obj._data or b"")
+        digest.update(b">>")
+    elif isinstance(obj, ArrayObject):
+        digest.update(b"[")
+        for item in obj:
+            _hash_pdf_object(item, digest, memo)
+        digest.update(b"]")
+    else:
+        digest.update(repr(obj).encode("utf-8", "surrogateescape"))
+
+
+# Content stream operators the probe looks for: text shown with Tj, TJ, '
+# or " after a string or array, and XObjects drawn at "a b c d e f cm /Name Do"
+_SHOW_TEXT = re.compile(rb"[)>\]]\s*(?:Tj|TJ|'|\")")
+_NUMBER = rb"[-+]?(?:\d+\.?\d*|\.\d+)"
+_DRAW_XOBJECT = re.compile(
+    rb"(" + _NUMBER + rb")\s+(" + _NUMBER + rb")\s+(" + _NUMBER + rb")\s+(" + _NUMBER + rb")\s+"
+    + _NUMBER + rb"\s+" + _NUMBER + rb"\s+cm\s*/([^\s/\[\]()<>{}%]+)\s*Do"
+)
+
+# Form XObjects nested deeper than this are not searched for text
+PROBE_MAX_FORM_DEPTH = 2
+
+
+def open_pdf(file_path: str) -> PdfReader:
+    """
+    Open a PDF with pypdf, decrypting it if it is only protected against
+    editing (an empty user password).
+
+    Raises:
+        ValueError: if the PDF needs a password to open
+    """
+    reader = PdfReader(file_path)
+    if reader.is_encrypted and not reader.decrypt(""):
+        raise ValueError("PDF is password protected")
+    return reader
+
+
+def _content_data(obj) -> bytes:
+    """
+    Decoded data of a content stream, or of an array of them.
+    """
+    if obj is None:
+        return b""
+    obj = obj.get_object()
+    if isinstance(obj, ArrayObject):
+        return b"\n".join(_content_data(item) for item in obj)
+    return obj.get_data() if isinstance(obj, StreamObject) else b""
+
+
+def _xobjects(resources) -> DictionaryObject:
+    resources = resources.get_object() if resources is not None else None
+    if not isinstance(resources, DictionaryObject) or "/XObject" not in resources:
+        return DictionaryObject()
+    return resources["/XObject"].get_object()
+
+
+def _probe_content(data: bytes, resources, depth: int = 0) -> Tuple[bool, float]:
+    """
+    (whether content shows text, area in user space units of the images
+    it draws) from a content stream and its resources. Image placement is
+    read from the cm right before each Do, so images scaled by an outer
+    transformation are measured approximately.
+    """
+    has_text = _SHOW_TEXT.search(data) is not None
+    xobjects = _xobjects(resources)
+    image_area = 0.0
+    for match in _DRAW_XOBJECT.finditer(data):
+        name = "/" + match.group(5).decode("latin-1")
+        if name not in xobjects:
+            continue
+        xobject = xobjects[name].get_object()
+        subtype = xobject.get("/Subtype")
+        if subtype == "/Image":
+            a, b, c, d = (float(value) for value in match.group(1, 2, 3, 4))
+            image_area += abs(a * d - b * c)
+        elif subtype == "/Form" and not has_text and depth < PROBE_MAX_FORM_DEPTH:
+            has_text = _probe_content(xobject.get_data(), xobject.get("/Resources"), depth + 1)[0]
+    return has_text, image_area
+
+
+def warm_up(level: str = "imports") -> None:
+    """
+    Load the unstructured pipeline ahead of the first request.
+
+    unstructured is only imported when first used, since importing it
+    pulls in the layout and OCR stacks and takes seconds.
+    """
+    if level not in WARM_UP_LEVELS:
+        raise ValueError(f"warm-up level must be one of: {', '.join(WARM_UP_LEVELS)}")
+    if level == "off":
+        return
+
+    from unstructured.partition.pdf import partition_pdf
+
+    if level == "models":
+        writer = PdfWriter()
+        writer.add_blank_page(width=612, height=792)
+        blank_pdf = io.BytesIO()
+        writer.write(blank_pdf)
+
+        with PDFExtractor._temporary_file(blank_pdf.getvalue()) as tmp_path:
+            partition_pdf(filename=tmp_path, strategy="auto", include_page_breaks=True)
 
 
 class PDFExtractor:
     """
-    PDF text extraction using the Unstructured library.
+    PDF text extraction using the Unstructured library, with a fast path
+    that reads the embedded text layer directly and a page-parallel OCR
+    path for scanned documents.
+
+    `pages` ((first, last) ranges from parse_page_ranges) and `max_pages`
+    restrict extraction to part of the document; the other pages are never
+    parsed or OCRed. Results keep the document's page numbering, with the
+    skipped pages left empty.
     """
 
-    def __init__(self):
-        self.extractor_name = "unstructured"
+    def __init__(
+        self,
+        mode: str = "unstructured",
+        text_layer_min_chars: int = settings.text_layer_min_chars,
+        text_layer_min_quality: float = settings.text_layer_min_quality,
+        ocr_dpi: int = settings.ocr_dpi,
+        ocr_workers: int = settings.ocr_workers,
+        ocr_pages_per_task: int = settings.ocr_pages_per_task,
+        pages: Optional[Sequence[Tuple[int, int]]] = None,
+        max_pages: Optional[int] = None
+    ):
+        if mode not in EXTRACTION_MODES:
+            raise ValueError(f"mode must be one of {', '.join(EXTRACTION_MODES)}")
+        if max_pages is not None and max_pages < 1:
+            raise ValueError("max_pages must be at least 1")
+        self.mode = mode
+        self.extractor_name = EXTRACTOR_NAMES[mode]
+        self.text_layer_min_chars = text_layer_min_chars
+        self.text_layer_min_quality = text_layer_min_quality
+        self.ocr_dpi = ocr_dpi
+        self.ocr_workers = max(1, ocr_workers)
+        self.ocr_pages_per_task = max(1, ocr_pages_per_task)
+        self.pages = sorted(pages) if pages is not None else None
+        self.max_pages = max_pages
+
+    @property
+    def partial(self) -> bool:
+        """
+        Whether extraction is restricted to some of the pages.
+        """
+        return self.pages is not None or self.max_pages is not None
+
+    def select_pages(self, total_pages: int) -> List[int]:
+        """
+        Numbers of the pages to extract from a document of total_pages.
+        """
+        if self.pages is None:
+            selected = list(range(1, total_pages + 1))
+        else:
+            selected = sorted({
+                page_number
+                for first_page, last_page in self.pages
+                for page_number in range(first_page, min(last_page, total_pages) + 1)
+            })
+        return selected[:self.max_pages] if self.max_pages is not None else selected
+
+    def restricted_to(self, page_numbers: Sequence[int]) -> "PDFExtractor":
+        """
+        Copy of this extractor that only extracts page_numbers.
+        """
+        return PDFExtractor(
+            self.mode,
+            text_layer_min_chars=self.text_layer_min_chars,
+            text_layer_min_quality=self.text_layer_min_quality,
+            ocr_dpi=self.ocr_dpi,
+            ocr_workers=self.ocr_workers,
+            ocr_pages_per_task=self.ocr_pages_per_task,
+            pages=to_page_ranges(page_numbers)
+        )
+
+    def with_mode(self, mode: str) -> "PDFExtractor":
+        """
+        Copy of this extractor using another extraction mode.
+        """
+        return PDFExtractor(
+            mode,
+            text_layer_min_chars=self.text_layer_min_chars,
+            text_layer_min_quality=self.text_layer_min_quality,
+            ocr_dpi=self.ocr_dpi,
+            ocr_workers=self.ocr_workers,
+            ocr_pages_per_task=self.ocr_pages_per_task,
+            pages=self.pages,
+            max_pages=self.max_pages
+        )
+
+    def page_cache_params(self) -> Dict[str, object]:
+        """
+        Settings that affect the text extracted from a single page, for
+        page cache keys. Unlike cache_params(), the page selection is left
+        out, so pages of a partial extraction serve full ones.
+        """
+        params: Dict[str, object] = {"mode": self.mode, "extractor": EXTRACTOR_VERSION}
+        if self.mode == "fast":
+            params["min_chars"] = self.text_layer_min_chars
+            params["min_quality"] = self.text_layer_min_quality
+        if self.mode in ("fast", "ocr"):
+            params["dpi"] = self.ocr_dpi
+        return params
+
+    def cache_params(self) -> Dict[str, object]:
+        """
+        Settings that affect this extractor's output, for cache keys.
+        """
+        params = self.page_cache_params()
+        if self.pages is not None:
+            params["pages"] = format_page_ranges(self.pages)
+        if self.max_pages is not None:
+            params["max_pages"] = self.max_pages
+        return params
 
     def extract(self, file_path: str) -> dict:
         """
@@ -22,63 +335,542 @@ class PDFExtractor:
             dict with keys:
                 - text: Full extracted text
                 - page_boundaries: List of (start_char, end_char) for each page
+                - elements: Layout elements as dicts with start and end
+                  offsets into text, category (e.g. Title, ListItem, Table,
+                  NarrativeText) and 1-based page
                 - total_pages: Number of pages
-                - ocr_applied: Whether OCR was used
+                - extracted_pages: Numbers of the pages extracted, or None
+                  if all were
+                - ocr_applied: Whether OCR was used on any page
+                - page_ocr_applied: Whether OCR was used, for each page
+                - page_timings_ms: Time spent on each page (fast and ocr modes)
+                - stage_timings_ms: Time spent in each extraction stage
+                - extractor: Name of the extraction backend
                 - processing_time_ms: Time taken for extraction
         """
         start_time = time.time()
 
+        total_pages = self.count_pages(file_path) if self.partial else None
+        result = self.assemble_result(list(self.iter_pages(file_path)), total_pages)
+        result["processing_time_ms"] = int((time.time() - start_time) * 1000)
+        return result
+
+    def assemble_result(self, pages: List[dict], total_pages: Optional[int] = None) -> dict:
+        """
+        Build an extraction result from the pages yielded by iter_pages.
+
+        For a partial extraction, total_pages is the document's page count;
+        pages that were skipped are filled in as empty pages.
+
+        Returns:
+            Same as extract(), without processing_time_ms
+        """
+        extracted_pages = [page["page_number"] for page in pages] if self.partial else None
+        if self.partial:
+            pages = self._fill_skipped_pages(pages, total_pages or 0)
+
+        page_timings_ms = [page["elapsed_ms"] for page in pages]
+        page_ocr_applied = [page["ocr_applied"] for page in pages]
+
+        stage_timings_ms: Dict[str, float] = {}
+        for page in pages:
+            for stage, elapsed_ms in page["stage_timings_ms"].items():
+                stage_timings_ms[stage] = stage_timings_ms.get(stage, 0) + elapsed_ms
+
+        text, page_boundaries = self._assemble_pages([page["text"] for page in pages])
+
+        # Element offsets move from page-relative to document offsets
+        elements = [
+            {"start": page_start + start, "end": page_start + end, "category": category, "page": page_number}
+            for page_number, (page, (page_start, _)) in enumerate(zip(pages, page_boundaries), start=1)
+            for start, end, category in page["elements"]
+        ]
+
+        return {
+            "text": text,
+            "page_boundaries": page_boundaries,
+            "elements": elements,
+            "total_pages": len(page_boundaries) or 1,
+            "extracted_pages": extracted_pages,
+            "ocr_applied": any(page_ocr_applied),
+            "page_ocr_applied": page_ocr_applied,
+            "page_timings_ms": page_timings_ms if None not in page_timings_ms else [],
+            "stage_timings_ms": stage_timings_ms,
+            "extractor": self.extractor_name
+        }
+
+    @classmethod
+    def _fill_skipped_pages(cls, pages: List[dict], total_pages: int) -> List[dict]:
+        """
+        pages with an empty page added for every page number up to
+        total_pages (or the last page extracted) that was not extracted.
+        """
+        by_number = {page["page_number"]: page for page in pages}
+        last_page = max([total_pages, *by_number])
+        return [
+            by_number.get(page_number) or cls._skipped_page(page_number)
+            for page_number in range(1, last_page + 1)
+        ]
+
+    @classmethod
+    def _skipped_page(cls, page_number: int) -> dict:
+        """
+        Placeholder for a page left out of a partial extraction.
+        """
+        return cls._page(page_number, "", False, 0, {}, [])
+
+    def iter_pages(self, file_path: str) -> Iterator[dict]:
+        """
+        Extract a PDF page by page, in page order. A partial extraction
+        only yields the selected pages.
+
+        The fast and ocr modes yield each batch of pages as soon as it is
+        done; the unstructured mode partitions the whole document first.
+
+        Yields:
+            dict with keys:
+                - page_number: 1-based page number
+                - text: Extracted page text
+                - ocr_applied: Whether OCR was used for the page
+                - elapsed_ms: Time spent on the page, or None if not measured
+                - elements: (start, end, category) of each layout element,
+                  as offsets into the page text. Pages from the fast and ocr
+                  modes have one UncategorizedText element per line.
+                - stage_timings_ms: Time spent in each extraction stage since
+                  the previous page, in fractional milliseconds
+        """
+        if self.mode == "fast":
+            return self._iter_fast_pages(file_path)
+        if self.mode == "ocr":
+            return self._iter_ocr_pages(file_path)
+        return self._iter_unstructured_pages(file_path)
+
+    def _iter_unstructured_pages(self, file_path: str) -> Iterator[dict]:
+        """
+        Extract pages with the partition_pdf layout pipeline.
+        """
+        # Deferred: importing unstructured is slow, see warm_up()
+        from unstructured.partition.pdf import partition_pdf
+
+        if not self.partial:
+            yield from self._partition_pages(partition_pdf, file_path, None)
+            return
+
+        # Partition a copy holding only the selected pages
+        reader = open_pdf(file_path)
+        page_numbers = self.select_pages(len(reader.pages))
+        if not page_numbers:
+            return
+        writer = PdfWriter()
+        for page_number in page_numbers:
+            writer.add_page(reader.pages[page_number - 1])
+        subset = io.BytesIO()
+        writer.write(subset)
+
+        with self._temporary_file(subset.getvalue()) as subset_path:
+            yield from self._partition_pages(partition_pdf, subset_path, page_numbers)
+
+    def _partition_pages(
+        self,
+        partition_pdf: Callable[..., list],
+        file_path: str,
+        page_numbers: Optional[List[int]]
+    ) -> Iterator[dict]:
+        """
+        Partition a PDF and yield its pages, numbered by page_numbers (the
+        original number of each page in the file) or from 1.
+        """
         # Extract elements using unstructured
+        partition_start = time.perf_counter()
         elements = partition_pdf(
             filename=file_path,
             strategy="auto",  # Uses OCR if needed
             include_page_breaks=True
         )
+        stages = {"partition_pdf": (time.perf_counter() - partition_start) * 1000}
 
-        # Process elements to build text and track pages
-        text_parts = []
-        page_boundaries: List[Tuple[int, int]] = []
-        current_page = 1
-        current_page_start = 0
-        current_position = 0
-        ocr_applied = False
+        def number(index: int) -> int:
+            return page_numbers[index - 1] if page_numbers and index <= len(page_numbers) else index
+
+        # Group element texts by page
+        page_parts: List[str] = []
+        page_categories: List[str] = []
+        page_number = 1
+        page_ocr = False
+        assembly_start = time.perf_counter()
 
         for element in elements:
             # Check if this is a page break
             if element.category == "PageBreak":
-                # Record the boundary for the completed page
-                page_boundaries.append((current_page_start, current_position))
-                current_page += 1
-                current_page_start = current_position
+                stages["element_assembly"] = (time.perf_counter() - assembly_start) * 1000
+                yield self._page(
+                    number(page_number), "\n".join(page_parts), page_ocr, None, stages,
+                    self._element_spans(page_parts, page_categories)
+                )
+                page_parts = []
+                page_categories = []
+                page_number += 1
+                page_ocr = False
+                stages = {}
+                assembly_start = time.perf_counter()
                 continue
 
             # Get element text
             element_text = str(element)
             if element_text:
-                text_parts.append(element_text)
-                current_position += len(element_text) + 1  # +1 for newline
+                page_parts.append(element_text)
+                page_categories.append(element.category)
 
             # Check metadata for OCR
             if hasattr(element, 'metadata') and element.metadata:
                 if getattr(element.metadata, 'detection_origin', None) == 'ocr':
-                    ocr_applied = True
+                    page_ocr = True
+
+        # A trailing page without text is not counted
+        if page_parts:
+            stages["element_assembly"] = (time.perf_counter() - assembly_start) * 1000
+            yield self._page(
+                number(page_number), "\n".join(page_parts), page_ocr, None, stages,
+                self._element_spans(page_parts, page_categories)
+            )
 
-        # Add final page boundary
-        if current_position > current_page_start:
-            page_boundaries.append((current_page_start, current_position))
+    def _iter_fast_pages(self, file_path: str) -> Iterator[dict]:
+        """
+        Extract pages from their embedded text layer, falling back to OCR
+        for pages whose text layer is missing or unusable.
+        """
+        reader = open_pdf(file_path)
+
+        for batch in self._page_batches(self.select_pages(len(reader.pages))):
+            page_texts = {}
+            page_timings_ms = {}
+            page_stages = {}
+            pages_needing_ocr = []
+            for page_number in batch:
+                page_start = time.perf_counter()
+                page_text = (reader.pages[page_number - 1].extract_text() or "").strip()
+                page_texts[page_number] = page_text
+                text_layer_ms = (time.perf_counter() - page_start) * 1000
+                page_timings_ms[page_number] = int(text_layer_ms)
+                page_stages[page_number] = {"text_layer": text_layer_ms}
+
+                if not self._has_usable_text_layer(page_text):
+                    pages_needing_ocr.append(page_number)
+
+            ocr_start = time.perf_counter()
+            ocr_results = self._ocr_pages(file_path, pages_needing_ocr)
+            if ocr_results:
+                # Pages are OCRed in parallel, so wall time is booked once
+                page_stages[batch[0]]["ocr"] = (time.perf_counter() - ocr_start) * 1000
+
+            for page_number in batch:
+                page_text = page_texts[page_number]
+                ocr_applied = False
+                if page_number in ocr_results:
+                    ocr_text, ocr_ms = ocr_results[page_number]
+                    page_timings_ms[page_number] += ocr_ms
+                    if ocr_text or not page_text:
+                        page_text = ocr_text
+                        ocr_applied = True
+
+                yield self._page(
+                    page_number, page_text, ocr_applied, page_timings_ms[page_number], page_stages[page_number]
+                )
 
-        # Join all text with newlines
-        full_text = "\n".join(text_parts)
+    def _iter_ocr_pages(self, file_path: str) -> Iterator[dict]:
+        """
+        OCR every page, splitting the document into page ranges that are
+        rasterized and recognised in parallel, then stitched back in order.
+        """
+        total_pages = len(open_pdf(file_path).pages)
+
+        for batch in self._page_batches(self.select_pages(total_pages)):
+            ocr_start = time.perf_counter()
+            ocr_results = self._ocr_pages(file_path, batch)
+            # Pages are OCRed in parallel, so wall time is booked once per batch
+            stages = {"ocr": (time.perf_counter() - ocr_start) * 1000}
+            for page_number in batch:
+                page_text, elapsed_ms = ocr_results[page_number]
+                yield self._page(page_number, page_text, True, elapsed_ms, stages)
+                stages = {}
+
+    def _page_batches(self, page_numbers: List[int]) -> Iterator[List[int]]:
+        """
+        Split pages into batches that keep every OCR worker busy once.
+        """
+        batch_size = self.ocr_workers * self.ocr_pages_per_task
+        for i in range(0, len(page_numbers), batch_size):
+            yield page_numbers[i:i + batch_size]
 
-        processing_time = int((time.time() - start_time) * 1000)
+    @staticmethod
+    def _page(
+        page_number: int,
+        text: str,
+        ocr_applied: bool,
+        elapsed_ms: Optional[int],
+        stage_timings_ms: Optional[Dict[str, float]] = None,
+        elements: Optional[List[Tuple[int, int, str]]] = None
+    ) -> dict:
+        if elements is None:
+            # Without layout information every line is an element
+            lines = text.split("\n")
+            elements = [
+                span for span in PDFExtractor._element_spans(lines, ["UncategorizedText"] * len(lines))
+                if span[0] < span[1]
+            ]
 
         return {
-            "text": full_text,
-            "page_boundaries": page_boundaries,
-            "total_pages": len(page_boundaries) or 1,
+            "page_number": page_number,
+            "text": text,
             "ocr_applied": ocr_applied,
-            "processing_time_ms": processing_time
+            "elapsed_ms": elapsed_ms,
+            "stage_timings_ms": stage_timings_ms or {},
+            "elements": elements
+        }
+
+    @staticmethod
+    def _element_spans(parts: List[str], categories: List[str]) -> List[Tuple[int, int, str]]:
+        """
+        (start, end, category) of each part within "\n".join(parts).
+        """
+        spans = []
+        position = 0
+        for part, category in zip(parts, categories):
+            spans.append((position, position + len(part), category))
+            position += len(part) + 1
+        return spans
+
+    def _has_usable_text_layer(self, page_text: str) -> bool:
+        """
+        Whether a page's text layer is long enough and mostly readable.
+
+        Broken font encodings typically yield symbols or replacement
+        characters, so the share of alphanumeric and whitespace characters
+        is used as a cheap quality score.
+        """
+        if len(page_text) < self.text_layer_min_chars:
+            return False
+
+        readable = sum(1 for char in page_text if char.isalnum() or char.isspace())
+        return readable / len(page_text) >= self.text_layer_min_quality
+
+    def _ocr_pages(self, file_path: str, page_numbers: List[int]) -> Dict[int, Tuple[str, int]]:
+        """
+        OCR the given pages, with page ranges processed in parallel.
+
+        pdftoppm and tesseract run as subprocesses, so threads are enough to
+        keep several cores busy without spawning more Python processes.
+
+        Returns:
+            dict mapping page number to (text, elapsed_ms)
+        """
+        page_ranges = self._page_ranges(page_numbers)
+        if not page_ranges:
+            return {}
+
+        results: Dict[int, Tuple[str, int]] = {}
+        workers = min(self.ocr_workers, len(page_ranges))
+
+        if workers == 1:
+            for first_page, last_page in page_ranges:
+                results.update(self._ocr_page_range(file_path, first_page, last_page))
+            return results
+
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            futures = [
+                executor.submit(self._ocr_page_range, file_path, first_page, last_page)
+                for first_page, last_page in page_ranges
+            ]
+            for future in futures:
+                results.update(future.result())
+
+        return results
+
+    def _page_ranges(self, page_numbers: List[int]) -> List[Tuple[int, int]]:
+        """
+        Group page numbers into runs of consecutive pages, each at most
+        ocr_pages_per_task long, as inclusive (first_page, last_page) ranges.
+        """
+        page_ranges: List[Tuple[int, int]] = []
+        for page_number in sorted(page_numbers):
+            if page_ranges:
+                first_page, last_page = page_ranges[-1]
+                if page_number == last_page + 1 and last_page - first_page + 1 < self.ocr_pages_per_task:
+                    page_ranges[-1] = (first_page, page_number)
+                    continue
+            page_ranges.append((page_number, page_number))
+        return page_ranges
+
+    def _ocr_page_range(self, file_path: str, first_page: int, last_page: int) -> Dict[int, Tuple[str, int]]:
+        """
+        Rasterize an inclusive page range and run Tesseract OCR on each page.
+
+        Rasterization time is shared evenly across the pages of the range.
+        """
+        raster_start = time.time()
+        images = convert_from_path(
+            file_path,
+            dpi=self.ocr_dpi,
+            first_page=first_page,
+            last_page=last_page
+        )
+        raster_ms = (time.time() - raster_start) * 1000 / max(len(images), 1)
+
+        results: Dict[int, Tuple[str, int]] = {}
+        for page_number, image in zip(range(first_page, last_page + 1), images):
+            ocr_start = time.time()
+            page_text = pytesseract.image_to_string(image).strip()
+            results[page_number] = (page_text, int(raster_ms + (time.time() - ocr_start) * 1000))
+
+        # Pages pdftoppm could not render are reported as empty
+        for page_number in range(first_page, last_page + 1):
+            results.setdefault(page_number, ("", 0))
+
+        return results
+
+    @staticmethod
+    def _assemble_pages(page_texts: List[str]) -> Tuple[str, List[Tuple[int, int]]]:
+        """
+        Join page texts with newlines and record each page's boundaries,
+        using the same offsets convention as the unstructured path.
+        """
+        text_parts = []
+        page_boundaries: List[Tuple[int, int]] = []
+        current_position = 0
+
+        for page_text in page_texts:
+            page_start = current_position
+            if page_text:
+                text_parts.append(page_text)
+                current_position += len(page_text) + 1  # +1 for newline
+            page_boundaries.append((page_start, current_position))
+
+        return "\n".join(text_parts), page_boundaries
+
+    def probe(self, file_path: str) -> dict:
+        """
+        Cheap pre-flight look at a PDF, reading only its structure and
+        content streams: no text is extracted and nothing is rendered.
+
+        Returns:
+            dict with keys:
+                - total_pages: Number of pages, or None if unreadable
+                - encrypted: Whether the PDF is encrypted
+                - error: Why the PDF cannot be extracted, or None
+                - pages: Per page, its page_number, whether it has a
+                  text_layer, and the share of its area covered by images
+                  (image_coverage, 0 to 1)
+                - selected_pages: Number of pages this extractor selects
+                - ocr_pages: Number of those extraction in this mode will
+                  likely OCR
+                - text_layer: Whether every selected page has a text layer
+                - ocr_likely: Whether extraction will likely OCR
+                - estimated_seconds: Rough extraction time
+                - recommended_mode: ocr if no selected page has a text
+                  layer, else fast
+        """
+        result = {
+            "total_pages": None,
+            "encrypted": False,
+            "error": None,
+            "pages": [],
+            "selected_pages": 0,
+            "ocr_pages": 0,
+            "text_layer": False,
+            "ocr_likely": True,
+            "estimated_seconds": 0.0,
+            "recommended_mode": "ocr"
         }
+        try:
+            reader = open_pdf(file_path)
+        except ValueError as e:
+            result.update({"encrypted": True, "error": str(e)})
+            return result
+        except Exception:
+            result["error"] = "Not a readable PDF"
+            return result
+
+        result["encrypted"] = reader.is_encrypted
+        try:
+            result["total_pages"] = len(reader.pages)
+            result["pages"] = [
+                self._probe_page(page_number, page) for page_number, page in enumerate(reader.pages, 1)
+            ]
+        except Exception:
+            result.update({"total_pages": None, "pages": [], "error": "Not a readable PDF"})
+            return result
+        if not result["pages"]:
+            result["error"] = "PDF has no pages"
+            return result
+
+        selected = self.select_pages(len(result["pages"]))
+        text_pages = sum(1 for page_number in selected if result["pages"][page_number - 1]["text_layer"])
+        ocr_pages = self.likely_ocr_pages(result["pages"])
+        result.update({
+            "selected_pages": len(selected),
+            "ocr_pages": len(ocr_pages),
+            "text_layer": text_pages == len(selected),
+            "ocr_likely": bool(ocr_pages),
+            "estimated_seconds": round(
+                (len(selected) - len(ocr_pages)) * settings.estimated_text_page_seconds
+                + len(ocr_pages) * settings.estimated_ocr_page_seconds / self.ocr_workers,
+                3
+            ),
+            "recommended_mode": "fast" if text_pages else "ocr"
+        })
+        return result
+
+    @staticmethod
+    def _probe_page(page_number: int, page) -> dict:
+        resources = page.get("/Resources")
+        has_text, image_area = _probe_content(_content_data(page.get("/Contents")), resources)
+        fonts = resources.get_object().get("/Font") if resources is not None else None
+        box = page.mediabox
+        page_area = abs(float(box.width) * float(box.height))
+        return {
+            "page_number": page_number,
+            "text_layer": has_text and fonts is not None,
+            "image_coverage": round(min(1.0, image_area / page_area), 3) if page_area else 0.0
+        }
+
+    def likely_ocr_pages(self, pages: List[dict]) -> List[int]:
+        """
+        Numbers of the selected pages extraction in this mode will likely
+        OCR, from the pages of probe().
+        """
+        selected = self.select_pages(len(pages))
+        if self.mode == "ocr":
+            return selected
+        return [page_number for page_number in selected if not pages[page_number - 1]["text_layer"]]
+
+    @staticmethod
+    def count_pages(file_path: str) -> Optional[int]:
+        """
+        Number of pages in a PDF file, or None if the document cannot be read.
+        """
+        try:
+            return len(open_pdf(file_path).pages)
+        except Exception:
+            return None
+
+    @staticmethod
+    def page_hashes(file_path: str) -> List[str]:
+        """
+        Hash of each page of a PDF file, covering its content streams and
+        the fonts, images and other resources they draw with. A page that
+        renders the same in another version of the document, for example
+        amended minutes with one page changed, keeps its hash.
+        """
+        reader = open_pdf(file_path)
+        memo: Dict[int, bytes] = {}
+        hashes = []
+        for page in reader.pages:
+            digest = hashlib.sha256()
+            for key in HASHED_PAGE_KEYS:
+                digest.update(key.encode("ascii"))
+                _hash_pdf_object(page.raw_get(key) if key in page else None, digest, memo)
+            hashes.append(digest.hexdigest())
+        return hashes
 
     def extract_from_bytes(self, file_bytes: bytes, filename: str) -> dict:
         """
@@ -91,8 +883,30 @@ class PDFExtractor:
         Returns:
             Same as extract()
         """
+        with self._temporary_file(file_bytes) as tmp_path:
+            return self.extract(tmp_path)
+
+    def iter_pages_from_bytes(self, file_bytes: bytes, filename: str) -> Iterator[dict]:
+        """
+        Extract PDF bytes page by page.
+
+        Args:
+            file_bytes: PDF file content as bytes
+            filename: Original filename for reference
+
+        Yields:
+            Same as iter_pages()
+        """
+        with self._temporary_file(file_bytes) as tmp_path:
+            yield from self.iter_pages(tmp_path)
+
+    @staticmethod
+    @contextmanager
+    def _temporary_file(file_bytes: bytes) -> Iterator[str]:
+        """
+        Write bytes to a temporary PDF file and remove it afterwards.
+        """
         import tempfile
-        import os
 
         # Write bytes to temporary file
         with tempfile.NamedTemporaryFile(delete=False, suffix=".pdf") as tmp:
@@ -100,7 +914,7 @@ class PDFExtractor:
             tmp_path = tmp.name
 
         try:
-            return self.extract(tmp_path)
+            yield tmp_path
         finally:
             # Clean up temporary file
             os.unlink(tmp_path)
@@ -0,0 +1,336 @@
+import cProfile
+import os
+import pstats
+import threading
+import time
+import uuid
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+from app.config import settings
+
+# Download formats of a stored profile
+PROFILE_FORMATS = ("pstats", "speedscope")
+
+# Reconstructed speedscope stacks are cut off at this depth, and call paths
+# taking less than SPEEDSCOPE_MIN_SECONDS are left out
+SPEEDSCOPE_MAX_DEPTH = 64
+SPEEDSCOPE_MIN_SECONDS = 1e-5
+
+# pstats function key: (filename, line number, function name)
+Function = Tuple[str, int, str]
+
+
+class ProfilerBusy(Exception):
+    """
+    Raised when a request asks to be profiled while another one is.
+    """
+
+
+def profiled_iter(fn: Callable[..., Iterator], stats_path: str, *args) -> Iterator:
+    """
+    Iterate over fn(*args) under cProfile and write the profile to
+    stats_path once done, for profiling extraction in a worker process.
+    Only the time spent producing items is profiled.
+    """
+    profiler = cProfile.Profile()
+    items = iter(fn(*args))
+    try:
+        while True:
+            profiler.enable()
+            try:
+                item = next(items)
+            except StopIteration:
+                return
+            finally:
+                profiler.disable()
+            yield item
+    finally:
+        close = getattr(items, "close", None)
+        if close is not None:
+            close()
+        profiler.dump_stats(stats_path)
+
+
+def hot_functions(stats: pstats.Stats, limit: int) -> List[dict]:
+    """
+    The limit functions with the most time spent in their own code.
+    """
+    entries = sorted(stats.stats.items(), key=lambda entry: entry[1][2], reverse=True)[:limit]
+    return [
+        {
+            "function": pstats.func_std_string(function),
+            "calls": calls,
+            "self_ms": round(self_seconds * 1000, 3),
+            "cumulative_ms": round(cumulative_seconds * 1000, 3)
+        }
+        for function, (_, calls, self_seconds, cumulative_seconds, _) in entries
+    ]
+
+
+def to_speedscope(stats: pstats.Stats, name: str) -> dict:
+    """
+    Speedscope (https://www.speedscope.app) file of a profile.
+
+    cProfile records a call graph rather than stacks, so stacks are
+    rebuilt by splitting the time of each function between its callers in
+    proportion to the time it spent under each. The flame graph is exact
+    for functions with a single caller and approximate otherwise.
+    """
+    entries = stats.stats
+    callees: Dict[Function, List[Function]] = {}
+    for function, (_, _, _, _, callers) in entries.items():
+        for caller in callers:
+            callees.setdefault(caller, []).append(function)
+
+    frames: List[dict] = []
+    frame_indexes: Dict[Function, int] = {}
+    samples: List[List[int]] = []
+    weights: List[float] = []
+
+    def frame(function: Function) -> int:
+        if function not in frame_indexes:
+            frame_indexes[function] = len(frames)
+            filename, line, function_name = function
+            frames.append({"name": function_name, "file": filename, "line": line})
+        return frame_indexes[function]
+
+    def walk(function: Function, stack: List[int], share: float) -> None:
+        # share: the fraction of function's time spent on this call path
+        _, _, self_seconds, cumulative_seconds, _ = entries[function]
+        stack = stack + [frame(function)]
+        if self_seconds * share > 0:
+            samples.append(stack)
+            weights.append(self_seconds * share * 1000)
+        if len(stack) >= SPEEDSCOPE_MAX_DEPTH or cumulative_seconds <= 0:
+            return
+        for callee in callees.get(function, ()):
+            if frame_indexes.get(callee) in stack:
+                # Recursion; its time is already counted on the outer call
+                continue
+            callee_cumulative = entries[callee][3]
+            under_caller = entries[callee][4][function][3] * share
+            if callee_cumulative > 0 and under_caller >= SPEEDSCOPE_MIN_SECONDS:
+                walk(callee, stack, under_caller / callee_cumulative)
+
+    for function, (_, _, _, _, callers) in entries.items():
+        if not callers:
+            walk(function, [], 1.0)
+
+    return {
+        "$schema": "https://www.speedscope.app/file-format-schema.json",
+        "name": name,
+        "exporter": settings.app_name,
+        "shared": {"frames": frames},
+        "profiles": [{
+            "type": "sampled",
+            "name": name,
+            "unit": "milliseconds",
+            "startValue": 0,
+            "endValue": sum(weights),
+            "samples": samples,
+            "weights": weights
+        }]
+    }
+
+
+class ProfileStore:
+    """
+    Request profiles kept on local disk as pstats files for download.
+
+    Only the newest max_profiles are kept, each for at most ttl_seconds.
+    """
+
+    SUFFIX = ".pstats"
+    WORKER_SUFFIX = ".worker"
+
+    def __init__(self, directory: str, max_profiles: int = 20, ttl_seconds: float = 3600):
+        self.directory = directory
+        self.max_profiles = max_profiles
+        self.ttl_seconds = ttl_seconds
+        self._lock = threading.Lock()
+
+    def save(self, stats: pstats.Stats) -> str:
+        """
+        Store a profile and return its id.
+        """
+        os.makedirs(self.directory, exist_ok=True)
+        profile_id = uuid.uuid4().hex
+        stats.dump_stats(self._path(profile_id))
+        self.purge()
+        return profile_id
+
+    def load(self, profile_id: str) -> Optional[pstats.Stats]:
+        """
+        Return a stored profile, or None if it is unknown or expired.
+        """
+        path = self.path(profile_id)
+        return pstats.Stats(path) if path is not None else None
+
+    def path(self, profile_id: str) -> Optional[str]:
+        """
+        pstats file of a stored profile, or None if it is unknown or expired.
+        """
+        if not _is_profile_id(profile_id):
+            return None
+        path = self._path(profile_id)
+        try:
+            expired = os.stat(path).st_mtime < time.time() - self.ttl_seconds
+        except OSError:
+            return None
+        return None if expired else path
+
+    def list(self) -> List[dict]:
+        """
+        Stored profiles, newest first, as dicts with profile_id,
+        created_at (epoch seconds) and size_bytes.
+        """
+        self.purge()
+        return [
+            {"profile_id": name[:-len(self.SUFFIX)], "created_at": mtime, "size_bytes": size}
+            for mtime, size, name in self._entries(self.SUFFIX)
+        ]
+
+    def worker_path(self) -> str:
+        """
+        New path for a worker process to dump its profile to.
+        """
+        os.makedirs(self.directory, exist_ok=True)
+        return os.path.join(self.directory, uuid.uuid4().hex + self.WORKER_SUFFIX)
+
+    def purge(self, now: Optional[float] = None) -> None:
+        """
+        Remove expired profiles and those beyond max_profiles, and worker
+        profiles left behind by failed requests.
+        """
+        cutoff = (now if now is not None else time.time()) - self.ttl_seconds
+        with self._lock:
+            for index, (mtime, _, name) in enumerate(self._entries(self.SUFFIX)):
+                if index >= self.max_profiles or mtime < cutoff:
+                    self._remove(name)
+            for mtime, _, name in self._entries(self.WORKER_SUFFIX):
+                if mtime < cutoff:
+                    self._remove(name)
+
+    def _path(self, profile_id: str) -> str:
+        return os.path.join(self.directory, profile_id + self.SUFFIX)
+
+    def _entries(self, suffix: str) -> List[Tuple[float, int, str]]:
+        """
+        (mtime, size, name) of the files with suffix, newest first.
+        """
+        entries = []
+        try:
+            names = os.listdir(self.directory)
+        except OSError:
+            return []
+        for name in names:
+            if not name.endswith(suffix):
+                continue
+            try:
+                stat = os.stat(os.path.join(self.directory, name))
+            except OSError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, name))
+        return sorted(entries, reverse=True)
+
+    def _remove(self, name: str) -> None:
+        try:
+            os.unlink(os.path.join(self.directory, name))
+        except OSError:
+            pass
+
+
+def _is_profile_id(profile_id: str) -> bool:
+    return len(profile_id) == 32 and all(c in "0123456789abcdef" for c in profile_id)
+
+
+class RequestProfiler:
+    """
+    cProfile of one request: the event loop thread from start() to
+    finish(), merged with the profiles of the worker processes extracting
+    its pages (see worker_path()).
+
+    cProfile on the event loop thread also records other requests running
+    meanwhile, and only one profiler can be active per thread, so only one
+    request is profiled at a time.
+    """
+
+    _active = threading.Lock()
+
+    def __init__(self, store: ProfileStore, top_functions: int = 20):
+        self.store = store
+        self.top_functions = top_functions
+        self._profile = cProfile.Profile()
+        self._worker_paths: List[str] = []
+        self._start = 0.0
+        self._running = False
+
+    def start(self) -> None:
+        """
+        Raises:
+            ProfilerBusy: if another request is being profiled
+        """
+        if not RequestProfiler._active.acquire(blocking=False):
+            raise ProfilerBusy("Another request is being profiled")
+        self._running = True
+        self._start = time.perf_counter()
+        self._profile.enable()
+
+    def worker_path(self) -> str:
+        """
+        Path for a worker process to dump its part of the profile to, e.g.
+        with profiled_iter.
+        """
+        path = self.store.worker_path()
+        self._worker_paths.append(path)
+        return path
+
+    def finish(self) -> dict:
+        """
+        Stop profiling and store the profile.
+
+        Returns:
+            dict with profile_id, duration_ms and the hot_functions
+        """
+        duration_ms = (time.perf_counter() - self._start) * 1000
+        self.stop()
+        stats = pstats.Stats(self._profile)
+        for path in self._worker_paths:
+            if os.path.exists(path):
+                stats.add(path)
+        self._remove_worker_profiles()
+
+        return {
+            "profile_id": self.store.save(stats),
+            "duration_ms": round(duration_ms, 3),
+            "hot_functions": hot_functions(stats, self.top_functions)
+        }
+
+    def stop(self) -> None:
+        """
+        Stop profiling without storing the profile. Safe to call more than
+        once.
+        """
+        if self._running:
+            self._profile.disable()
+            self._running = False
+            RequestProfiler._active.release()
+
+    def discard(self) -> None:
+        self.stop()
+        self._remove_worker_profiles()
+
+    def _remove_worker_profiles(self) -> None:
+        for path in self._worker_paths:
+            try:
+                os.unlink(path)
+            except OSError:
+                pass
+        self._worker_paths = []
+
+
+profile_store = ProfileStore(
+    directory=settings.profile_dir,
+    max_profiles=settings.profile_max_count,
+    ttl_seconds=settings.profile_ttl_seconds
+)
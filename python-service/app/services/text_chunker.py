@@ -1,5 +1,129 @@
-from typing import List, Tuple
-from app.models.schemas import TextChunk, ChunkMetadata
+import re
+from bisect import bisect_left, bisect_right
+from typing import Iterable, Iterator, List, Optional, Sequence, Set, Tuple
+from app.models.schemas import ChunkFingerprint, ChunkMetadata, TextChunk
+from app.services.tokenizers import Tokenizer, RegexTokenizer
+
+# Units chunk_size and chunk_overlap can be measured in
+CHUNK_UNITS = ("characters", "tokens")
+
+# How chunk windows are placed: a sliding window over the text, or packing
+# whole layout elements (titles, list items, tables, paragraphs)
+CHUNK_STRATEGIES = ("sliding", "layout")
+
+
+class ChunkRecord:
+    """
+    Lightweight chunk built inside the chunking loops.
+
+    Creating pydantic models per chunk costs more than finding the chunk,
+    so chunkers produce these and callers convert them with to_model()
+    only where a TextChunk is needed. fingerprint is filled in afterwards
+    by a ChunkDeduplicator, if at all.
+    """
+
+    __slots__ = (
+        "index",
+        "content",
+        "start_char",
+        "end_char",
+        "page_numbers",
+        "has_overlap_with_previous",
+        "has_overlap_with_next",
+        "element_categories",
+        "fingerprint"
+    )
+
+    def __init__(
+        self,
+        index: int,
+        content: str,
+        start_char: int,
+        end_char: int,
+        page_numbers: List[int],
+        has_overlap_with_previous: bool,
+        has_overlap_with_next: bool,
+        element_categories: Sequence[str] = ()
+    ):
+        self.index = index
+        self.content = content
+        self.start_char = start_char
+        self.end_char = end_char
+        self.page_numbers = page_numbers
+        self.has_overlap_with_previous = has_overlap_with_previous
+        self.has_overlap_with_next = has_overlap_with_next
+        self.element_categories = element_categories
+        self.fingerprint: Optional[dict] = None
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, ChunkRecord):
+            return NotImplemented
+        return all(getattr(self, name) == getattr(other, name) for name in self.__slots__)
+
+    def __repr__(self) -> str:
+        return f"ChunkRecord(index={self.index}, start_char={self.start_char}, end_char={self.end_char})"
+
+    def to_model(self) -> TextChunk:
+        """
+        Convert to a TextChunk without re-validating the fields.
+        """
+        return TextChunk.model_construct(
+            index=self.index,
+            content=self.content,
+            start_char=self.start_char,
+            end_char=self.end_char,
+            page_numbers=self.page_numbers,
+            element_categories=list(self.element_categories),
+            fingerprint=ChunkFingerprint.model_construct(**self.fingerprint) if self.fingerprint else None,
+            metadata=ChunkMetadata.model_construct(
+                has_overlap_with_previous=self.has_overlap_with_previous,
+                has_overlap_with_next=self.has_overlap_with_next
+            )
+        )
+
+    def to_dict(self) -> dict:
+        """
+        Same as to_model().model_dump(), without building the model.
+        """
+        return {
+            "index": self.index,
+            "content": self.content,
+            "start_char": self.start_char,
+            "end_char": self.end_char,
+            "page_numbers": self.page_numbers,
+            "element_categories": list(self.element_categories),
+            "fingerprint": self.fingerprint,
+            "metadata": {
+                "has_overlap_with_previous": self.has_overlap_with_previous,
+                "has_overlap_with_next": self.has_overlap_with_next
+            }
+        }
+
+
+class ChunkDiff:
+    """
+    Compares the chunks of a new version of a document, as they are
+    produced, with the chunk texts of its previous version.
+
+    changed lists the indexes of chunks whose text the previous version
+    did not have, i.e. the chunks to re-embed; removed counts the previous
+    version's chunk texts that are gone.
+    """
+
+    def __init__(self, previous_texts: Iterable[str]):
+        self._previous = set(previous_texts)
+        self._current: Set[str] = set()
+        self.changed: List[int] = []
+
+    def add(self, records: Sequence[ChunkRecord]) -> None:
+        for record in records:
+            self._current.add(record.content)
+            if record.content not in self._previous:
+                self.changed.append(record.index)
+
+    @property
+    def removed(self) -> int:
+        return len(self._previous - self._current)
 
 
 class TextChunker:
@@ -9,12 +133,29 @@ class TextChunker:
 
     SENTENCE_ENDINGS = (". ", "? ", "! ", ".\n", "?\n", "!\n")
 
+    # Matches any of SENTENCE_ENDINGS; matches cannot overlap
+    SENTENCE_ENDING_PATTERN = re.compile(r"[.?!][ \n]")
+
+    # Whether chunks can be produced page by page with incremental()
+    supports_incremental = True
+
     def __init__(self, chunk_size: int = 1000, chunk_overlap: int = 200):
         if chunk_overlap >= chunk_size:
             raise ValueError("chunk_overlap must be less than chunk_size")
         self.chunk_size = chunk_size
         self.chunk_overlap = chunk_overlap
 
+    def params(self) -> dict:
+        """
+        Settings that determine the chunks produced, e.g. for cache keys.
+        """
+        return {
+            "chunk_size": self.chunk_size,
+            "chunk_overlap": self.chunk_overlap,
+            "chunk_unit": "characters",
+            "chunk_strategy": "sliding"
+        }
+
     def find_sentence_boundary(self, text: str, target_pos: int, search_range: int = 100) -> int:
         """
         Find the nearest sentence boundary near target_pos.
@@ -50,70 +191,134 @@ class TextChunker:
         Returns:
             List of TextChunk objects
         """
+        return [record.to_model() for record in self.chunk_records(text, page_boundaries)]
+
+    def chunk_records(
+        self,
+        text: str,
+        page_boundaries: List[Tuple[int, int]] = None
+    ) -> List[ChunkRecord]:
+        """
+        Same as chunk_text, returning lightweight ChunkRecords.
+        """
         if not text or not text.strip():
             return []
 
-        chunks = []
-        text_length = len(text)
-        start = 0
-        index = 0
+        return [record for record, _ in self.iter_records(text, page_boundaries)]
+
+    def chunk_extraction(self, extraction_result: dict) -> List[ChunkRecord]:
+        """
+        Chunk the result of PDFExtractor.extract.
+        """
+        return self.chunk_records(extraction_result["text"], extraction_result["page_boundaries"])
+
+    def iter_chunks(
+        self,
+        text: str,
+        page_boundaries: List[Tuple[int, int]] = None,
+        start: int = 0,
+        index: int = 0,
+        final: bool = True,
+        text_offset: int = 0
+    ) -> Iterator[Tuple[TextChunk, int]]:
+        """
+        Same as iter_records, yielding TextChunks.
+        """
+        for record, next_start in self.iter_records(text, page_boundaries, start, index, final, text_offset):
+            yield record.to_model(), next_start
+
+    def iter_records(
+        self,
+        text: str,
+        page_boundaries: List[Tuple[int, int]] = None,
+        start: int = 0,
+        index: int = 0,
+        final: bool = True,
+        text_offset: int = 0
+    ) -> Iterator[Tuple[ChunkRecord, int]]:
+        """
+        Lazily split text into overlapping chunks, resumable from a position.
+
+        Args:
+            text: The text to chunk (may be a prefix of a longer document)
+            page_boundaries: Optional list of (start_char, end_char) tuples for each page
+            start: Character offset of the next chunk's start
+            index: Index of the next chunk
+            final: Whether text is complete. If False, chunks that could
+                still change once more text is appended are not produced.
+            text_offset: Document offset of text[0], when text is a suffix
+                of the document starting at or before start
+
+        Yields:
+            (ChunkRecord, next_start) tuples, where next_start is the start
+            position to resume from after this chunk
+        """
+        text_length = text_offset + len(text)
+
+        # One scan for sentence endings and one pass over the pages up front,
+        # so each chunk only needs binary searches
+        break_points = self._sentence_break_points(text)
+        page_index = _PageIndex(page_boundaries)
 
         while start < text_length:
+            # A chunk whose window reaches the end of incomplete text is not settled
+            if not final and start + self.chunk_size >= text_length:
+                return
+
             # Calculate end position
             end = min(start + self.chunk_size, text_length)
 
             # Try to break at sentence boundary if not at the end
             if end < text_length:
                 # Look for sentence boundary near the end
-                boundary = self._find_best_break_point(text, end)
+                boundary = text_offset + self._find_best_break_point(break_points, end - text_offset)
                 if boundary > start:
                     end = boundary
 
-            # Extract chunk content
-            content = text[start:end]
-
-            # Determine page numbers for this chunk
-            page_numbers = self._get_page_numbers(start, end, page_boundaries)
-
-            # Create metadata
-            metadata = ChunkMetadata(
-                has_overlap_with_previous=index > 0,
-                has_overlap_with_next=end < text_length
+            chunk = ChunkRecord(
+                index,
+                text[start - text_offset:end - text_offset],
+                start,
+                end,
+                page_index.page_numbers(start, end),
+                index > 0,
+                end < text_length
             )
 
-            chunks.append(TextChunk(
-                index=index,
-                content=content,
-                start_char=start,
-                end_char=end,
-                page_numbers=page_numbers,
-                metadata=metadata
-            ))
-
-            # Move start position with overlap
-            start = end - self.chunk_overlap if end < text_length else text_length
+            # Move start position with overlap, always advancing: an early
+            # sentence break can leave end - chunk_overlap at or before start
+            start = max(end - self.chunk_overlap, start + 1) if end < text_length else text_length
             index += 1
 
-        return chunks
+            yield chunk, start
+
+    def incremental(self, records: bool = False) -> "IncrementalChunker":
+        """
+        Create a page-fed chunker with the same settings.
+        """
+        return IncrementalChunker(self, records=records)
 
-    def _find_best_break_point(self, text: str, target_pos: int) -> int:
+    def _sentence_break_points(self, text: str) -> List[int]:
+        """
+        Positions just after each sentence ending in text, in order.
+        """
+        return [match.end() for match in self.SENTENCE_ENDING_PATTERN.finditer(text)]
+
+    def _find_best_break_point(self, break_points: List[int], target_pos: int) -> int:
         """
         Find the best break point near target_pos, preferring sentence boundaries.
+
+        Returns the position after the last sentence ending that lies within
+        the min(100, chunk_overlap) characters before target_pos, or
+        target_pos if there is none.
         """
         search_range = min(100, self.chunk_overlap)
         search_start = max(0, target_pos - search_range)
-        search_text = text[search_start:target_pos]
 
-        best_pos = -1
-        for ending in self.SENTENCE_ENDINGS:
-            pos = search_text.rfind(ending)
-            if pos > best_pos:
-                best_pos = pos
-                best_ending = ending
-
-        if best_pos != -1:
-            # Return position after the sentence ending
-            return search_start + best_pos + len(best_ending)
+        # Last break point whose ending fits entirely before target_pos
+        i = bisect_right(break_points, target_pos) - 1
+        if i >= 0 and break_points[i] - 2 >= search_start:
+            return break_points[i]
 
         return target_pos
 
@@ -126,13 +331,357 @@ class TextChunker:
         """
         Determine which pages a chunk spans based on character positions.
         """
-        if not page_boundaries:
+        return _PageIndex(page_boundaries).page_numbers(start, end)
+
+
+class TokenTextChunker(TextChunker):
+    """
+    Sliding window chunker whose chunk_size and chunk_overlap are token
+    counts, with sentence-aware breaking at token boundaries.
+
+    Text is tokenized once per call, from the next chunk's start, and
+    windows are measured by indexing into the token offsets, so no window
+    is re-tokenized. Chunk offsets are still character offsets.
+    """
+
+    def __init__(self, chunk_size: int = 256, chunk_overlap: int = 32, tokenizer: Optional[Tokenizer] = None):
+        super().__init__(chunk_size=chunk_size, chunk_overlap=chunk_overlap)
+        self.tokenizer = tokenizer or RegexTokenizer()
+
+    def params(self) -> dict:
+        return {**super().params(), "chunk_unit": "tokens", "tokenizer": self.tokenizer.name}
+
+    def iter_records(
+        self,
+        text: str,
+        page_boundaries: List[Tuple[int, int]] = None,
+        start: int = 0,
+        index: int = 0,
+        final: bool = True,
+        text_offset: int = 0
+    ) -> Iterator[Tuple[ChunkRecord, int]]:
+        """
+        Same as TextChunker.iter_records, with chunk_size and chunk_overlap
+        in tokens. start must be 0 or a position yielded as next_start.
+        """
+        text_length = text_offset + len(text)
+        if start >= text_length:
+            return
+
+        relative_start = start - text_offset
+        token_starts = [relative_start + offset for offset in self.tokenizer.token_starts(text[relative_start:])]
+        token_count = len(token_starts)
+
+        # Token boundaries directly after a sentence ending
+        break_positions = {position - 1 for position in self._sentence_break_points(text)}
+        break_tokens = [i for i in range(1, token_count) if token_starts[i] in break_positions]
+
+        page_index = _PageIndex(page_boundaries)
+        search_range = min(100, self.chunk_overlap)
+        token = 0
+
+        while token < token_count:
+            # The last token can still grow while text is incomplete
+            if not final and token + self.chunk_size >= token_count:
+                return
+
+            end_token = min(token + self.chunk_size, token_count)
+
+            # Try to break after a sentence ending if not at the end
+            if end_token < token_count:
+                i = bisect_right(break_tokens, end_token) - 1
+                if i >= 0 and break_tokens[i] > token and break_tokens[i] >= end_token - search_range:
+                    end_token = break_tokens[i]
+
+            chunk_start = text_offset + (token_starts[token] if token else relative_start)
+            end = text_offset + token_starts[end_token] if end_token < token_count else text_length
+
+            chunk = ChunkRecord(
+                index,
+                text[chunk_start - text_offset:end - text_offset],
+                chunk_start,
+                end,
+                page_index.page_numbers(chunk_start, end),
+                index > 0,
+                end < text_length
+            )
+
+            # Move start position with overlap, always advancing
+            if end_token < token_count:
+                token = max(end_token - self.chunk_overlap, token + 1)
+                next_start = text_offset + token_starts[token]
+            else:
+                token = token_count
+                next_start = text_length
+            index += 1
+
+            yield chunk, next_start
+
+
+class LayoutChunker(TextChunker):
+    """
+    Chunker that packs whole layout elements into each chunk, so titles,
+    list items and table rows are not cut in half.
+
+    Elements longer than chunk_size are split with the sliding window.
+    Consecutive chunks share the trailing elements that fit within
+    chunk_overlap. Without element offsets it falls back to the sliding
+    window over the whole text.
+    """
+
+    # Element offsets are only known once the whole document is extracted
+    supports_incremental = False
+
+    def params(self) -> dict:
+        return {**super().params(), "chunk_strategy": "layout"}
+
+    def chunk_extraction(self, extraction_result: dict) -> List[ChunkRecord]:
+        elements = extraction_result.get("elements")
+        if not elements:
+            return super().chunk_extraction(extraction_result)
+        return self.element_records(extraction_result["text"], elements, extraction_result["page_boundaries"])
+
+    def chunk_elements(
+        self,
+        text: str,
+        elements: List[dict],
+        page_boundaries: List[Tuple[int, int]] = None
+    ) -> List[TextChunk]:
+        """
+        Split text into chunks made of whole elements.
+
+        Args:
+            text: The full text to chunk
+            elements: Dicts with start, end and category, as produced by
+                PDFExtractor.assemble_result
+            page_boundaries: Optional list of (start_char, end_char) tuples for each page
+
+        Returns:
+            List of TextChunk objects
+        """
+        return [record.to_model() for record in self.element_records(text, elements, page_boundaries)]
+
+    def element_records(
+        self,
+        text: str,
+        elements: List[dict],
+        page_boundaries: List[Tuple[int, int]] = None
+    ) -> List[ChunkRecord]:
+        """
+        Same as chunk_elements, returning lightweight ChunkRecords.
+        """
+        pieces = self._pieces(text, elements)
+        if not pieces:
+            return []
+
+        # (first piece, last piece + 1) of each chunk
+        windows: List[Tuple[int, int]] = []
+        first = 0
+        while first < len(pieces):
+            chunk_start = pieces[first][0]
+            last = first + 1
+            while last < len(pieces) and pieces[last][1] - chunk_start <= self.chunk_size:
+                last += 1
+            windows.append((first, last))
+
+            if last == len(pieces):
+                break
+
+            # Overlap with the trailing elements that fit in chunk_overlap,
+            # as long as the next element still fits after them
+            next_first = last
+            while (
+                next_first - 1 > first
+                and pieces[last - 1][1] - pieces[next_first - 1][0] <= self.chunk_overlap
+                and pieces[last][1] - pieces[next_first - 1][0] <= self.chunk_size
+            ):
+                next_first -= 1
+            first = next_first
+
+        page_index = _PageIndex(page_boundaries)
+        chunks = []
+        for index, (first, last) in enumerate(windows):
+            start = pieces[first][0]
+            end = pieces[last - 1][1]
+            categories: List[str] = []
+            for _, _, category in pieces[first:last]:
+                if category not in categories:
+                    categories.append(category)
+
+            chunks.append(ChunkRecord(
+                index,
+                text[start:end],
+                start,
+                end,
+                page_index.page_numbers(start, end),
+                index > 0 and first < windows[index - 1][1],
+                index + 1 < len(windows) and windows[index + 1][0] < last,
+                categories
+            ))
+        return chunks
+
+    def _pieces(self, text: str, elements: List[dict]) -> List[Tuple[int, int, str]]:
+        """
+        (start, end, category) of each element, with elements longer than
+        chunk_size split into sliding window pieces.
+        """
+        pieces = []
+        for element in sorted(elements, key=lambda element: element["start"]):
+            start, end, category = element["start"], element["end"], element["category"]
+            if not text[start:end].strip():
+                continue
+            if end - start <= self.chunk_size:
+                pieces.append((start, end, category))
+                continue
+
+            splitter = TextChunker(chunk_size=self.chunk_size, chunk_overlap=self.chunk_overlap)
+            for chunk, _ in splitter.iter_records(text[start:end], start=start, text_offset=start):
+                pieces.append((chunk.start_char, chunk.end_char, category))
+        return pieces
+
+
+class _PageIndex:
+    """
+    Page lookup by character range using binary search over page offsets.
+
+    Boundaries produced by the extractors are contiguous and ordered; other
+    boundary lists fall back to a linear scan.
+    """
+
+    def __init__(self, page_boundaries: Optional[List[Tuple[int, int]]]):
+        self.page_boundaries = page_boundaries or []
+        self.starts = [page_start for page_start, _ in self.page_boundaries]
+        self.ends = [page_end for _, page_end in self.page_boundaries]
+        self.ordered = all(
+            self.starts[i] <= self.starts[i + 1] and self.ends[i] <= self.ends[i + 1]
+            for i in range(len(self.page_boundaries) - 1)
+        )
+
+    def page_numbers(self, start: int, end: int) -> List[int]:
+        """
+        1-based numbers of the pages overlapping [start, end), or [1].
+        """
+        if not self.page_boundaries:
             return [1]
 
-        pages = []
-        for page_num, (page_start, page_end) in enumerate(page_boundaries, start=1):
-            # Check if chunk overlaps with this page
-            if start < page_end and end > page_start:
-                pages.append(page_num)
+        if self.ordered:
+            # Pages overlap the chunk iff page_end > start and page_start < end
+            first = bisect_right(self.ends, start)
+            last = bisect_left(self.starts, end)
+            pages = list(range(first + 1, last + 1))
+        else:
+            pages = [
+                page_num
+                for page_num, (page_start, page_end) in enumerate(self.page_boundaries, start=1)
+                if start < page_end and end > page_start
+            ]
 
         return pages if pages else [1]
+
+
+class IncrementalChunker:
+    """
+    Page-fed variant of TextChunker.chunk_text.
+
+    Pages (or raw text fragments) are added one at a time and finished
+    chunks are returned as soon as no later input can change them. Only
+    the text from the next chunk's start onwards is kept in memory. The
+    chunks produced are identical to chunk_text on the assembled document.
+
+    With records=True, ChunkRecords are returned instead of TextChunks.
+    """
+
+    def __init__(self, chunker: TextChunker, records: bool = False):
+        self.chunker = chunker
+        self.records = records
+        self.page_boundaries: List[Tuple[int, int]] = []
+        self._buffer = ""
+        self._buffer_offset = 0
+        self._text_length = 0
+        self._page_position = 0
+        self._has_content = False
+        self._next_start = 0
+        self._next_index = 0
+        self._finished = False
+
+    @property
+    def text_length(self) -> int:
+        """
+        Length of the document assembled so far.
+        """
+        return self._text_length
+
+    @property
+    def buffered_length(self) -> int:
+        """
+        Number of characters currently held in memory.
+        """
+        return len(self._buffer)
+
+    def add_page(self, page_text: str) -> List[TextChunk]:
+        """
+        Append a page using the extractor's convention: non-empty pages are
+        joined with a newline and each page's boundary includes it.
+
+        Returns:
+            Chunks finished by this page
+        """
+        page_start = self._page_position
+        if page_text:
+            self._append(f"\n{page_text}" if self._text_length else page_text)
+            self._page_position += len(page_text) + 1  # +1 for newline
+        self.page_boundaries.append((page_start, self._page_position))
+        return self._drain(final=False)
+
+    def add_text(self, fragment: str) -> List[TextChunk]:
+        """
+        Append a raw text fragment verbatim. Fragments are not tracked in
+        page_boundaries, so use either add_text or add_page for a document.
+
+        Returns:
+            Chunks finished by this fragment
+        """
+        self._append(fragment)
+        return self._drain(final=False)
+
+    def finish(self) -> List[TextChunk]:
+        """
+        Mark the document as complete and return the remaining chunks.
+        """
+        chunks = self._drain(final=True)
+        self._finished = True
+        return chunks
+
+    def _append(self, fragment: str) -> None:
+        if self._finished:
+            raise ValueError("cannot add text after finish()")
+        self._buffer += fragment
+        self._text_length += len(fragment)
+        if not self._has_content and fragment.strip():
+            self._has_content = True
+
+    def _drain(self, final: bool) -> List[TextChunk]:
+        """
+        Produce every settled chunk and drop text no later chunk needs.
+        """
+        # Whitespace-only documents produce no chunks at all
+        if not self._has_content:
+            return []
+
+        chunks = []
+        for chunk, self._next_start in self.chunker.iter_records(
+            self._buffer,
+            self.page_boundaries,
+            start=self._next_start,
+            index=self._next_index,
+            final=final,
+            text_offset=self._buffer_offset
+        ):
+            chunks.append(chunk if self.records else chunk.to_model())
+            self._next_index += 1
+
+        if self._next_start > self._buffer_offset:
+            self._buffer = self._buffer[self._next_start - self._buffer_offset:]
+            self._buffer_offset = self._next_start
+
+        return chunks
@@ -0,0 +1,90 @@
+import re
+from typing import Callable, Dict, List
+
+
+class Tokenizer:
+    """
+    Splits text into tokens for token-budgeted chunking.
+
+    Tokens partition the text: token i covers the characters from its
+    start offset up to the next token's start (or the end of the text), so
+    any token range maps back to exact character offsets.
+    """
+
+    name = ""
+
+    def token_starts(self, text: str) -> List[int]:
+        """
+        Character offset at which each token starts, in increasing order.
+        """
+        raise NotImplementedError
+
+
+class RegexTokenizer(Tokenizer):
+    """
+    Dependency-free approximation of a BPE tokenizer: each word, number or
+    punctuation mark is one token, together with the whitespace before it.
+
+    Tokenizing from any token start gives the same tokens as tokenizing the
+    whole text, so text can be tokenized a piece at a time.
+    """
+
+    name = "regex"
+
+    PATTERN = re.compile(r"\s*(?:\w+|[^\w\s])")
+
+    def token_starts(self, text: str) -> List[int]:
+        return [match.start() for match in self.PATTERN.finditer(text)]
+
+
+class TiktokenTokenizer(Tokenizer):
+    """
+    Tokenizer backed by a tiktoken encoding, e.g. cl100k_base.
+
+    Requires the optional tiktoken package.
+    """
+
+    def __init__(self, encoding_name: str = "cl100k_base"):
+        try:
+            import tiktoken
+        except ImportError as e:
+            raise ValueError("the tiktoken tokenizer requires the tiktoken package") from e
+
+        self.name = f"tiktoken:{encoding_name}"
+        self.encoding = tiktoken.get_encoding(encoding_name)
+
+    def token_starts(self, text: str) -> List[int]:
+        tokens = self.encoding.encode(text, disallowed_special=())
+        _, offsets = self.encoding.decode_with_offsets(tokens)
+
+        # Tokens splitting a multi-byte character can report the same or an
+        # earlier offset; keep only offsets that move forward
+        starts: List[int] = []
+        for offset in offsets:
+            if not starts or offset > starts[-1]:
+                starts.append(offset)
+        return starts
+
+
+_TOKENIZERS: Dict[str, Callable[[str], Tokenizer]] = {
+    "regex": lambda _: RegexTokenizer(),
+    "tiktoken": lambda encoding_name: TiktokenTokenizer(encoding_name or "cl100k_base")
+}
+
+
+def register_tokenizer(name: str, factory: Callable[[str], Tokenizer]) -> None:
+    """
+    Make a tokenizer available to get_tokenizer. factory receives the part
+    of the spec after the colon, or an empty string.
+    """
+    _TOKENIZERS[name] = factory
+
+
+def get_tokenizer(spec: str) -> Tokenizer:
+    """
+    Create a tokenizer from a spec such as "regex" or "tiktoken:cl100k_base".
+    """
+    name, _, argument = spec.partition(":")
+    if name not in _TOKENIZERS:
+        raise ValueError(f"tokenizer must be one of: {', '.join(_TOKENIZERS)}")
+    return _TOKENIZERS[name](argument)
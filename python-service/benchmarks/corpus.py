@@ -0,0 +1,145 @@
+"""
+Synthetic corpora for the benchmark suite.
+
+Everything is generated offline from a seed, so runs on different machines
+measure the same documents.
+"""
+import io
+import random
+from typing import List
+
+from PIL import Image, ImageDraw, ImageFont
+
+WORDS = (
+    "agenda minutes motion carried seconded budget review council committee "
+    "member chair report approved deferred item action quarter planning "
+    "resolution vote public comment treasurer secretary adjourned meeting"
+).split()
+
+# Lines per page and characters per line of generated documents, close to a
+# typed page of minutes
+LINES_PER_PAGE = 40
+LINE_LENGTH = 80
+
+
+def sentences(rng: random.Random) -> str:
+    """
+    One random sentence of meeting-minutes vocabulary.
+    """
+    words = [rng.choice(WORDS) for _ in range(rng.randint(4, 16))]
+    words[0] = words[0].capitalize()
+    return " ".join(words) + rng.choice([". ", ". ", ". ", "? ", "! "])
+
+
+def text_corpus(size_bytes: int, seed: int = 0) -> str:
+    """
+    Text of exactly size_bytes ASCII characters, in paragraphs of sentences.
+    """
+    rng = random.Random(seed)
+    parts: List[str] = []
+    length = 0
+    while length < size_bytes:
+        paragraph = "".join(sentences(rng) for _ in range(rng.randint(2, 8))).strip() + "\n\n"
+        parts.append(paragraph)
+        length += len(paragraph)
+    return "".join(parts)[:size_bytes]
+
+
+def page_texts(pages: int, seed: int = 0) -> List[str]:
+    """
+    Text of each page of a generated document: LINES_PER_PAGE lines of
+    sentences wrapped at LINE_LENGTH characters.
+    """
+    rng = random.Random(seed)
+    texts = []
+    for _ in range(pages):
+        lines: List[str] = []
+        line = ""
+        while len(lines) < LINES_PER_PAGE:
+            for word in sentences(rng).split():
+                if line and len(line) + 1 + len(word) > LINE_LENGTH:
+                    lines.append(line)
+                    line = ""
+                line = f"{line} {word}" if line else word
+        texts.append("\n".join(lines[:LINES_PER_PAGE]))
+    return texts
+
+
+def build_pdf(pages: List[str]) -> bytes:
+    """
+    Build a minimal born-digital PDF with one Helvetica text page per entry.
+    Lines within a page are separated by newlines; an empty string yields a
+    page without a text layer.
+    """
+    objects = []
+
+    def add(body: bytes) -> int:
+        objects.append(body)
+        return len(objects)
+
+    font_id = add(b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>")
+    pages_id = len(objects) + 2 * len(pages) + 1
+
+    page_ids = []
+    for page_text in pages:
+        operators = [b"BT /F1 12 Tf 14 TL 72 720 Td"]
+        for line in page_text.split("\n") if page_text else []:
+            escaped = line.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+            operators.append(b"(" + escaped.encode("latin-1") + b") Tj T*")
+        operators.append(b"ET")
+        stream = b"\n".join(operators)
+
+        content_id = add(b"<< /Length %d >>\nstream\n%s\nendstream" % (len(stream), stream))
+        page_ids.append(add(
+            b"<< /Type /Page /Parent %d 0 R /MediaBox [0 0 612 792] "
+            b"/Resources << /Font << /F1 %d 0 R >> >> /Contents %d 0 R >>"
+            % (pages_id, font_id, content_id)
+        ))
+
+    kids = b" ".join(b"%d 0 R" % page_id for page_id in page_ids)
+    add(b"<< /Type /Pages /Kids [%s] /Count %d >>" % (kids, len(page_ids)))
+    catalog_id = add(b"<< /Type /Catalog /Pages %d 0 R >>" % pages_id)
+
+    output = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for object_id, body in enumerate(objects, start=1):
+        offsets.append(len(output))
+        output += b"%d 0 obj\n%s\nendobj\n" % (object_id, body)
+
+    xref_offset = len(output)
+    output += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    for offset in offsets:
+        output += b"%010d 00000 n \n" % offset
+    output += b"trailer\n<< /Size %d /Root %d 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (
+        len(objects) + 1, catalog_id, xref_offset
+    )
+    return bytes(output)
+
+
+def born_digital_pdf(pages: int, seed: int = 0) -> bytes:
+    """
+    PDF with a text layer on every page.
+    """
+    return build_pdf(page_texts(pages, seed))
+
+
+def scanned_pdf(pages: int, seed: int = 0, dpi: int = 150) -> bytes:
+    """
+    PDF of page images without a text layer, like a scanner produces.
+    """
+    try:
+        font = ImageFont.load_default(size=dpi // 6)
+    except TypeError:
+        # Pillow without FreeType only has the small bitmap font
+        font = ImageFont.load_default()
+
+    images = []
+    for page_text in page_texts(pages, seed):
+        image = Image.new("L", (int(8.5 * dpi), 11 * dpi), color=255)
+        draw = ImageDraw.Draw(image)
+        draw.multiline_text((dpi // 2, dpi // 2), page_text, fill=0, font=font, spacing=dpi // 20)
+        images.append(image)
+
+    output = io.BytesIO()
+    images[0].save(output, "PDF", save_all=True, append_images=images[1:], resolution=dpi)
+    return output.getvalue()
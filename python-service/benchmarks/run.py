@@ -0,0 +1,279 @@
+"""
+Benchmark suite for chunking, extraction and the /extract-pdf endpoint.
+
+Each case runs in its own process so its peak RSS is measured separately.
+Results are written as JSON and can be compared against a stored baseline:
+
+    python -m benchmarks.run --suite quick --output results.json
+    python -m benchmarks.run --baseline benchmarks/baseline.json --threshold 0.2
+    python -m benchmarks.run --save-baseline benchmarks/baseline.json
+"""
+import argparse
+import json
+import math
+import multiprocessing
+import os
+import platform
+import resource
+import sys
+import time
+from typing import Callable, Dict, List, Optional, Tuple
+
+from benchmarks.corpus import born_digital_pdf, scanned_pdf, text_corpus
+
+KB = 1024
+MB = 1024 * 1024
+
+SUITES = {
+    "quick": {
+        "repeats": 3,
+        "text_sizes": [10 * KB, 100 * KB, 1 * MB],
+        "born_digital_pages": [1, 10, 100],
+        "scanned_pages": [1, 10],
+        "endpoint_pages": [10]
+    },
+    "full": {
+        "repeats": 5,
+        "text_sizes": [10 * KB, 100 * KB, 1 * MB, 10 * MB],
+        "born_digital_pages": [1, 10, 100, 500],
+        "scanned_pages": [1, 10, 100, 500],
+        "endpoint_pages": [10, 100, 500]
+    }
+}
+
+# A case prepares its input and returns the work to time, the amount of
+# input it processes and the unit of that amount
+Prepared = Tuple[Callable[[], None], float, str]
+
+
+def _size_label(size_bytes: int) -> str:
+    return f"{size_bytes // MB}mb" if size_bytes >= MB else f"{size_bytes // KB}kb"
+
+
+def _chunk_text_case(size_bytes: int) -> Prepared:
+    from app.services.text_chunker import TextChunker
+
+    text = text_corpus(size_bytes)
+    chunker = TextChunker(chunk_size=1000, chunk_overlap=200)
+    return lambda: chunker.chunk_records(text), size_bytes / MB, "MB"
+
+
+def _extract_case(pdf: bytes, pages: int, mode: str) -> Prepared:
+    from app.services.pdf_extractor import PDFExtractor
+
+    # Includes writing the temporary file, as the endpoint does
+    extractor = PDFExtractor(mode=mode)
+    return lambda: extractor.extract_from_bytes(pdf, "benchmark.pdf"), pages, "pages"
+
+
+def _endpoint_case(pages: int) -> Prepared:
+    from fastapi.testclient import TestClient
+
+    from app.api.routes import extraction
+    from app.main import app
+    from app.services.extraction_cache import ExtractionCache
+
+    # Every request must extract, not hit the cache
+    extraction.extraction_cache = ExtractionCache(cache_dir=None, enabled=False)
+    client = TestClient(app)
+    pdf = born_digital_pdf(pages)
+
+    def work() -> None:
+        response = client.post(
+            "/extract-pdf",
+            files={"file": ("benchmark.pdf", pdf, "application/pdf")},
+            data={"extraction_mode": "fast"}
+        )
+        if response.status_code != 200:
+            raise RuntimeError(f"/extract-pdf returned {response.status_code}: {response.text}")
+
+    return work, pages, "pages"
+
+
+def build_cases(suite: dict) -> Dict[str, Callable[[], Prepared]]:
+    """
+    Case name -> function preparing the case, for every case of a suite.
+    """
+    cases: Dict[str, Callable[[], Prepared]] = {}
+    for size in suite["text_sizes"]:
+        cases[f"chunk_text/{_size_label(size)}"] = lambda size=size: _chunk_text_case(size)
+    for pages in suite["born_digital_pages"]:
+        cases[f"extract/fast/born_digital/{pages}p"] = (
+            lambda pages=pages: _extract_case(born_digital_pdf(pages), pages, "fast")
+        )
+    for pages in suite["scanned_pages"]:
+        cases[f"extract/ocr/scanned/{pages}p"] = (
+            lambda pages=pages: _extract_case(scanned_pdf(pages), pages, "ocr")
+        )
+    for pages in suite["endpoint_pages"]:
+        cases[f"endpoint/extract_pdf/{pages}p"] = lambda pages=pages: _endpoint_case(pages)
+    return cases
+
+
+def percentile(values: List[float], q: float) -> float:
+    """
+    Nearest-rank percentile of values, q in [0, 100].
+    """
+    ordered = sorted(values)
+    rank = max(1, math.ceil(q / 100 * len(ordered)))
+    return ordered[rank - 1]
+
+
+def _measure(prepare: Callable[[], Prepared], repeats: int) -> dict:
+    work, amount, unit = prepare()
+    work()  # warm-up run, not timed
+
+    latencies = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        work()
+        latencies.append(time.perf_counter() - start)
+
+    total = sum(latencies)
+    return {
+        "repeats": repeats,
+        "latency_ms": {
+            "mean": total / repeats * 1000,
+            "p50": percentile(latencies, 50) * 1000,
+            "p95": percentile(latencies, 95) * 1000,
+            "p99": percentile(latencies, 99) * 1000
+        },
+        "throughput": amount * repeats / total if total else math.inf,
+        "throughput_unit": f"{unit}/s"
+    }
+
+
+def _case_process(prepare: Callable[[], Prepared], repeats: int, connection) -> None:
+    try:
+        result = _measure(prepare, repeats)
+    except Exception as e:
+        result = {"error": f"{type(e).__name__}: {e}"}
+
+    # Stop extraction workers started by the case, so they are reaped and
+    # counted below and the process does not wait for them on exit
+    pool_module = sys.modules.get("app.services.extraction_pool")
+    if pool_module is not None:
+        pool_module.extraction_pool.shutdown()
+
+    # ru_maxrss is in kilobytes on Linux; children are OCR subprocesses and
+    # extraction workers
+    result["peak_rss_mb"] = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / KB
+    result["peak_child_rss_mb"] = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss / KB
+    connection.send(result)
+    connection.close()
+
+
+def run_case(prepare: Callable[[], Prepared], repeats: int) -> dict:
+    """
+    Measure one case in a fresh process.
+    """
+    # Cases are closures, so the process must be forked; it is not a daemon
+    # because the endpoint case starts its own worker pool
+    context = multiprocessing.get_context("fork")
+    receiver, sender = context.Pipe(duplex=False)
+    process = context.Process(target=_case_process, args=(prepare, repeats, sender))
+    process.start()
+    sender.close()
+
+    try:
+        result = receiver.recv()
+    except EOFError:
+        result = {"error": "benchmark process died"}
+    process.join()
+    return result
+
+
+def run_suite(suite_name: str, only: Optional[str] = None) -> dict:
+    """
+    Run every case of a suite whose name contains only, if given.
+    """
+    suite = SUITES[suite_name]
+    results = {}
+    for name, prepare in build_cases(suite).items():
+        if only and only not in name:
+            continue
+        print(f"running {name}", file=sys.stderr)
+        results[name] = run_case(prepare, suite["repeats"])
+
+    return {
+        "suite": suite_name,
+        "created_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "cpu_count": os.cpu_count(),
+        "results": results
+    }
+
+
+def compare(current: dict, baseline: dict, threshold: float) -> List[str]:
+    """
+    Regressions of current against baseline: p50 latency or peak RSS more
+    than threshold (a fraction) above the baseline, or throughput more than
+    threshold below it. Cases missing from either run or failed in either
+    are skipped.
+    """
+    regressions = []
+    for name, result in current["results"].items():
+        base = baseline["results"].get(name)
+        if base is None or "error" in base or "error" in result:
+            continue
+
+        p50, base_p50 = result["latency_ms"]["p50"], base["latency_ms"]["p50"]
+        if p50 > base_p50 * (1 + threshold):
+            regressions.append(f"{name}: p50 latency {p50:.1f} ms vs baseline {base_p50:.1f} ms")
+
+        throughput, base_throughput = result["throughput"], base["throughput"]
+        if throughput < base_throughput * (1 - threshold):
+            regressions.append(
+                f"{name}: throughput {throughput:.2f} vs baseline {base_throughput:.2f} {result['throughput_unit']}"
+            )
+
+        rss, base_rss = result["peak_rss_mb"], base["peak_rss_mb"]
+        if rss > base_rss * (1 + threshold):
+            regressions.append(f"{name}: peak RSS {rss:.0f} MB vs baseline {base_rss:.0f} MB")
+    return regressions
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--suite", choices=sorted(SUITES), default="quick")
+    parser.add_argument("--only", help="only run cases whose name contains this")
+    parser.add_argument("--output", help="write results JSON here instead of stdout")
+    parser.add_argument("--baseline", help="baseline results JSON to compare against")
+    parser.add_argument("--threshold", type=float, default=0.2, help="allowed regression, as a fraction")
+    parser.add_argument("--save-baseline", help="also write the results here as the new baseline")
+    args = parser.parse_args(argv)
+
+    # Benchmarks should not warm up unstructured in extraction workers
+    os.environ.setdefault("WARM_UP", "off")
+
+    results = run_suite(args.suite, args.only)
+    body = json.dumps(results, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(body + "\n")
+    else:
+        print(body)
+
+    if args.save_baseline:
+        with open(args.save_baseline, "w") as f:
+            f.write(body + "\n")
+
+    failed = [name for name, result in results["results"].items() if "error" in result]
+    for name in failed:
+        print(f"FAILED {name}: {results['results'][name]['error']}", file=sys.stderr)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline, args.threshold)
+        for regression in regressions:
+            print(f"REGRESSION {regression}", file=sys.stderr)
+        if regressions:
+            return 1
+
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
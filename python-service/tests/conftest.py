@@ -1,7 +1,13 @@
+import os
+
 import pytest
 from fastapi.testclient import TestClient
 
+# Test app startup should not import unstructured in every worker
+os.environ.setdefault("WARM_UP", "off")
+
 from app.main import app
+from benchmarks.corpus import build_pdf
 
 
 @pytest.fixture
@@ -34,3 +40,19 @@ def long_sample_text():
     )
     # Repeat to create text longer than default chunk size
     return paragraph * 10
+
+
+@pytest.fixture
+def sample_pdf_pages():
+    """Page texts for a small born-digital PDF."""
+    return [
+        "Meeting Minutes - Q1 Planning Session\nDate: January 15, 2024",
+        "The team discussed the roadmap for Q1.\nAction items were assigned.",
+        "Next meeting scheduled for January 22, 2024."
+    ]
+
+
+@pytest.fixture
+def sample_pdf(sample_pdf_pages):
+    """Born-digital PDF bytes with a text layer on every page."""
+    return build_pdf(sample_pdf_pages)
@@ -0,0 +1,104 @@
+import asyncio
+
+import pytest
+from app.services.admission import AdmissionController, AdmissionRejected
+
+
+class TestAdmissionController:
+    """Tests for cost-based admission control."""
+
+    def test_init_invalid_values(self):
+        """Test controller rejects non-positive capacity and negative queues."""
+        with pytest.raises(ValueError):
+            AdmissionController(capacity=0)
+        with pytest.raises(ValueError):
+            AdmissionController(max_queue=-1)
+
+    def test_estimate_cost(self):
+        """Test pages likely to be OCRed cost ocr_page_cost each."""
+        controller = AdmissionController(ocr_page_cost=10)
+
+        assert controller.estimate_cost(5, ocr_likely=False) == 5
+        assert controller.estimate_cost(5, ocr_likely=True) == 50
+        assert controller.estimate_cost(None, ocr_likely=False) == 1
+        assert controller.estimate_cost(5, ocr_likely=True, ocr_pages=2) == 23
+
+    @pytest.mark.asyncio
+    async def test_admits_within_capacity(self):
+        """Test requests within capacity are admitted at once and released."""
+        controller = AdmissionController(capacity=10)
+
+        assert await controller.acquire(4) == 4
+        assert await controller.acquire(6) == 6
+        assert controller.stats()["in_use"] == 10
+
+        controller.release(4)
+        controller.release(6)
+        assert controller.stats()["in_use"] == 0
+
+    @pytest.mark.asyncio
+    async def test_waits_in_fifo_order(self):
+        """Test requests over capacity wait and are admitted in arrival order."""
+        controller = AdmissionController(capacity=10)
+        await controller.acquire(10)
+        admitted = []
+
+        async def request(name, cost):
+            await controller.acquire(cost)
+            admitted.append(name)
+
+        tasks = [asyncio.create_task(request("first", 8)), asyncio.create_task(request("second", 1))]
+        await asyncio.sleep(0)
+        assert controller.stats()["queued"] == 2
+
+        # The small request does not overtake the one ahead of it
+        controller.release(2)
+        await asyncio.sleep(0)
+        assert admitted == []
+
+        controller.release(8)
+        await asyncio.gather(*tasks)
+        assert admitted == ["first", "second"]
+        assert controller.stats() == {"capacity": 10, "in_use": 9, "queued": 0}
+
+    @pytest.mark.asyncio
+    async def test_oversized_request_runs_alone(self):
+        """Test a request costing more than capacity is admitted once nothing else runs."""
+        controller = AdmissionController(capacity=10)
+        await controller.acquire(1)
+
+        task = asyncio.create_task(controller.acquire(500))
+        await asyncio.sleep(0)
+        assert not task.done()
+
+        controller.release(1)
+        assert await task == 10
+
+    @pytest.mark.asyncio
+    async def test_rejects_when_queue_full(self):
+        """Test requests are rejected at once with retry_after once the queue is full."""
+        controller = AdmissionController(capacity=1, max_queue=1, retry_after_seconds=7)
+        await controller.acquire(1)
+        waiting = asyncio.create_task(controller.acquire(1))
+        await asyncio.sleep(0)
+
+        with pytest.raises(AdmissionRejected) as excinfo:
+            await controller.acquire(1)
+        assert excinfo.value.reason == "queue_full"
+        assert excinfo.value.retry_after == 7
+
+        waiting.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await waiting
+        assert controller.stats()["queued"] == 0
+
+    @pytest.mark.asyncio
+    async def test_rejects_after_deadline(self):
+        """Test a request waiting longer than queue_timeout_seconds is rejected and leaves the queue."""
+        controller = AdmissionController(capacity=1, queue_timeout_seconds=0.05)
+        await controller.acquire(1)
+
+        with pytest.raises(AdmissionRejected) as excinfo:
+            await controller.acquire(1)
+        assert excinfo.value.reason == "timeout"
+        assert controller.stats() == {"capacity": 1, "in_use": 1, "queued": 0}
@@ -0,0 +1,63 @@
+import pytest
+from benchmarks.corpus import LINE_LENGTH, LINES_PER_PAGE, born_digital_pdf, page_texts, text_corpus
+from benchmarks.run import compare, percentile
+from app.services.pdf_extractor import PDFExtractor
+
+
+def result(p50, throughput, rss):
+    """Benchmark result with the fields compare() reads."""
+    return {"latency_ms": {"p50": p50}, "throughput": throughput, "throughput_unit": "MB/s", "peak_rss_mb": rss}
+
+
+class TestCorpus:
+    """Tests for the synthetic benchmark corpus."""
+
+    def test_text_corpus_size_and_determinism(self):
+        """Test text corpora have the requested size and depend only on the seed."""
+        assert len(text_corpus(10_000)) == 10_000
+        assert text_corpus(5_000, seed=1) == text_corpus(5_000, seed=1)
+        assert text_corpus(5_000, seed=1) != text_corpus(5_000, seed=2)
+
+    def test_page_layout(self):
+        """Test generated pages have LINES_PER_PAGE lines of at most LINE_LENGTH characters."""
+        for page in page_texts(3):
+            lines = page.split("\n")
+            assert len(lines) == LINES_PER_PAGE
+            assert all(0 < len(line) <= LINE_LENGTH for line in lines)
+
+    def test_born_digital_pdf_round_trip(self):
+        """Test born-digital PDFs extract back to the generated page text."""
+        result = PDFExtractor(mode="fast").extract_from_bytes(born_digital_pdf(2, seed=3), "corpus.pdf")
+
+        assert result["total_pages"] == 2
+        assert result["text"] == "\n".join(page_texts(2, seed=3))
+
+
+class TestBenchmarkComparison:
+    """Tests for comparing benchmark results against a baseline."""
+
+    def test_percentile(self):
+        """Test nearest-rank percentiles."""
+        values = [5, 1, 4, 2, 3]
+        assert percentile(values, 50) == 3
+        assert percentile(values, 95) == 5
+        assert percentile([7], 99) == 7
+
+    @pytest.mark.parametrize("current,regressed", [
+        (result(110, 9.5, 100), False),
+        (result(130, 10, 100), True),
+        (result(100, 7, 100), True),
+        (result(100, 10, 130), True)
+    ])
+    def test_threshold(self, current, regressed):
+        """Test latency, throughput and memory regressions beyond the threshold are reported."""
+        baseline = {"results": {"case": result(100, 10, 100)}}
+
+        assert bool(compare({"results": {"case": current}}, baseline, threshold=0.2)) is regressed
+
+    def test_skips_failed_and_new_cases(self):
+        """Test cases that failed or are missing from the baseline are not compared."""
+        baseline = {"results": {"failed": {"error": "tesseract not installed"}}}
+        current = {"results": {"failed": result(1000, 1, 1000), "new": result(1000, 1, 1000)}}
+
+        assert compare(current, baseline, threshold=0.2) == []
@@ -1,5 +1,9 @@
+import random
+import time
+
 import pytest
-from app.services.text_chunker import TextChunker
+from app.services.text_chunker import ChunkDiff, LayoutChunker, TextChunker, TokenTextChunker
+from app.services.tokenizers import RegexTokenizer
 
 
 class TestTextChunker:
@@ -114,3 +118,306 @@ class TestTextChunker:
             content = chunk.content.rstrip()
             # Should end with punctuation or be at chunk boundary
             assert content.endswith('.') or content.endswith('?') or content.endswith('!') or len(content) <= 35
+
+    def test_iter_chunks_resumes_on_growing_text(self, long_sample_text):
+        """Test chunks emitted from a growing prefix match chunk_text on the full text."""
+        chunker = TextChunker(chunk_size=200, chunk_overlap=50)
+        expected = chunker.chunk_text(long_sample_text)
+
+        chunks = []
+        next_start = 0
+        for prefix_end in range(100, len(long_sample_text), 150):
+            for chunk, next_start in chunker.iter_chunks(
+                long_sample_text[:prefix_end], start=next_start, index=len(chunks), final=False
+            ):
+                chunks.append(chunk)
+        for chunk, next_start in chunker.iter_chunks(
+            long_sample_text, start=next_start, index=len(chunks)
+        ):
+            chunks.append(chunk)
+
+        assert chunks == expected
+
+    def test_records_match_chunk_text(self, long_sample_text):
+        """Test chunk records convert to the same chunks and dicts as chunk_text."""
+        chunker = TextChunker(chunk_size=200, chunk_overlap=50)
+        records = chunker.chunk_records(long_sample_text, [(0, 500), (500, len(long_sample_text))])
+        chunks = chunker.chunk_text(long_sample_text, [(0, 500), (500, len(long_sample_text))])
+
+        assert [record.to_model() for record in records] == chunks
+        assert [record.to_dict() for record in records] == [chunk.model_dump() for chunk in chunks]
+
+    def test_chunking_always_advances(self):
+        """Test an early sentence break with a large overlap cannot stall chunking."""
+        text = "x" * 25 + ". " + "x" * 300
+        chunker = TextChunker(chunk_size=120, chunk_overlap=100)
+        chunks = chunker.chunk_text(text)
+
+        assert chunks[-1].end_char == len(text)
+        starts = [chunk.start_char for chunk in chunks]
+        assert starts == sorted(set(starts))
+
+
+class TestChunkerScaling:
+    """Regression benchmark: chunking time grows linearly with document size."""
+
+    @staticmethod
+    def document(pages: int):
+        page = "The committee reviewed the budget. Decisions were recorded and approved. " * 30
+        page_boundaries = [(i * (len(page) + 1), (i + 1) * (len(page) + 1)) for i in range(pages)]
+        return "\n".join([page] * pages), page_boundaries
+
+    @staticmethod
+    def best_time(chunker, text, page_boundaries, repeats: int = 3) -> float:
+        timings = []
+        for _ in range(repeats):
+            start = time.perf_counter()
+            chunker.chunk_text(text, page_boundaries)
+            timings.append(time.perf_counter() - start)
+        return min(timings)
+
+    def test_chunking_is_linear(self):
+        """Test 8x the pages takes well under the 64x a quadratic pass would."""
+        chunker = TextChunker(chunk_size=1000, chunk_overlap=200)
+        small = self.best_time(chunker, *self.document(200))
+        large = self.best_time(chunker, *self.document(1600))
+
+        assert large / small < 16
+
+
+class TestIncrementalChunker:
+    """Tests for the page-fed IncrementalChunker."""
+
+    @staticmethod
+    def random_pages(seed: int):
+        rng = random.Random(seed)
+        words = ["agenda", "minutes", "motion", "carried", "budget", "Q1", "review", "item"]
+        pages = []
+        for _ in range(rng.randint(1, 12)):
+            sentences = []
+            for _ in range(rng.randint(0, 15)):
+                sentence = " ".join(rng.choice(words) for _ in range(rng.randint(1, 12)))
+                sentences.append(sentence + rng.choice([". ", "? ", "!\n", ", ", "\n"]))
+            pages.append("".join(sentences).strip())
+        return pages
+
+    @staticmethod
+    def assemble(pages):
+        """Join pages like the extractor does, recording each page's boundaries."""
+        page_boundaries = []
+        position = 0
+        for page_text in pages:
+            start = position
+            if page_text:
+                position += len(page_text) + 1
+            page_boundaries.append((start, position))
+        return "\n".join(page for page in pages if page), page_boundaries
+
+    @pytest.mark.parametrize("seed", range(20))
+    @pytest.mark.parametrize("chunk_size,chunk_overlap", [(200, 50), (120, 100), (1000, 200), (50, 0)])
+    def test_pages_match_chunk_text(self, seed, chunk_size, chunk_overlap):
+        """Test page-fed chunking is identical to chunk_text on the assembled document."""
+        pages = self.random_pages(seed)
+        text, page_boundaries = self.assemble(pages)
+        chunker = TextChunker(chunk_size=chunk_size, chunk_overlap=chunk_overlap)
+
+        incremental = chunker.incremental()
+        chunks = []
+        for page_text in pages:
+            chunks.extend(incremental.add_page(page_text))
+        chunks.extend(incremental.finish())
+
+        assert chunks == chunker.chunk_text(text, page_boundaries)
+        assert incremental.page_boundaries == page_boundaries
+        assert incremental.text_length == len(text)
+
+    def test_fragments_match_chunk_text(self, long_sample_text):
+        """Test fragment-fed chunking is identical to chunk_text."""
+        chunker = TextChunker(chunk_size=200, chunk_overlap=50)
+        incremental = chunker.incremental()
+
+        chunks = []
+        for position in range(0, len(long_sample_text), 37):
+            chunks.extend(incremental.add_text(long_sample_text[position:position + 37]))
+        chunks.extend(incremental.finish())
+
+        assert chunks == chunker.chunk_text(long_sample_text)
+
+    def test_chunks_emitted_before_finish(self, long_sample_text):
+        """Test settled chunks are returned before the document is complete."""
+        incremental = TextChunker(chunk_size=200, chunk_overlap=50).incremental()
+
+        assert incremental.add_page(long_sample_text) != []
+
+    def test_buffer_is_bounded(self, long_sample_text):
+        """Test only text needed by upcoming chunks is kept in memory."""
+        incremental = TextChunker(chunk_size=200, chunk_overlap=50).incremental()
+
+        for _ in range(20):
+            incremental.add_page(long_sample_text)
+            assert incremental.buffered_length <= len(long_sample_text) + 200
+
+    def test_whitespace_only(self):
+        """Test whitespace-only input produces no chunks, like chunk_text."""
+        incremental = TextChunker().incremental()
+
+        assert incremental.add_text("   ") == []
+        assert incremental.add_text("\n\n") == []
+        assert incremental.finish() == []
+
+    def test_add_after_finish(self):
+        """Test adding text after finish() is rejected."""
+        incremental = TextChunker().incremental()
+        incremental.finish()
+
+        with pytest.raises(ValueError):
+            incremental.add_page("More text")
+
+
+class TestTokenTextChunker:
+    """Tests for token-budgeted chunking."""
+
+    def test_chunks_fit_token_budget(self, long_sample_text):
+        """Test every chunk is within chunk_size tokens and offsets match content."""
+        chunker = TokenTextChunker(chunk_size=40, chunk_overlap=8)
+        chunks = chunker.chunk_text(long_sample_text)
+        tokenizer = RegexTokenizer()
+
+        assert len(chunks) > 1
+        assert chunks[0].start_char == 0
+        assert chunks[-1].end_char == len(long_sample_text)
+        for chunk in chunks:
+            assert len(tokenizer.token_starts(chunk.content)) <= 40
+            assert long_sample_text[chunk.start_char:chunk.end_char] == chunk.content
+
+    def test_chunks_overlap_by_tokens(self):
+        """Test consecutive chunks overlap by chunk_overlap tokens without sentence breaks."""
+        text = " ".join(f"word{i}" for i in range(100))
+        chunks = TokenTextChunker(chunk_size=20, chunk_overlap=5).chunk_text(text)
+
+        assert chunks[0].content.split() == [f"word{i}" for i in range(20)]
+        assert chunks[1].content.split() == [f"word{i}" for i in range(15, 35)]
+
+    def test_breaks_after_sentence_ending(self):
+        """Test windows end after a sentence ending near the token budget."""
+        text = "One two three four five six. Seven eight nine ten eleven twelve"
+        chunks = TokenTextChunker(chunk_size=10, chunk_overlap=4).chunk_text(text)
+
+        assert chunks[0].content == "One two three four five six."
+
+    def test_incremental_matches_chunk_text(self, long_sample_text):
+        """Test fragment-fed token chunking is identical to chunk_text."""
+        chunker = TokenTextChunker(chunk_size=40, chunk_overlap=8)
+        incremental = chunker.incremental()
+
+        chunks = []
+        for position in range(0, len(long_sample_text), 23):
+            chunks.extend(incremental.add_text(long_sample_text[position:position + 23]))
+        chunks.extend(incremental.finish())
+
+        assert chunks == chunker.chunk_text(long_sample_text)
+
+    def test_params(self):
+        """Test chunker params identify the unit and tokenizer."""
+        assert TextChunker(100, 10).params()["chunk_unit"] == "characters"
+        params = TokenTextChunker(100, 10).params()
+        assert params["chunk_unit"] == "tokens"
+        assert params["tokenizer"] == "regex"
+
+
+def _elements(parts):
+    """Join (category, text) parts with newlines and return the text and its element offsets."""
+    elements = []
+    position = 0
+    for category, part in parts:
+        elements.append({"start": position, "end": position + len(part), "category": category, "page": 1})
+        position += len(part) + 1
+    return "\n".join(part for _, part in parts), elements
+
+
+class TestLayoutChunker:
+    """Tests for layout-aware chunking."""
+
+    def test_never_splits_elements(self):
+        """Test every element that fits in chunk_size lies wholly inside some chunk."""
+        parts = [("Title", "Minutes of the Council")] + [
+            ("ListItem", f"Item {i}: the council approved motion number {i} unanimously.") for i in range(30)
+        ]
+        text, elements = _elements(parts)
+        chunks = LayoutChunker(chunk_size=200, chunk_overlap=40).chunk_elements(text, elements)
+
+        assert len(chunks) > 1
+        for element in elements:
+            assert any(
+                chunk.start_char <= element["start"] and element["end"] <= chunk.end_char
+                for chunk in chunks
+            )
+        for chunk in chunks:
+            assert len(chunk.content) <= 200
+            assert text[chunk.start_char:chunk.end_char] == chunk.content
+
+    def test_overlap_is_whole_elements(self):
+        """Test consecutive chunks share the trailing elements that fit in chunk_overlap."""
+        text, elements = _elements([("ListItem", f"Point {i:02d}.") for i in range(10)])
+        chunks = LayoutChunker(chunk_size=40, chunk_overlap=12).chunk_elements(text, elements)
+
+        starts = {element["start"] for element in elements}
+        for previous, chunk in zip(chunks, chunks[1:]):
+            assert chunk.start_char in starts
+            assert chunk.start_char < previous.end_char
+            assert chunk.metadata.has_overlap_with_previous
+        assert chunks[-1].end_char == len(text)
+
+    def test_splits_oversized_elements(self):
+        """Test an element longer than chunk_size is split and still covered."""
+        text, elements = _elements([
+            ("Title", "Budget"),
+            ("NarrativeText", "The budget was discussed at length. " * 20),
+            ("Title", "Adjournment")
+        ])
+        chunks = LayoutChunker(chunk_size=150, chunk_overlap=30).chunk_elements(text, elements)
+
+        assert all(len(chunk.content) <= 150 for chunk in chunks)
+        assert chunks[0].start_char == 0
+        assert chunks[-1].content.endswith("Adjournment")
+        assert "NarrativeText" in chunks[1].element_categories
+
+    def test_element_categories(self):
+        """Test chunks list the categories of their elements in order."""
+        text, elements = _elements([("Title", "Agenda"), ("ListItem", "Roll call"), ("Table", "A | B")])
+        chunks = LayoutChunker(chunk_size=100, chunk_overlap=10).chunk_elements(text, elements)
+
+        assert len(chunks) == 1
+        assert chunks[0].element_categories == ["Title", "ListItem", "Table"]
+
+    def test_falls_back_without_elements(self, long_sample_text):
+        """Test results without element offsets are chunked with the sliding window."""
+        chunker = LayoutChunker(chunk_size=200, chunk_overlap=50)
+        result = {"text": long_sample_text, "page_boundaries": []}
+
+        assert chunker.chunk_extraction(result) == TextChunker(200, 50).chunk_records(long_sample_text, [])
+
+    def test_params(self):
+        """Test chunker params identify the strategy."""
+        assert TextChunker(100, 10).params()["chunk_strategy"] == "sliding"
+        assert LayoutChunker(100, 10).params()["chunk_strategy"] == "layout"
+
+
+class TestChunkDiff:
+    """Tests for diffing chunks against a previous version."""
+
+    def test_changed_and_removed(self):
+        """Test chunks with new text are listed and vanished texts counted."""
+        chunker = TextChunker(chunk_size=40, chunk_overlap=5)
+        previous = chunker.chunk_records("Roll call. Budget approved. Parks contract signed. Adjourned.", [])
+        current = chunker.chunk_records("Roll call. Budget rejected. Parks contract signed. Adjourned.", [])
+
+        diff = ChunkDiff(chunk.content for chunk in previous)
+        diff.add(current[:1])
+        diff.add(current[1:])
+
+        changed = [chunk.index for chunk in current if chunk.content not in {c.content for c in previous}]
+        assert diff.changed == changed
+        assert 0 < len(diff.changed) < len(current)
+        assert diff.removed == len({c.content for c in previous} - {c.content for c in current})
+        assert diff.removed > 0
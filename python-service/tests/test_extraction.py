@@ -1,3 +1,7 @@
+import asyncio
+import json
+import os
+
 import pytest
 from fastapi.testclient import TestClient
 
@@ -15,6 +19,91 @@ class TestHealthEndpoint:
         assert data["service"] == "ttmm-pdf-extraction"
         assert "version" in data
 
+    def test_liveness(self, client):
+        """Test liveness endpoint reports the process as up."""
+        response = client.get("/health/live")
+
+        assert response.status_code == 200
+        assert response.json()["status"] == "healthy"
+
+    def test_readiness(self, client, monkeypatch):
+        """Test readiness endpoint returns 503 until the workers are warmed up."""
+        from app.api.routes import health
+        from app.services.extraction_pool import ExtractionPool
+
+        pool = ExtractionPool(max_workers=1, max_concurrency=1, worker_warm_up=os.getpid)
+        monkeypatch.setattr(health, "extraction_pool", pool)
+
+        response = client.get("/health/ready")
+        assert response.status_code == 503
+        assert response.json()["status"] == "warming_up"
+
+        pool.warm_up_error = "worker warm-up failed"
+        response = client.get("/health/ready")
+        assert response.status_code == 503
+        assert response.json() == {"status": "failed", "error": "worker warm-up failed"}
+
+        pool.ready = True
+        response = client.get("/health/ready")
+        assert response.status_code == 200
+        assert response.json()["status"] == "ready"
+
+    def test_startup_does_not_import_unstructured(self):
+        """Test importing the app leaves unstructured to be imported on first use."""
+        import subprocess
+        import sys
+
+        result = subprocess.run(
+            [sys.executable, "-c", "import sys, app.main; print('unstructured' in sys.modules)"],
+            capture_output=True,
+            text=True,
+            check=True
+        )
+
+        assert result.stdout.strip() == "False"
+
+    def test_pool_status(self, client):
+        """Test pool status endpoint reports worker pool utilisation."""
+        response = client.get("/health/pool")
+
+        assert response.status_code == 200
+        data = response.json()
+        assert data["max_workers"] >= 1
+        assert data["max_concurrency"] >= 1
+        assert data["in_flight"] == 0
+        assert data["queued"] == 0
+
+
+class TestMetricsEndpoint:
+    """Tests for the metrics endpoint."""
+
+    def test_metrics_after_extraction(self, client, monkeypatch, sample_pdf):
+        """Test an extraction is reflected in the stage histograms and counters."""
+        from app.api.routes import extraction
+        from app.services.extraction_cache import ExtractionCache
+        from app.services.metrics import pages_total, stage_seconds
+
+        monkeypatch.setattr(extraction, "extraction_cache", ExtractionCache(cache_dir=None, enabled=False))
+        pages_before = pages_total.value()
+        chunking_before = stage_seconds.count(stage="chunking")
+
+        client.post(
+            "/extract-pdf",
+            files={"file": ("meeting.pdf", sample_pdf, "application/pdf")},
+            data={"extraction_mode": "fast"}
+        )
+
+        assert pages_total.value() == pages_before + 3
+        assert stage_seconds.count(stage="chunking") == chunking_before + 1
+
+        response = client.get("/metrics")
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("text/plain")
+        for stage in ("upload_read", "temp_file_write", "text_layer", "chunking", "serialization"):
+            assert f'ttmm_stage_duration_seconds_count{{stage="{stage}"}}' in response.text
+        assert 'ttmm_documents_total{ocr="false"}' in response.text
+        assert "ttmm_extractions_in_flight 0" in response.text
+
 
 class TestRootEndpoint:
     """Tests for the root endpoint."""
@@ -63,6 +152,193 @@ class TestExtractionEndpoint:
         assert response.status_code == 400
         assert "chunk_overlap" in response.json()["detail"]
 
+    def test_extract_invalid_mode(self, client):
+        """Test extraction endpoint validates the extraction mode."""
+        response = client.post(
+            "/extract-pdf",
+            files={"file": ("test.pdf", b"%PDF-1.4 test", "application/pdf")},
+            data={"extraction_mode": "magic"}
+        )
+
+        assert response.status_code == 400
+        assert "extraction_mode" in response.json()["detail"]
+
+    def test_extract_invalid_chunk_unit(self, client):
+        """Test extraction endpoint validates the chunk unit."""
+        response = client.post(
+            "/extract-pdf",
+            files={"file": ("test.pdf", b"%PDF-1.4 test", "application/pdf")},
+            data={"chunk_unit": "words"}
+        )
+
+        assert response.status_code == 400
+        assert "chunk_unit" in response.json()["detail"]
+
+    def test_extract_token_chunks(self, client, monkeypatch, tmp_path, sample_pdf):
+        """Test chunk_unit=tokens sizes chunks in tokens with character offsets."""
+        from app.api.routes import extraction
+        from app.services.extraction_cache import ExtractionCache
+        from app.services.tokenizers import RegexTokenizer
+
+        monkeypatch.setattr(extraction, "extraction_cache", ExtractionCache(cache_dir=str(tmp_path)))
+
+        response = client.post(
+            "/extract-pdf",
+            files={"file": ("meeting.pdf", sample_pdf, "application/pdf")},
+            data={"extraction_mode": "fast", "chunk_unit": "tokens", "chunk_size": "12", "chunk_overlap": "3"}
+        )
+
+        assert response.status_code == 200
+        data = response.json()
+        assert data["total_chunks"] > 1
+        for chunk in data["chunks"]:
+            assert len(RegexTokenizer().token_starts(chunk["content"])) <= 12
+            assert chunk["end_char"] - chunk["start_char"] == len(chunk["content"])
+
+    def test_extract_layout_chunks(self, client, monkeypatch, tmp_path, sample_pdf):
+        """Test chunk_strategy=layout chunks on element boundaries and lists categories."""
+        from app.api.routes import extraction
+        from app.services.extraction_cache import ExtractionCache
+
+        monkeypatch.setattr(extraction, "extraction_cache", ExtractionCache(cache_dir=str(tmp_path)))
+
+        response = client.post(
+            "/extract-pdf",
+            files={"file": ("meeting.pdf", sample_pdf, "application/pdf")},
+            data={"extraction_mode": "fast", "chunk_strategy": "layout", "chunk_size": "120", "chunk_overlap": "20"}
+        )
+
+        assert response.status_code == 200
+        data = response.json()
+        assert data["total_chunks"] > 1
+        for chunk in data["chunks"]:
+            assert chunk["element_categories"] == ["UncategorizedText"]
+            assert not chunk["content"].startswith((" ", "\n"))
+
+    def test_extract_compact_response(self, client, monkeypatch, tmp_path, sample_pdf):
+        """Test response_format=compact returns the text once with chunk offsets matching the full format."""
+        from app.api.routes import extraction
+        from app.services.extraction_cache import ExtractionCache
+
+        monkeypatch.setattr(extraction, "extraction_cache", ExtractionCache(cache_dir=str(tmp_path)))
+        files = {"file": ("meeting.pdf", sample_pdf, "application/pdf")}
+        data = {"extraction_mode": "fast", "chunk_size": "100", "chunk_overlap": "20"}
+
+        full = client.post("/extract-pdf", files=files, data=data).json()
+        response = client.post("/extract-pdf", files=files, data={**data, "response_format": "compact"})
+
+        assert response.status_code == 200
+        compact = response.json()
+        assert compact["total_chunks"] == full["total_chunks"] > 1
+        assert compact["total_characters"] == len(compact["text"])
+
+        columns = compact["chunks"]
+        for i, chunk in enumerate(full["chunks"]):
+            assert compact["text"][columns["start_char"][i]:columns["end_char"][i]] == chunk["content"]
+            assert columns["page_numbers"][i] == chunk["page_numbers"]
+            assert columns["has_overlap_with_previous"][i] == chunk["metadata"]["has_overlap_with_previous"]
+            assert columns["has_overlap_with_next"][i] == chunk["metadata"]["has_overlap_with_next"]
+        assert compact["extraction_metadata"]["cache_hit"] is True
+
+    def test_extract_invalid_response_format(self, client):
+        """Test unknown response formats are rejected."""
+        response = client.post(
+            "/extract-pdf",
+            files={"file": ("test.pdf", b"%PDF-1.4 test", "application/pdf")},
+            data={"response_format": "xml"}
+        )
+
+        assert response.status_code == 400
+        assert "response_format" in response.json()["detail"]
+
+    def test_extract_rejected_when_over_capacity(self, client, monkeypatch, tmp_path, sample_pdf):
+        """Test requests are rejected with 503 and Retry-After once the admission queue is full."""
+        from app.api.routes import extraction
+        from app.services.admission import AdmissionController
+        from app.services.extraction_cache import ExtractionCache
+
+        admission = AdmissionController(capacity=1, max_queue=0, retry_after_seconds=3)
+        monkeypatch.setattr(extraction, "extraction_admission", admission)
+        monkeypatch.setattr(extraction, "extraction_cache", ExtractionCache(cache_dir=str(tmp_path)))
+        files = {"file": ("meeting.pdf", sample_pdf, "application/pdf")}
+        data = {"extraction_mode": "fast"}
+
+        asyncio.run(admission.acquire(1))
+        response = client.post("/extract-pdf", files=files, data=data)
+        assert response.status_code == 503
+        assert response.headers["retry-after"] == "3"
+
+        stream = client.post("/extract-pdf/stream", files=files, data=data)
+        assert stream.status_code == 503
+
+        admission.release(1)
+        response = client.post("/extract-pdf", files=files, data=data)
+        assert response.status_code == 200
+        assert admission.stats()["in_use"] == 0
+
+    def test_extract_layout_rejects_tokens(self, client):
+        """Test chunk_strategy=layout cannot be combined with chunk_unit=tokens."""
+        response = client.post(
+            "/extract-pdf",
+            files={"file": ("test.pdf", b"%PDF-1.4 test", "application/pdf")},
+            data={"chunk_strategy": "layout", "chunk_unit": "tokens"}
+        )
+
+        assert response.status_code == 400
+        assert "chunk_strategy" in response.json()["detail"]
+
+    def test_extract_fast_mode(self, client, monkeypatch, tmp_path, sample_pdf):
+        """Test fast mode extracts a born-digital PDF through the worker pool."""
+        from app.api.routes import extraction
+        from app.services.extraction_cache import ExtractionCache
+
+        monkeypatch.setattr(extraction, "extraction_cache", ExtractionCache(cache_dir=str(tmp_path)))
+
+        response = client.post(
+            "/extract-pdf",
+            files={"file": ("meeting.pdf", sample_pdf, "application/pdf")},
+            data={"extraction_mode": "fast"}
+        )
+
+        assert response.status_code == 200
+        data = response.json()
+        assert data["total_pages"] == 3
+        assert data["chunks"][0]["content"].startswith("Meeting Minutes")
+        assert data["extraction_metadata"]["extractor"] == "pypdf"
+        assert data["extraction_metadata"]["page_ocr_applied"] == [False, False, False]
+        assert data["extraction_metadata"]["cache_hit"] is False
+
+    def test_extract_max_pages(self, client, monkeypatch, tmp_path, sample_pdf, sample_pdf_pages):
+        """Test max_pages extracts only the first pages while reporting the document's page count."""
+        from app.api.routes import extraction
+        from app.services.extraction_cache import ExtractionCache
+
+        monkeypatch.setattr(extraction, "extraction_cache", ExtractionCache(cache_dir=str(tmp_path)))
+
+        response = client.post(
+            "/extract-pdf",
+            files={"file": ("meeting.pdf", sample_pdf, "application/pdf")},
+            data={"extraction_mode": "fast", "max_pages": "1"}
+        )
+
+        assert response.status_code == 200
+        data = response.json()
+        assert data["total_pages"] == 3
+        assert data["total_characters"] == len(sample_pdf_pages[0])
+        assert data["extraction_metadata"]["extracted_pages"] == [1]
+        assert all(chunk["page_numbers"] == [1] for chunk in data["chunks"])
+
+    @pytest.mark.parametrize("data", [{"pages": "3-1"}, {"pages": "first"}, {"max_pages": "0"}])
+    def test_extract_invalid_page_selection(self, client, data):
+        """Test malformed pages and max_pages values are rejected."""
+        response = client.post(
+            "/extract-pdf",
+            files={"file": ("test.pdf", b"%PDF-1.4 test", "application/pdf")},
+            data=data
+        )
+
+        assert response.status_code == 400
+
     def test_extract_file_too_large(self, client):
         """Test extraction endpoint rejects files over size limit."""
         # Create content larger than 10MB
@@ -75,3 +351,821 @@ class TestExtractionEndpoint:
 
         assert response.status_code == 400
         assert "size" in response.json()["detail"].lower()
+
+    def test_upload_removed_after_extraction(self, client, monkeypatch, tmp_path, sample_pdf):
+        """Test the upload is copied to a temporary file that is removed afterwards."""
+        import tempfile
+
+        from app.api.routes import extraction
+        from app.services.extraction_cache import ExtractionCache
+
+        monkeypatch.setattr(extraction, "extraction_cache", ExtractionCache(cache_dir=None, enabled=False))
+        monkeypatch.setattr(tempfile, "tempdir", str(tmp_path))
+
+        response = client.post(
+            "/extract-pdf",
+            files={"file": ("meeting.pdf", sample_pdf, "application/pdf")},
+            data={"extraction_mode": "fast"}
+        )
+
+        assert response.status_code == 200
+        assert os.listdir(tmp_path) == []
+
+    @pytest.mark.asyncio
+    async def test_upload_rejected_while_copying(self, monkeypatch, tmp_path):
+        """Test uploads of unknown size are rejected once the copied size crosses the limit."""
+        import io
+        import tempfile
+
+        from fastapi import HTTPException, UploadFile
+        from app.api.routes import extraction
+
+        monkeypatch.setattr(extraction, "MAX_FILE_SIZE", 2 * extraction.UPLOAD_BLOCK_SIZE)
+        monkeypatch.setattr(tempfile, "tempdir", str(tmp_path))
+
+        upload = UploadFile(io.BytesIO(b"x" * (3 * extraction.UPLOAD_BLOCK_SIZE)), filename="large.pdf")
+        with pytest.raises(HTTPException) as error:
+            await extraction._save_upload(upload)
+
+        assert error.value.status_code == 400
+        assert os.listdir(tmp_path) == []
+
+        content = b"%PDF-1.4 small"
+        path, content_hash = await extraction._save_upload(UploadFile(io.BytesIO(content), filename="small.pdf"))
+        with open(path, "rb") as f:
+            assert f.read() == content
+        assert content_hash == extraction.extraction_cache.hash_bytes(content)
+        extraction._remove_upload(path)
+
+    def test_extract_cache_hit_rechunks(self, client, monkeypatch, tmp_path):
+        """Test a cached extraction is re-chunked without running extraction."""
+        from app.api.routes import extraction
+        from app.services.extraction_cache import ExtractionCache
+        from app.services.pdf_extractor import PDFExtractor
+
+        cache = ExtractionCache(cache_dir=str(tmp_path))
+        monkeypatch.setattr(extraction, "extraction_cache", cache)
+
+        pdf_content = b"%PDF-1.4 cached"
+        text = "First sentence. Second sentence. Third sentence. Fourth sentence."
+        cache_key = ExtractionCache.make_key(
+            ExtractionCache.hash_bytes(pdf_content),
+            **PDFExtractor(mode="unstructured").cache_params()
+        )
+        cache.put(cache_key, {
+            "text": text,
+            "page_boundaries": [(0, len(text) + 1)],
+            "total_pages": 1,
+            "ocr_applied": False
+        })
+
+        response = client.post(
+            "/extract-pdf",
+            files={"file": ("cached.pdf", pdf_content, "application/pdf")},
+            data={"chunk_size": "35", "chunk_overlap": "10"}
+        )
+
+        assert response.status_code == 200
+        data = response.json()
+        assert data["extraction_metadata"]["cache_hit"] is True
+        assert data["total_characters"] == len(text)
+        assert data["total_chunks"] > 1
+
+        response = client.post(
+            "/extract-pdf",
+            files={"file": ("renamed.pdf", pdf_content, "application/pdf")},
+            data={"chunk_size": "1000", "chunk_overlap": "200"}
+        )
+
+        assert response.status_code == 200
+        data = response.json()
+        assert data["extraction_metadata"]["cache_hit"] is True
+        assert data["filename"] == "renamed.pdf"
+        assert data["total_chunks"] == 1
+
+
+class TestProbeEndpoint:
+    """Tests for the pre-flight probe endpoint and its use by /extract-pdf."""
+
+    def encrypted_pdf(self, sample_pdf):
+        import io
+
+        from pypdf import PdfReader, PdfWriter
+
+        writer = PdfWriter(clone_from=PdfReader(io.BytesIO(sample_pdf)))
+        writer.encrypt(user_password="secret", owner_password="owner")
+        output = io.BytesIO()
+        writer.write(output)
+        return output.getvalue()
+
+    def test_probe_text_pdf(self, client, sample_pdf):
+        """Test a text PDF is reported as cheap and suited to fast mode."""
+        response = client.post(
+            "/extract-pdf/probe",
+            files={"file": ("minutes.pdf", sample_pdf, "application/pdf")},
+            data={"extraction_mode": "auto", "max_pages": "2"}
+        )
+
+        assert response.status_code == 200
+        data = response.json()
+        assert data["processable"] is True
+        assert data["total_pages"] == 3
+        assert [page["text_layer"] for page in data["pages"]] == [True, True, True]
+        assert data["selected_pages"] == 2
+        assert data["ocr_pages"] == 0
+        assert data["extraction_mode"] == "fast"
+        assert data["recommended_mode"] == "fast"
+        assert data["estimated_cost"] == 2
+        assert data["async_recommended"] is False
+
+    def test_probe_ocr_cost(self, client, sample_pdf):
+        """Test pages to OCR are costed as such."""
+        from app.services.admission import extraction_admission
+
+        response = client.post(
+            "/extract-pdf/probe",
+            files={"file": ("minutes.pdf", sample_pdf, "application/pdf")},
+            data={"extraction_mode": "ocr"}
+        )
+
+        data = response.json()
+        assert data["ocr_pages"] == 3
+        assert data["estimated_cost"] == 3 * extraction_admission.ocr_page_cost
+
+    def test_probe_unprocessable(self, client, sample_pdf):
+        """Test unprocessable files are reported rather than rejected."""
+        for content, error in (
+            (self.encrypted_pdf(sample_pdf), "PDF is password protected"),
+            (b"%PDF-1.4 broken", "Not a readable PDF")
+        ):
+            response = client.post(
+                "/extract-pdf/probe",
+                files={"file": ("minutes.pdf", content, "application/pdf")}
+            )
+
+            assert response.status_code == 200
+            assert response.json()["processable"] is False
+            assert response.json()["error"] == error
+
+    def test_extract_rejects_unprocessable(self, client, monkeypatch, tmp_path, sample_pdf):
+        """Test /extract-pdf rejects a password protected PDF before extracting it."""
+        from app.api.routes import extraction
+        from app.services.extraction_cache import ExtractionCache
+
+        monkeypatch.setattr(extraction, "extraction_cache", ExtractionCache(cache_dir=str(tmp_path)))
+        monkeypatch.setattr(extraction, "extraction_pool", StalledPool())
+
+        response = client.post(
+            "/extract-pdf",
+            files={"file": ("minutes.pdf", self.encrypted_pdf(sample_pdf), "application/pdf")},
+            data={"extraction_mode": "fast"}
+        )
+
+        assert response.status_code == 422
+        assert response.json()["detail"] == "PDF is password protected"
+
+    def test_extract_auto_mode(self, client, monkeypatch, tmp_path, sample_pdf):
+        """Test extraction_mode auto extracts a text PDF in fast mode."""
+        from app.api.routes import extraction
+        from app.services.extraction_cache import ExtractionCache
+
+        monkeypatch.setattr(extraction, "extraction_cache", ExtractionCache(cache_dir=str(tmp_path)))
+
+        response = client.post(
+            "/extract-pdf",
+            files={"file": ("minutes.pdf", sample_pdf, "application/pdf")},
+            data={"extraction_mode": "auto"}
+        )
+
+        assert response.status_code == 200
+        assert response.json()["extraction_metadata"]["extractor"] == "pypdf"
+
+    def test_auto_mode_only_on_extract_pdf(self, client, sample_pdf):
+        """Test endpoints that do not probe reject extraction_mode auto."""
+        response = client.post(
+            "/extract-pdf/stream",
+            files={"file": ("minutes.pdf", sample_pdf, "application/pdf")},
+            data={"extraction_mode": "auto"}
+        )
+
+        assert response.status_code == 400
+
+
+class TestExtractionBatchEndpoint:
+    """Tests for the batch PDF extraction endpoint."""
+
+    def test_batch_per_file_results(self, client, monkeypatch, tmp_path, sample_pdf):
+        """Test each file gets its own result and a bad file does not fail the batch."""
+        from app.api.routes import extraction
+        from app.services.extraction_cache import ExtractionCache
+
+        monkeypatch.setattr(extraction, "extraction_cache", ExtractionCache(cache_dir=str(tmp_path)))
+
+        response = client.post(
+            "/extract-pdf/batch",
+            files=[
+                ("files", ("first.pdf", sample_pdf, "application/pdf")),
+                ("files", ("notes.txt", b"Hello world", "text/plain")),
+                ("files", ("broken.pdf", b"%PDF-1.4 broken", "application/pdf")),
+                ("files", ("second.pdf", sample_pdf, "application/pdf"))
+            ],
+            data={"extraction_mode": "fast"}
+        )
+
+        assert response.status_code == 200
+        data = response.json()
+        assert data["success"] is False
+        assert data["total_files"] == 4
+        assert data["succeeded"] == 2
+        assert data["failed"] == 2
+
+        first, notes, broken, second = data["results"]
+        assert first["filename"] == "first.pdf"
+        assert first["success"] is True
+        assert first["result"]["total_pages"] == 3
+        assert second["result"]["chunks"] == first["result"]["chunks"]
+        assert notes["success"] is False
+        assert "PDF" in notes["error"]
+        assert broken["success"] is False
+        assert broken["error"] == "Not a readable PDF"
+
+    def test_batch_total_size_budget(self, client, monkeypatch):
+        """Test batches over the total size budget are rejected."""
+        from app.api.routes import extraction
+
+        monkeypatch.setattr(extraction, "MAX_BATCH_SIZE", 100)
+
+        response = client.post(
+            "/extract-pdf/batch",
+            files=[
+                ("files", ("a.pdf", b"%PDF-1.4" + b"x" * 60, "application/pdf")),
+                ("files", ("b.pdf", b"%PDF-1.4" + b"x" * 60, "application/pdf"))
+            ]
+        )
+
+        assert response.status_code == 400
+        assert "size" in response.json()["detail"].lower()
+
+
+class TestExtractionStreamEndpoint:
+    """Tests for the streaming PDF extraction endpoint."""
+
+    def test_stream_non_pdf_file(self, client):
+        """Test streaming endpoint rejects non-PDF files before streaming."""
+        response = client.post(
+            "/extract-pdf/stream",
+            files={"file": ("test.txt", b"Hello world", "text/plain")}
+        )
+
+        assert response.status_code == 400
+
+    @pytest.mark.parametrize("chunk_strategy", ["sliding", "layout"])
+    def test_stream_matches_full_response(self, client, monkeypatch, tmp_path, chunk_strategy):
+        """Test streamed chunks match /extract-pdf and end with a summary line."""
+        from app.api.routes import extraction
+        from app.services.extraction_cache import ExtractionCache
+        from tests.conftest import build_pdf
+
+        pdf = build_pdf([
+            "Item {0}. The committee reviewed the budget. Decisions were recorded.".format(page)
+            for page in range(12)
+        ])
+        data = {"extraction_mode": "fast", "chunk_size": "150", "chunk_overlap": "30", "chunk_strategy": chunk_strategy}
+
+        monkeypatch.setattr(extraction, "extraction_cache", ExtractionCache(cache_dir=None, enabled=False))
+        expected = client.post(
+            "/extract-pdf",
+            files={"file": ("meeting.pdf", pdf, "application/pdf")},
+            data=data
+        ).json()
+
+        response = client.post(
+            "/extract-pdf/stream",
+            files={"file": ("meeting.pdf", pdf, "application/pdf")},
+            data=data
+        )
+
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("application/x-ndjson")
+        lines = [json.loads(line) for line in response.text.splitlines()]
+
+        chunks = [line for line in lines[:-1] if line.pop("type") == "chunk"]
+        assert chunks == expected["chunks"]
+
+        summary = lines[-1]
+        assert summary["type"] == "summary"
+        assert summary["total_pages"] == 12
+        assert summary["total_chunks"] == expected["total_chunks"]
+        assert summary["total_characters"] == expected["total_characters"]
+        assert summary["extraction_metadata"]["extractor"] == "pypdf"
+
+
+    def test_stream_partial_matches_full_response(self, client, monkeypatch):
+        """Test a streamed page selection matches /extract-pdf and keeps document page numbers."""
+        from app.api.routes import extraction
+        from app.services.extraction_cache import ExtractionCache
+        from tests.conftest import build_pdf
+
+        pdf = build_pdf([
+            "Item {0}. The committee reviewed the budget. Decisions were recorded.".format(page)
+            for page in range(8)
+        ])
+        data = {"extraction_mode": "fast", "chunk_size": "150", "chunk_overlap": "30", "pages": "2-3,6"}
+
+        monkeypatch.setattr(extraction, "extraction_cache", ExtractionCache(cache_dir=None, enabled=False))
+        expected = client.post(
+            "/extract-pdf",
+            files={"file": ("meeting.pdf", pdf, "application/pdf")},
+            data=data
+        ).json()
+
+        response = client.post(
+            "/extract-pdf/stream",
+            files={"file": ("meeting.pdf", pdf, "application/pdf")},
+            data=data
+        )
+
+        lines = [json.loads(line) for line in response.text.splitlines()]
+        chunks = [line for line in lines[:-1] if line.pop("type") == "chunk"]
+        assert chunks == expected["chunks"]
+        assert {page for chunk in chunks for page in chunk["page_numbers"]} <= {2, 3, 4, 5, 6}
+        assert lines[-1]["extraction_metadata"]["extracted_pages"] == [2, 3, 6]
+
+
+class TestExtractionDedup:
+    """Tests for chunk fingerprints and dedup on the extraction endpoints."""
+
+    PAGES = [
+        "Roll call. All members were present. The chair opened the meeting.",
+        "The committee reviewed the quarterly budget and approved the contract."
+    ]
+
+    @pytest.fixture
+    def index(self, monkeypatch):
+        from app.api.routes import extraction
+        from app.services.extraction_cache import ExtractionCache
+        from app.services.fingerprints import FingerprintIndex
+
+        index = FingerprintIndex()
+        monkeypatch.setattr(extraction, "fingerprint_index", index)
+        monkeypatch.setattr(extraction, "extraction_cache", ExtractionCache(cache_dir=None, enabled=False))
+        return index
+
+    def post(self, client, pages, path="/extract-pdf", **data):
+        from tests.conftest import build_pdf
+
+        return client.post(
+            path,
+            files={"file": ("minutes.pdf", build_pdf(pages), "application/pdf")},
+            data={"extraction_mode": "fast", "chunk_size": "60", "chunk_overlap": "1", **data}
+        )
+
+    def test_dedup_off_by_default(self, client, index):
+        """Test chunks carry no fingerprints unless dedup is requested."""
+        body = self.post(client, self.PAGES).json()
+
+        assert all(chunk["fingerprint"] is None for chunk in body["chunks"])
+        assert body["extraction_metadata"]["duplicate_chunks"] is None
+
+    def test_dedup_flag_chunks_seen_in_earlier_document(self, client, index):
+        """Test chunks of an earlier document are flagged but kept with dedup=flag."""
+        first = self.post(client, self.PAGES, dedup="flag").json()
+        second = self.post(client, self.PAGES + ["Any other business. None."], dedup="flag").json()
+
+        assert not any(chunk["fingerprint"]["seen_before"] for chunk in first["chunks"])
+        flagged = [chunk["fingerprint"]["seen_before"] for chunk in second["chunks"]]
+        assert flagged[0] and not flagged[-1]
+        assert second["extraction_metadata"]["duplicate_chunks"] == sum(flagged)
+        assert second["chunks"][0]["fingerprint"]["content_hash"] == first["chunks"][0]["fingerprint"]["content_hash"]
+
+    def test_dedup_collapse_drops_repeats(self, client, index):
+        """Test dedup=collapse leaves repeated chunks out of the response."""
+        self.post(client, self.PAGES, dedup="flag")
+        flagged = self.post(client, self.PAGES + ["Any other business. None."], dedup="flag").json()
+        collapsed = self.post(client, self.PAGES + ["Any other business. None."], dedup="collapse").json()
+
+        unique = [chunk for chunk in flagged["chunks"] if not chunk["fingerprint"]["seen_before"]]
+        assert collapsed["chunks"] == unique
+        assert collapsed["total_chunks"] == len(unique)
+        assert collapsed["extraction_metadata"]["duplicate_chunks"] == len(flagged["chunks"]) - len(unique)
+
+    def test_dedup_compact_and_stream(self, client, index):
+        """Test compact responses and streams carry the same fingerprints."""
+        self.post(client, self.PAGES, dedup="flag")
+        pages = self.PAGES + ["Any other business. None."]
+        expected = self.post(client, pages, dedup="collapse").json()
+        compact = self.post(client, pages, dedup="collapse", response_format="compact").json()
+        lines = [json.loads(line) for line in self.post(
+            client, pages, path="/extract-pdf/stream", dedup="collapse"
+        ).text.splitlines()]
+
+        fingerprints = [chunk["fingerprint"] for chunk in expected["chunks"]]
+        assert compact["chunks"]["content_hash"] == [fp["content_hash"] for fp in fingerprints]
+        assert compact["chunks"]["seen_before"] == [False] * len(fingerprints)
+        assert [line["fingerprint"] for line in lines[:-1]] == fingerprints
+        assert lines[-1]["extraction_metadata"]["duplicate_chunks"] == expected["extraction_metadata"]["duplicate_chunks"]
+
+    def test_dedup_invalid_mode(self, client, index):
+        """Test unknown dedup modes are rejected."""
+        response = self.post(client, self.PAGES, dedup="merge")
+
+        assert response.status_code == 400
+        assert "dedup" in response.json()["detail"]
+
+
+class RecordingPool:
+    """Extraction pool wrapper recording the page selection of each stream."""
+
+    def __init__(self, pool):
+        self.pool = pool
+        self.extracted = []
+
+    def stream(self, fn, *args):
+        self.extracted.append(fn.__self__.pages)
+        return self.pool.stream(fn, *args)
+
+    def __getattr__(self, name):
+        return getattr(self.pool, name)
+
+
+class TestIncrementalExtraction:
+    """Tests for re-extracting new versions of a document from cached pages."""
+
+    PAGES = [
+        "Item {0}. The committee reviewed the budget for area {0}. Decisions were recorded.".format(page)
+        for page in range(8)
+    ]
+    AMENDED = PAGES[:3] + ["Item 3. The committee rejected the budget for area 3 after debate."] + PAGES[4:]
+    DATA = {"extraction_mode": "fast", "chunk_size": "120", "chunk_overlap": "20"}
+
+    @pytest.fixture
+    def pool(self, monkeypatch, tmp_path):
+        from app.api.routes import extraction
+        from app.services.extraction_cache import ExtractionCache
+
+        pool = RecordingPool(extraction.extraction_pool)
+        monkeypatch.setattr(extraction, "extraction_pool", pool)
+        monkeypatch.setattr(extraction, "extraction_cache", ExtractionCache(cache_dir=str(tmp_path)))
+        return pool
+
+    def post(self, client, page_texts, path="/extract-pdf", **data):
+        from tests.conftest import build_pdf
+
+        return client.post(
+            path,
+            files={"file": ("minutes.pdf", build_pdf(page_texts), "application/pdf")},
+            data={**self.DATA, **data}
+        )
+
+    def test_amended_document_only_extracts_changed_pages(self, client, monkeypatch, pool):
+        """Test unchanged pages come from the page cache and the result matches a fresh extraction."""
+        from app.api.routes import extraction
+        from app.services.extraction_cache import ExtractionCache
+
+        self.post(client, self.PAGES)
+        amended = self.post(client, self.AMENDED).json()
+
+        assert pool.extracted == [None, [(4, 4)]]
+        assert amended["extraction_metadata"]["reused_pages"] == [1, 2, 3, 5, 6, 7, 8]
+        assert amended["extraction_metadata"]["cache_hit"] is False
+
+        monkeypatch.setattr(extraction, "extraction_cache", ExtractionCache(cache_dir=None, enabled=False))
+        fresh = self.post(client, self.AMENDED).json()
+        assert amended["chunks"] == fresh["chunks"]
+        assert fresh["extraction_metadata"]["reused_pages"] == []
+
+    def test_previous_version_lists_changed_chunks(self, client, pool):
+        """Test chunks are diffed against the previous version's chunks."""
+        original = self.post(client, self.PAGES).json()
+        previous_version = original["extraction_metadata"]["content_hash"]
+        amended = self.post(client, self.AMENDED, previous_version=previous_version).json()
+
+        previous_texts = {chunk["content"] for chunk in original["chunks"]}
+        changed = [chunk["index"] for chunk in amended["chunks"] if chunk["content"] not in previous_texts]
+        assert amended["extraction_metadata"]["changed_chunks"] == changed
+        assert 0 < len(changed) < len(amended["chunks"])
+        assert any("rejected" in amended["chunks"][index]["content"] for index in changed)
+        assert amended["extraction_metadata"]["removed_chunks"] > 0
+
+        unknown = self.post(client, self.AMENDED, previous_version="0" * 64).json()
+        assert unknown["extraction_metadata"]["changed_chunks"] is None
+
+    def test_stream_reuses_pages(self, client, pool):
+        """Test the stream endpoint reuses cached pages and reports the diff."""
+        original = self.post(client, self.PAGES).json()
+        expected = self.post(
+            client, self.AMENDED, previous_version=original["extraction_metadata"]["content_hash"]
+        ).json()
+        pool.extracted.clear()
+
+        lines = [json.loads(line) for line in self.post(
+            client, self.AMENDED + ["Addendum. The clerk attached the revised budget tables for area 3."], path="/extract-pdf/stream",
+            previous_version=original["extraction_metadata"]["content_hash"]
+        ).text.splitlines()]
+
+        metadata = lines[-1]["extraction_metadata"]
+        assert pool.extracted == [[(9, 9)]]
+        assert metadata["reused_pages"] == list(range(1, 9))
+        assert [line["content"] for line in lines[:-1]][:len(expected["chunks"]) - 1] == [
+            chunk["content"] for chunk in expected["chunks"][:-1]
+        ]
+        assert set(expected["extraction_metadata"]["changed_chunks"]) <= set(metadata["changed_chunks"])
+
+    def test_full_extraction_reuses_partial_pages(self, client, pool):
+        """Test pages extracted by a partial request serve a later full extraction."""
+        self.post(client, self.PAGES, pages="2-4")
+        full = self.post(client, self.PAGES).json()
+
+        assert pool.extracted == [[(2, 4)], [(1, 1), (5, 8)]]
+        assert full["extraction_metadata"]["reused_pages"] == [2, 3, 4]
+        assert full["extraction_metadata"]["extracted_pages"] is None
+
+    def test_invalid_previous_version(self, client):
+        """Test previous_version must be a content hash."""
+        response = self.post(client, self.PAGES, previous_version="minutes-v1")
+
+        assert response.status_code == 400
+        assert "previous_version" in response.json()["detail"]
+
+
+class TestExtractionProfiling:
+    """Tests for profiling extraction requests in debug mode."""
+
+    DATA = {"extraction_mode": "fast"}
+
+    @pytest.fixture
+    def store(self, monkeypatch, tmp_path):
+        from app.api.routes import extraction, profiles
+        from app.config import settings
+        from app.services.extraction_cache import ExtractionCache
+        from app.services.profiling import ProfileStore
+
+        store = ProfileStore(directory=str(tmp_path / "profiles"))
+        monkeypatch.setattr(settings, "debug", True)
+        monkeypatch.setattr(extraction, "profile_store", store)
+        monkeypatch.setattr(profiles, "profile_store", store)
+        monkeypatch.setattr(extraction, "extraction_cache", ExtractionCache(cache_dir=str(tmp_path / "cache")))
+        return store
+
+    def post(self, client, sample_pdf, headers=None, **data):
+        return client.post(
+            "/extract-pdf",
+            files={"file": ("minutes.pdf", sample_pdf, "application/pdf")},
+            data={**self.DATA, **data},
+            headers=headers
+        )
+
+    def test_profile_summary(self, client, sample_pdf, store):
+        """Test a profiled request reports its hot functions, including worker time."""
+        response = self.post(client, sample_pdf, headers={"X-Profile": "1"})
+
+        assert response.status_code == 200
+        profile = response.json()["profile"]
+        assert profile["duration_ms"] > 0
+        assert profile["hot_functions"]
+        assert profile["pstats_url"] == f"/debug/profiles/{profile['profile_id']}?format=pstats"
+        assert not [name for name in os.listdir(store.directory) if name.endswith(store.WORKER_SUFFIX)]
+
+        stats = store.load(profile["profile_id"])
+        assert any(function[2] == "_iter_fast_pages" for function in stats.stats)
+
+    def test_compact_profile(self, client, sample_pdf, store):
+        """Test compact responses carry the profile too."""
+        response = client.post(
+            "/extract-pdf?profile=1",
+            files={"file": ("minutes.pdf", sample_pdf, "application/pdf")},
+            data={**self.DATA, "response_format": "compact"}
+        )
+
+        assert response.status_code == 200
+        assert response.json()["profile"]["profile_id"]
+
+    def test_unprofiled_request(self, client, sample_pdf, store):
+        """Test requests are not profiled unless asked to."""
+        for headers in (None, {"X-Profile": "0"}):
+            assert self.post(client, sample_pdf, headers=headers).json()["profile"] is None
+        assert store.list() == []
+
+    def test_profiling_requires_debug(self, client, sample_pdf, store, monkeypatch):
+        """Test asking for a profile without DEBUG is rejected and profiles are not served."""
+        from app.config import settings
+
+        monkeypatch.setattr(settings, "debug", False)
+
+        assert self.post(client, sample_pdf, headers={"X-Profile": "1"}).status_code == 403
+        assert client.get("/debug/profiles").status_code == 404
+
+    def test_download_profile(self, client, sample_pdf, store):
+        """Test a stored profile downloads as pstats and speedscope files."""
+        profile = self.post(client, sample_pdf, headers={"X-Profile": "1"}).json()["profile"]
+
+        listed = client.get("/debug/profiles").json()
+        assert [entry["profile_id"] for entry in listed] == [profile["profile_id"]]
+
+        pstats_file = client.get(profile["pstats_url"])
+        assert pstats_file.status_code == 200
+        assert pstats_file.headers["content-type"] == "application/octet-stream"
+
+        speedscope = client.get(profile["speedscope_url"])
+        assert speedscope.status_code == 200
+        assert "attachment" in speedscope.headers["content-disposition"]
+        assert speedscope.json()["profiles"][0]["type"] == "sampled"
+
+        assert client.get(f"/debug/profiles/{'0' * 32}").status_code == 404
+        assert client.get(f"{profile['pstats_url'].split('?')[0]}?format=svg").status_code == 400
+
+
+class StalledPool:
+    """Extraction pool stand-in whose worker never produces a page."""
+
+    def __init__(self):
+        self.cancelled = False
+
+    async def stream(self, fn, *args):
+        try:
+            await asyncio.sleep(60)
+            yield None
+        except asyncio.CancelledError:
+            self.cancelled = True
+            raise
+
+
+class DisconnectedRequest:
+    """Request stand-in whose client disconnects after the first poll."""
+
+    def __init__(self):
+        self.polls = 0
+
+    async def is_disconnected(self):
+        self.polls += 1
+        return self.polls > 1
+
+
+class TestExtractionCancellation:
+    """Tests for cancelling extraction on deadlines and client disconnects."""
+
+    def test_extract_deadline_exceeded(self, client, monkeypatch, tmp_path, sample_pdf):
+        """Test extraction past deadline_seconds is cancelled with 504 and cleaned up."""
+        import tempfile
+
+        from app.api.routes import extraction
+        from app.services.admission import AdmissionController
+        from app.services.extraction_cache import ExtractionCache
+        from app.services.metrics import extraction_cancellations_total
+
+        pool = StalledPool()
+        admission = AdmissionController()
+        monkeypatch.setattr(extraction, "extraction_pool", pool)
+        monkeypatch.setattr(extraction, "extraction_admission", admission)
+        monkeypatch.setattr(extraction, "extraction_cache", ExtractionCache(cache_dir=None, enabled=False))
+        monkeypatch.setattr(tempfile, "tempdir", str(tmp_path))
+        before = extraction_cancellations_total.value(reason="deadline")
+
+        response = client.post(
+            "/extract-pdf",
+            files={"file": ("meeting.pdf", sample_pdf, "application/pdf")},
+            data={"extraction_mode": "fast", "deadline_seconds": "0.2"}
+        )
+
+        assert response.status_code == 504
+        assert "deadline" in response.json()["detail"]
+        assert pool.cancelled is True
+        assert admission.stats()["in_use"] == 0
+        assert os.listdir(tmp_path) == []
+        assert extraction_cancellations_total.value(reason="deadline") == before + 1
+
+    def test_extract_invalid_deadline(self, client):
+        """Test a non-positive deadline_seconds is rejected."""
+        response = client.post(
+            "/extract-pdf",
+            files={"file": ("test.pdf", b"%PDF-1.4 test", "application/pdf")},
+            data={"deadline_seconds": "0"}
+        )
+
+        assert response.status_code == 400
+        assert "deadline_seconds" in response.json()["detail"]
+
+    def test_batch_deadline_per_file(self, client, monkeypatch, sample_pdf):
+        """Test a file exceeding the deadline fails on its own in a batch."""
+        from app.api.routes import extraction
+        from app.services.extraction_cache import ExtractionCache
+
+        monkeypatch.setattr(extraction, "extraction_pool", StalledPool())
+        monkeypatch.setattr(extraction, "extraction_cache", ExtractionCache(cache_dir=None, enabled=False))
+
+        response = client.post(
+            "/extract-pdf/batch",
+            files=[("files", ("meeting.pdf", sample_pdf, "application/pdf"))],
+            data={"extraction_mode": "fast", "deadline_seconds": "0.2"}
+        )
+
+        assert response.status_code == 200
+        result = response.json()["results"][0]
+        assert result["success"] is False
+        assert "deadline" in result["error"]
+
+    def test_stream_deadline_exceeded(self, client, monkeypatch, sample_pdf):
+        """Test a stream past deadline_seconds ends with an error line."""
+        from app.api.routes import extraction
+        from app.services.extraction_cache import ExtractionCache
+
+        pool = StalledPool()
+        monkeypatch.setattr(extraction, "extraction_pool", pool)
+        monkeypatch.setattr(extraction, "extraction_cache", ExtractionCache(cache_dir=None, enabled=False))
+
+        response = client.post(
+            "/extract-pdf/stream",
+            files={"file": ("meeting.pdf", sample_pdf, "application/pdf")},
+            data={"extraction_mode": "fast", "deadline_seconds": "0.2"}
+        )
+
+        assert response.status_code == 200
+        lines = [json.loads(line) for line in response.text.splitlines()]
+        assert lines[-1]["type"] == "error"
+        assert "deadline" in lines[-1]["detail"]
+        assert pool.cancelled is True
+
+    @pytest.mark.asyncio
+    async def test_client_disconnect_cancels_work(self, monkeypatch):
+        """Test work is cancelled with 499 once the client disconnects."""
+        from fastapi import HTTPException
+
+        from app.api.routes import extraction
+        from app.services.metrics import extraction_cancellations_total
+
+        monkeypatch.setattr(extraction, "DISCONNECT_POLL_SECONDS", 0.01)
+        before = extraction_cancellations_total.value(reason="client_disconnect")
+        cancelled = asyncio.Event()
+
+        async def work():
+            try:
+                await asyncio.sleep(60)
+            except asyncio.CancelledError:
+                cancelled.set()
+                raise
+
+        with pytest.raises(HTTPException) as error:
+            await extraction._run_cancellable(DisconnectedRequest(), work(), None)
+
+        assert error.value.status_code == 499
+        assert cancelled.is_set()
+        assert extraction_cancellations_total.value(reason="client_disconnect") == before + 1
+
+    @pytest.mark.asyncio
+    async def test_result_returned_before_disconnect(self):
+        """Test work finishing first returns its result."""
+        from app.api.routes import extraction
+
+        async def work():
+            return 42
+
+        assert await extraction._run_cancellable(DisconnectedRequest(), work(), 10) == 42
+
+
+class TestExtractionJobEndpoints:
+    """Tests for the asynchronous extraction job endpoints."""
+
+    def test_job_result_matches_full_response(self, monkeypatch, sample_pdf):
+        """Test a submitted job completes with the same result as /extract-pdf."""
+        import time
+
+        from app.api.routes import extraction
+        from app.main import app
+        from app.services.extraction_cache import ExtractionCache
+        from app.services.extraction_jobs import ExtractionJobs
+
+        monkeypatch.setattr(extraction, "extraction_cache", ExtractionCache(cache_dir=None, enabled=False))
+        monkeypatch.setattr(extraction, "extraction_jobs", ExtractionJobs())
+        data = {"extraction_mode": "fast", "chunk_size": "100", "chunk_overlap": "20"}
+        files = {"file": ("meeting.pdf", sample_pdf, "application/pdf")}
+
+        with TestClient(app) as client:
+            expected = client.post("/extract-pdf", files=files, data=data).json()
+
+            response = client.post("/extract-pdf/jobs", files=files, data=data)
+            assert response.status_code == 202
+            job = response.json()
+            assert job["total_pages"] == 3
+
+            for _ in range(200):
+                job = client.get(f"/extract-pdf/jobs/{job['job_id']}").json()
+                if job["status"] == "completed":
+                    break
+                time.sleep(0.05)
+
+            assert job["status"] == "completed"
+            assert job["pages_done"] == 3
+
+            result = client.get(f"/extract-pdf/jobs/{job['job_id']}/result").json()
+            assert result["chunks"] == expected["chunks"]
+            assert result["total_pages"] == 3
+
+            # Resubmitting returns the finished job instead of extracting again
+            retry = client.post("/extract-pdf/jobs", files=files, data=data).json()
+            assert retry["job_id"] == job["job_id"]
+            assert retry["status"] == "completed"
+
+    def test_unknown_job(self, client):
+        """Test unknown job ids return 404."""
+        assert client.get("/extract-pdf/jobs/missing").status_code == 404
+        assert client.get("/extract-pdf/jobs/missing/result").status_code == 404
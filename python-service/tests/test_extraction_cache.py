@@ -0,0 +1,137 @@
+import json
+import os
+
+import pytest
+from app.services.extraction_cache import ExtractionCache
+
+
+def make_result(text: str) -> dict:
+    return {
+        "text": text,
+        "page_boundaries": [(0, len(text) + 1)],
+        "total_pages": 1,
+        "ocr_applied": False,
+        "processing_time_ms": 1234
+    }
+
+
+class TestExtractionCache:
+    """Tests for the ExtractionCache service."""
+
+    def test_hash_bytes(self):
+        """Test cache keys are SHA-256 hex digests of the content."""
+        key = ExtractionCache.hash_bytes(b"%PDF-1.4 test")
+        assert len(key) == 64
+        assert key == ExtractionCache.hash_bytes(b"%PDF-1.4 test")
+        assert key != ExtractionCache.hash_bytes(b"%PDF-1.4 other")
+
+    def test_make_key(self):
+        """Test extraction parameters are folded into the cache key."""
+        assert ExtractionCache.make_key("abc") == f"abc-v{ExtractionCache.FORMAT_VERSION}"
+        assert ExtractionCache.make_key("abc", mode="fast") == f"abc-v{ExtractionCache.FORMAT_VERSION}-mode=fast"
+        assert ExtractionCache.make_key("abc", mode="fast") != ExtractionCache.make_key("abc", mode="unstructured")
+
+    def test_settings_change_misses(self, tmp_path):
+        """Test changing an output-affecting extractor setting misses the cache."""
+        from app.services.pdf_extractor import PDFExtractor
+
+        cache = ExtractionCache(cache_dir=str(tmp_path))
+        content_hash = ExtractionCache.hash_bytes(b"%PDF-1.4 test")
+        cache.put(
+            ExtractionCache.make_key(content_hash, **PDFExtractor(mode="fast", ocr_dpi=200).cache_params()),
+            make_result("Hello")
+        )
+
+        assert cache.get(ExtractionCache.make_key(content_hash, **PDFExtractor(mode="fast", ocr_dpi=200).cache_params())) is not None
+        assert cache.get(ExtractionCache.make_key(content_hash, **PDFExtractor(mode="fast", ocr_dpi=300).cache_params())) is None
+        assert cache.get(ExtractionCache.make_key(
+            content_hash, **PDFExtractor(mode="fast", ocr_dpi=200, text_layer_min_chars=50).cache_params()
+        )) is None
+
+    def test_miss_then_hit(self, tmp_path):
+        """Test a stored result is returned with only the cached fields."""
+        cache = ExtractionCache(cache_dir=str(tmp_path))
+        assert cache.get("abc") is None
+
+        cache.put("abc", make_result("Hello world"))
+        cached = cache.get("abc")
+
+        assert cached["text"] == "Hello world"
+        assert cached["page_boundaries"] == [(0, 12)]
+        assert cached["total_pages"] == 1
+        assert cached["ocr_applied"] is False
+        assert "processing_time_ms" not in cached
+
+    def test_disk_tier_survives_restart(self, tmp_path):
+        """Test entries are reloaded from disk by a fresh cache instance."""
+        ExtractionCache(cache_dir=str(tmp_path)).put("abc", make_result("Hello"))
+
+        cache = ExtractionCache(cache_dir=str(tmp_path))
+        assert cache.get("abc")["text"] == "Hello"
+
+    def test_memory_lru_eviction(self):
+        """Test the memory tier evicts least recently used entries first."""
+        result = make_result("x" * 10)
+        entry_size = len(json.dumps(
+            {field: result[field] for field in ExtractionCache.CACHED_FIELDS if field in result}
+        ).encode("utf-8"))
+        cache = ExtractionCache(cache_dir=None, max_memory_bytes=entry_size * 2)
+
+        cache.put("a", make_result("x" * 10))
+        cache.put("b", make_result("x" * 10))
+        cache.get("a")
+        cache.put("c", make_result("x" * 10))
+
+        assert cache.get("a") is not None
+        assert cache.get("b") is None
+        assert cache.get("c") is not None
+
+    def test_disk_eviction(self, tmp_path):
+        """Test the disk tier is kept within its size budget."""
+        cache = ExtractionCache(cache_dir=str(tmp_path), max_memory_bytes=0, max_disk_bytes=300)
+
+        for key in ("a", "b", "c", "d"):
+            cache.put(key, make_result("x" * 50))
+
+        total = sum(
+            os.path.getsize(os.path.join(tmp_path, name))
+            for name in os.listdir(tmp_path)
+        )
+        assert total <= 300
+        assert cache.get("d") is not None
+
+    def test_page_entries(self, tmp_path):
+        """Test pages are cached without their page number under page keys."""
+        cache = ExtractionCache(cache_dir=str(tmp_path))
+        key = ExtractionCache.make_page_key("a" * 64, mode="fast")
+        page = {
+            "page_number": 4,
+            "text": "Roll call",
+            "ocr_applied": True,
+            "elapsed_ms": 812,
+            "stage_timings_ms": {"ocr": 811.5},
+            "elements": [(0, 9, "Title")]
+        }
+        cache.put_page(key, page)
+
+        assert key != ExtractionCache.make_key("a" * 64, mode="fast")
+        assert cache.get_page(key) == {"text": "Roll call", "ocr_applied": True, "elements": [[0, 9, "Title"]]}
+        assert ExtractionCache(cache_dir=str(tmp_path)).get_page(key) is not None
+        assert cache.get_page(ExtractionCache.make_page_key("b" * 64, mode="fast")) is None
+
+    def test_disabled(self, tmp_path):
+        """Test a disabled cache never stores or returns entries."""
+        cache = ExtractionCache(cache_dir=str(tmp_path), enabled=False)
+        cache.put("abc", make_result("Hello"))
+
+        assert cache.get("abc") is None
+        assert os.listdir(tmp_path) == []
+
+    def test_clear(self, tmp_path):
+        """Test clear removes entries from both tiers."""
+        cache = ExtractionCache(cache_dir=str(tmp_path))
+        cache.put("abc", make_result("Hello"))
+        cache.clear()
+
+        assert cache.get("abc") is None
+        assert os.listdir(tmp_path) == []
@@ -0,0 +1,103 @@
+import asyncio
+
+import pytest
+from app.services.extraction_jobs import (
+    ExtractionJobs,
+    InMemoryJobStore,
+    COMPLETED,
+    FAILED
+)
+
+
+async def wait_for(jobs: ExtractionJobs, job_id: str, status: str) -> dict:
+    for _ in range(100):
+        job = jobs.get(job_id)
+        if job["status"] == status:
+            return job
+        await asyncio.sleep(0.01)
+    raise AssertionError(f"job did not reach {status}")
+
+
+class TestExtractionJobs:
+    """Tests for the ExtractionJobs service."""
+
+    @pytest.mark.asyncio
+    async def test_job_completes_with_progress(self):
+        """Test a job reports page progress and keeps its result."""
+        jobs = ExtractionJobs(result_ttl_seconds=60)
+
+        async def work(progress):
+            for pages_done in range(1, 4):
+                progress(pages_done)
+            return {"text": "done"}
+
+        job = jobs.submit("key", work, total_pages=3)
+        job = await wait_for(jobs, job["job_id"], COMPLETED)
+
+        assert job["pages_done"] == 3
+        assert job["total_pages"] == 3
+        assert job["result"] == {"text": "done"}
+        assert job["expires_at"] == pytest.approx(job["finished_at"] + 60)
+
+    @pytest.mark.asyncio
+    async def test_failed_job(self):
+        """Test errors raised by the work mark the job as failed."""
+        jobs = ExtractionJobs()
+
+        async def work(progress):
+            raise RuntimeError("broken PDF")
+
+        job = jobs.submit("key", work)
+        job = await wait_for(jobs, job["job_id"], FAILED)
+
+        assert job["error"] == "broken PDF"
+        assert job["result"] is None
+
+    @pytest.mark.asyncio
+    async def test_resubmit_reuses_job(self):
+        """Test resubmitting the same key returns the existing job."""
+        jobs = ExtractionJobs()
+        calls = []
+
+        async def work(progress):
+            calls.append(1)
+            return {}
+
+        first = jobs.submit("key", work)
+        await wait_for(jobs, first["job_id"], COMPLETED)
+        second = jobs.submit("key", work)
+
+        assert second["job_id"] == first["job_id"]
+        assert calls == [1]
+
+    @pytest.mark.asyncio
+    async def test_resubmit_after_failure_retries(self):
+        """Test a failed job is started again on resubmission."""
+        jobs = ExtractionJobs()
+
+        async def fail(progress):
+            raise RuntimeError("transient")
+
+        async def succeed(progress):
+            return {}
+
+        first = jobs.submit("key", fail)
+        await wait_for(jobs, first["job_id"], FAILED)
+        second = jobs.submit("key", succeed)
+
+        assert second["job_id"] != first["job_id"]
+        await wait_for(jobs, second["job_id"], COMPLETED)
+
+    @pytest.mark.asyncio
+    async def test_result_retention(self):
+        """Test finished jobs are purged once their retention expires."""
+        jobs = ExtractionJobs(store=InMemoryJobStore(), result_ttl_seconds=0)
+
+        async def work(progress):
+            return {}
+
+        job = jobs.submit("key", work)
+        await asyncio.sleep(0.05)
+
+        assert jobs.get(job["job_id"]) is None
+        assert jobs.store.find("key") is None
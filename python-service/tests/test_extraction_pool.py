@@ -0,0 +1,285 @@
+import asyncio
+import functools
+import os
+import time
+from concurrent.futures.process import BrokenProcessPool
+
+import pytest
+from app.services.extraction_pool import ExtractionPool
+
+
+def crash_worker():
+    """Terminate the worker process abruptly, like an OOM kill."""
+    os._exit(1)
+
+
+def crash_after_first_item():
+    """Yield one item, then terminate the worker process abruptly."""
+    yield 1
+    os._exit(1)
+
+
+def mark_warm(directory):
+    """Record the warmed-up worker's pid as a file in directory."""
+    open(os.path.join(directory, str(os.getpid())), "w").close()
+    os.environ["TTMM_TEST_WARM"] = "1"
+
+
+def fail_warm_up():
+    """Warm-up that fails, e.g. because a dependency cannot be imported."""
+    raise ImportError("no module named unstructured")
+
+
+def slow_range(n, delay):
+    """Yield range(n), sleeping before each item."""
+    import time
+
+    for item in range(n):
+        time.sleep(delay)
+        yield item
+
+
+def run_subprocess(seconds):
+    """Wait for a subprocess, like an OCR task waiting for tesseract."""
+    import subprocess
+
+    return subprocess.run(["sleep", str(seconds)]).returncode
+
+
+class TestExtractionPool:
+    """Tests for the ExtractionPool service."""
+
+    def test_init_invalid_values(self):
+        """Test pool rejects non-positive sizes."""
+        with pytest.raises(ValueError):
+            ExtractionPool(max_workers=0)
+        with pytest.raises(ValueError):
+            ExtractionPool(max_concurrency=0)
+
+    @pytest.mark.asyncio
+    async def test_run_in_worker(self):
+        """Test work is executed in the pool and its result returned."""
+        pool = ExtractionPool(max_workers=1, max_concurrency=1)
+        try:
+            assert await pool.run(pow, 2, 10) == 1024
+        finally:
+            pool.shutdown()
+
+    @pytest.mark.asyncio
+    async def test_worker_env(self):
+        """Test worker_env is applied in the workers but not in this process."""
+        pool = ExtractionPool(max_workers=1, max_concurrency=1, worker_env={"TTMM_TEST_ENV": "1"})
+        try:
+            assert await pool.run(os.getenv, "TTMM_TEST_ENV") == "1"
+            assert os.getenv("TTMM_TEST_ENV") is None
+        finally:
+            pool.shutdown()
+
+    @pytest.mark.asyncio
+    async def test_queue_depth(self):
+        """Test callers beyond the concurrency limit are reported as queued."""
+        pool = ExtractionPool(max_workers=1, max_concurrency=1)
+        try:
+            tasks = [asyncio.create_task(pool.run(sum, [i, 1])) for i in range(3)]
+            await asyncio.sleep(0)
+
+            stats = pool.stats()
+            assert stats["in_flight"] == 1
+            assert stats["queued"] == 2
+
+            assert await asyncio.gather(*tasks) == [1, 2, 3]
+            assert pool.stats()["in_flight"] == 0
+            assert pool.stats()["queued"] == 0
+        finally:
+            pool.shutdown()
+
+    @pytest.mark.asyncio
+    async def test_recovers_from_dead_worker(self):
+        """Test a job after a worker died runs in a fresh pool."""
+        pool = ExtractionPool(max_workers=1, max_concurrency=1)
+        try:
+            with pytest.raises(BrokenProcessPool):
+                await pool.run(crash_worker)
+
+            assert await pool.run(pow, 2, 10) == 1024
+            assert pool.stats()["in_flight"] == 0
+        finally:
+            pool.shutdown()
+
+    @pytest.mark.asyncio
+    async def test_dead_worker_replaced_by_spare(self):
+        """Test a dead worker's place is taken by the warm spare."""
+        pool = ExtractionPool(max_workers=1, max_concurrency=1, spare_workers=1)
+        try:
+            await pool.warm_up()
+            spare_pid = await pool._spares[0].warming
+            with pytest.raises(BrokenProcessPool):
+                await pool.run(crash_worker)
+
+            assert await pool.run(os.getpid) == spare_pid
+            assert pool.stats()["recycled_workers"] == 1
+            assert pool.stats()["spare_workers"] == 1
+        finally:
+            pool.shutdown()
+
+    @pytest.mark.asyncio
+    async def test_recycle_after_max_tasks(self):
+        """Test a worker is replaced after max_tasks_per_worker tasks."""
+        pool = ExtractionPool(max_workers=1, max_concurrency=1, max_tasks_per_worker=2)
+        try:
+            pids = [await pool.run(os.getpid) for _ in range(4)]
+
+            assert pids[0] == pids[1] != pids[2] == pids[3]
+            assert pool.stats()["recycled_workers"] == 2
+        finally:
+            pool.shutdown()
+
+    @pytest.mark.asyncio
+    async def test_recycle_over_rss_ceiling(self):
+        """Test a worker whose RSS passes max_rss_bytes is replaced after its task."""
+        pool = ExtractionPool(max_workers=1, max_concurrency=1, max_rss_bytes=1, spare_workers=1)
+        try:
+            first = await pool.run(os.getpid)
+            assert [item async for item in pool.stream(slow_range, 2, 0)] == [0, 1]
+            second = await pool.run(os.getpid)
+
+            assert first != second
+            assert pool.stats()["recycled_workers"] == 3
+        finally:
+            pool.shutdown()
+
+    @pytest.mark.asyncio
+    async def test_worker_stats(self):
+        """Test stats report each worker's pid, task count and RSS."""
+        pool = ExtractionPool(max_workers=2, max_concurrency=2)
+        try:
+            pid = await pool.run(os.getpid)
+            workers = pool.stats()["workers"]
+
+            assert [worker["worker"] for worker in workers] == [0, 1]
+            assert workers[0] == {"worker": 0, "pid": pid, "tasks": 1, "rss_bytes": workers[0]["rss_bytes"]}
+            assert workers[0]["rss_bytes"] > 0
+            assert workers[1]["tasks"] == 0
+        finally:
+            pool.shutdown()
+
+    @pytest.mark.asyncio
+    async def test_stream_items(self):
+        """Test items of a generator run in a worker are streamed back in order."""
+        pool = ExtractionPool(max_workers=1, max_concurrency=1)
+        try:
+            items = [item async for item in pool.stream(range, 5)]
+            assert items == [0, 1, 2, 3, 4]
+            assert pool.stats()["in_flight"] == 0
+        finally:
+            pool.shutdown()
+
+    @pytest.mark.asyncio
+    async def test_stream_error(self):
+        """Test errors raised in the worker are re-raised to the consumer."""
+        pool = ExtractionPool(max_workers=1, max_concurrency=1)
+        try:
+            with pytest.raises(TypeError):
+                async for _ in pool.stream(iter, 5):
+                    pass
+            assert pool.stats()["in_flight"] == 0
+        finally:
+            pool.shutdown()
+
+    @pytest.mark.asyncio
+    async def test_stream_dead_worker(self):
+        """Test a worker dying mid-stream raises instead of hanging."""
+        pool = ExtractionPool(max_workers=1, max_concurrency=1)
+        try:
+            items = []
+            with pytest.raises(BrokenProcessPool):
+                async with asyncio.timeout(30):
+                    async for item in pool.stream(crash_after_first_item):
+                        items.append(item)
+
+            assert pool.stats()["in_flight"] == 0
+            assert await pool.run(pow, 2, 10) == 1024
+        finally:
+            pool.shutdown()
+
+    @pytest.mark.asyncio
+    async def test_stream_early_close_holds_slot(self):
+        """Test a consumer stopping early keeps the slot until the worker finishes."""
+        pool = ExtractionPool(max_workers=1, max_concurrency=1)
+        try:
+            stream = pool.stream(slow_range, 5, 0.1)
+            assert await stream.__anext__() == 0
+            await stream.aclose()
+
+            assert pool.stats()["in_flight"] == 1
+            assert await pool.run(pow, 2, 10) == 1024
+            assert pool.stats()["in_flight"] == 0
+        finally:
+            pool.shutdown()
+
+    @pytest.mark.asyncio
+    async def test_stream_early_close_stops_worker(self):
+        """Test a consumer stopping early stops the generator in the worker."""
+        pool = ExtractionPool(max_workers=1, max_concurrency=1)
+        try:
+            stream = pool.stream(slow_range, 100, 0.1)
+            assert await stream.__anext__() == 0
+            start = time.monotonic()
+            await stream.aclose()
+
+            assert await pool.run(pow, 2, 10) == 1024
+            assert time.monotonic() - start < 5
+        finally:
+            pool.shutdown()
+
+    @pytest.mark.asyncio
+    async def test_cancel_run_kills_subprocesses(self):
+        """Test cancelling run() kills the worker's subprocesses and frees its slot."""
+        pool = ExtractionPool(max_workers=1, max_concurrency=1)
+        try:
+            task = asyncio.ensure_future(pool.run(run_subprocess, 60))
+            await asyncio.sleep(1)
+            task.cancel()
+            with pytest.raises(asyncio.CancelledError):
+                await task
+
+            assert pool.stats()["in_flight"] == 1
+            async with asyncio.timeout(10):
+                assert await pool.run(pow, 2, 10) == 1024
+            assert pool.stats()["in_flight"] == 0
+        finally:
+            pool.shutdown()
+
+    @pytest.mark.asyncio
+    async def test_warm_up_every_worker(self, tmp_path):
+        """Test warm_up starts every worker, runs worker_warm_up in each and marks the pool ready."""
+        pool = ExtractionPool(
+            max_workers=2,
+            max_concurrency=2,
+            worker_warm_up=functools.partial(mark_warm, str(tmp_path))
+        )
+        try:
+            assert pool.ready is False
+            await pool.warm_up()
+
+            assert pool.ready is True
+            assert len(os.listdir(tmp_path)) == 2
+            assert await pool.run(os.getenv, "TTMM_TEST_WARM") == "1"
+        finally:
+            pool.shutdown()
+
+    @pytest.mark.asyncio
+    async def test_warm_up_failure(self):
+        """Test a failing warm-up is reported and leaves the pool not ready."""
+        pool = ExtractionPool(max_workers=1, max_concurrency=1, worker_warm_up=fail_warm_up)
+        try:
+            await pool.warm_up()
+
+            assert pool.ready is False
+            assert pool.warm_up_error is not None
+        finally:
+            pool.shutdown()
+
+    def test_ready_without_warm_up(self):
+        """Test a pool without worker_warm_up is ready right away."""
+        assert ExtractionPool(max_workers=1, max_concurrency=1).ready is True
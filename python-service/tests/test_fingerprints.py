@@ -0,0 +1,146 @@
+from app.services.fingerprints import (
+    MINHASH_SIZE,
+    ChunkDeduplicator,
+    FingerprintIndex,
+    fingerprint,
+    minhash,
+    normalize,
+    similarity
+)
+from app.services.text_chunker import ChunkRecord
+
+FOOTER = (
+    "Confidential. These minutes are a draft until approved by the committee at its next "
+    "regular meeting and must not be circulated outside the membership without consent."
+)
+
+AGENDA = (
+    "The committee reviewed the quarterly budget, approved the parks maintenance contract "
+    "and asked staff to report back on the library renovation schedule in March."
+)
+
+
+def make_records(texts):
+    return [ChunkRecord(i, text, 0, len(text), [1], False, False) for i, text in enumerate(texts)]
+
+
+class TestFingerprints:
+    """Tests for chunk fingerprint functions."""
+
+    def test_fingerprint_ignores_case_and_whitespace(self):
+        """Test formatting differences do not change fingerprints."""
+        assert fingerprint("Roll  call:\nALL present") == fingerprint("roll call: all present")
+        assert fingerprint("Roll call: all present") != fingerprint("Roll call: two absent")
+
+    def test_similarity(self):
+        """Test near-identical texts get similar sketches and unrelated texts dissimilar ones."""
+        edited = FOOTER.replace("next regular", "next")
+
+        assert similarity(minhash(normalize(FOOTER)), minhash(normalize(FOOTER))) == 1.0
+        assert similarity(minhash(normalize(FOOTER)), minhash(normalize(edited))) >= 0.5
+        assert similarity(minhash(normalize(FOOTER)), minhash(normalize(AGENDA))) == 0.0
+
+    def test_minhash_short_text(self):
+        """Test texts shorter than a shingle and empty texts are sketched."""
+        assert minhash("") == ()
+        assert len(minhash("adjourned")) == 1
+        assert len(minhash(normalize(AGENDA))) == MINHASH_SIZE
+        assert similarity((), ()) == 1.0
+
+
+class TestChunkDeduplicator:
+    """Tests for the ChunkDeduplicator service."""
+
+    def test_flags_repeats_within_document(self):
+        """Test a chunk repeating an earlier one points at it."""
+        records = make_records([FOOTER, AGENDA, FOOTER.upper()])
+        deduplicator = ChunkDeduplicator("doc")
+
+        unique = deduplicator.add(records)
+
+        assert unique == records[:2]
+        assert records[0].fingerprint["duplicate_of"] is None
+        assert records[2].fingerprint["duplicate_of"] == 0
+        assert records[2].fingerprint["content_hash"] == records[0].fingerprint["content_hash"]
+        assert len(records[0].fingerprint["minhash"]) == MINHASH_SIZE
+        assert deduplicator.duplicates == 1
+
+    def test_flags_near_repeats(self):
+        """Test chunks at least threshold similar count as repeats."""
+        near = FOOTER.replace("Confidential.", "Confidential:")
+        records = make_records([FOOTER, AGENDA, near])
+
+        unique = ChunkDeduplicator("doc", threshold=0.5).add(records)
+
+        assert records[2].fingerprint["duplicate_of"] == 0
+        assert unique == records[:2]
+
+    def test_threshold_one_matches_exact_text_only(self):
+        """Test a threshold of 1 only treats identical normalized text as repeats."""
+        near = FOOTER.replace("Confidential.", "Confidential:")
+
+        assert len(ChunkDeduplicator("doc", threshold=1).add(make_records([FOOTER, near]))) == 2
+
+    def test_seen_in_other_document(self):
+        """Test chunks indexed from another document are flagged as seen before."""
+        index = FingerprintIndex()
+        first = ChunkDeduplicator("doc-1", index)
+        first.add(make_records([FOOTER, AGENDA]))
+        first.finish()
+
+        records = make_records(["A new motion on the harbour dredging permit was tabled.", FOOTER])
+        unique = ChunkDeduplicator("doc-2", index).add(records)
+
+        assert [record.fingerprint["seen_before"] for record in records] == [False, True]
+        assert unique == records[:1]
+
+    def test_same_document_not_seen_before(self):
+        """Test re-processing a document does not match its own indexed chunks."""
+        index = FingerprintIndex()
+        for _ in range(2):
+            deduplicator = ChunkDeduplicator("doc", index)
+            records = make_records([FOOTER, AGENDA])
+            deduplicator.add(records)
+            deduplicator.finish()
+
+        assert [record.fingerprint["seen_before"] for record in records] == [False, False]
+
+
+class TestFingerprintIndex:
+    """Tests for the FingerprintIndex service."""
+
+    def test_persists_to_file(self, tmp_path):
+        """Test fingerprints survive reopening the index."""
+        path = str(tmp_path / "fingerprints.sqlite3")
+        index = FingerprintIndex(path=path)
+        index.add([fingerprint(FOOTER)], "doc-1")
+        index.close()
+
+        reopened = FingerprintIndex(path=path)
+        assert reopened.seen_elsewhere([fingerprint(FOOTER), fingerprint(AGENDA)], "doc-2") == [True, False]
+        reopened.close()
+
+    def test_near_match(self):
+        """Test a sketch at least threshold similar to an indexed one matches."""
+        index = FingerprintIndex(threshold=0.8)
+        sketch = tuple(range(1, MINHASH_SIZE + 1))
+        index.add([("a" * 32, sketch)], "doc-1")
+
+        near = sketch[:-1] + (MINHASH_SIZE + 1,)
+        distant = tuple(range(100, 100 + MINHASH_SIZE))
+        assert index.seen_elsewhere([("b" * 32, near), ("c" * 32, distant)], "doc-2") == [True, False]
+
+    def test_max_entries(self):
+        """Test the oldest entries are dropped beyond max_entries."""
+        index = FingerprintIndex(max_entries=2)
+        for i in range(3):
+            index.add([(f"{i:032x}", (i,))], f"doc-{i}")
+
+        assert index.seen_elsewhere([(f"{i:032x}", (i,)) for i in range(3)], "other") == [False, True, True]
+
+    def test_disabled(self):
+        """Test a disabled index records and finds nothing."""
+        index = FingerprintIndex(enabled=False)
+        index.add([fingerprint(FOOTER)], "doc-1")
+
+        assert index.seen_elsewhere([fingerprint(FOOTER)], "doc-2") == [False]
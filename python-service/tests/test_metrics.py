@@ -0,0 +1,69 @@
+import pytest
+from app.services.metrics import Counter, Gauge, Histogram, MetricsRegistry
+
+
+class TestMetrics:
+    """Tests for the metrics registry and its Prometheus rendering."""
+
+    def test_counter(self):
+        """Test counters accumulate per label set."""
+        counter = Counter("docs_total", "Documents.", label_names=("ocr",))
+        counter.inc(ocr="true")
+        counter.inc(2, ocr="false")
+        counter.inc(ocr="false")
+
+        assert counter.value(ocr="true") == 1
+        assert counter.value(ocr="false") == 3
+        assert counter.render() == [
+            "# HELP docs_total Documents.",
+            "# TYPE docs_total counter",
+            'docs_total{ocr="false"} 3',
+            'docs_total{ocr="true"} 1'
+        ]
+
+    def test_counter_rejects_wrong_labels(self):
+        """Test observations must carry exactly the declared labels."""
+        counter = Counter("docs_total", "Documents.", label_names=("ocr",))
+        with pytest.raises(ValueError):
+            counter.inc()
+        with pytest.raises(ValueError):
+            counter.inc(ocr="true", mode="fast")
+
+    def test_histogram_buckets(self):
+        """Test histogram buckets are cumulative and end with +Inf."""
+        histogram = Histogram("stage_seconds", "Stages.", label_names=("stage",), buckets=(0.1, 1))
+        histogram.observe(0.05, stage="ocr")
+        histogram.observe(0.5, stage="ocr")
+        histogram.observe(5, stage="ocr")
+
+        assert histogram.count(stage="ocr") == 3
+        assert histogram.render()[2:] == [
+            'stage_seconds_bucket{stage="ocr",le="0.1"} 1',
+            'stage_seconds_bucket{stage="ocr",le="1"} 2',
+            'stage_seconds_bucket{stage="ocr",le="+Inf"} 3',
+            'stage_seconds_sum{stage="ocr"} 5.55',
+            'stage_seconds_count{stage="ocr"} 3'
+        ]
+
+    def test_histogram_time(self):
+        """Test the timing context manager records one observation."""
+        histogram = Histogram("stage_seconds", "Stages.", label_names=("stage",))
+        with histogram.time(stage="chunking"):
+            pass
+
+        assert histogram.count(stage="chunking") == 1
+
+    def test_labelled_gauge(self):
+        """Test a gauge with labels renders one sample per label value."""
+        gauge = Gauge("rss_bytes", "RSS.", lambda: {("1",): 20, ("0",): 10}, label_names=("worker",))
+
+        assert gauge.render()[2:] == ['rss_bytes{worker="0"} 10', 'rss_bytes{worker="1"} 20']
+
+    def test_registry(self):
+        """Test the registry renders every metric and rejects duplicates."""
+        registry = MetricsRegistry()
+        registry.register(Gauge("in_flight", "In flight.", lambda: 2))
+
+        with pytest.raises(ValueError):
+            registry.register(Gauge("in_flight", "In flight.", lambda: 0))
+        assert registry.render() == "# HELP in_flight In flight.\n# TYPE in_flight gauge\nin_flight 2\n"
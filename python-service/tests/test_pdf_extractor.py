@@ -0,0 +1,296 @@
+import io
+import sys
+import types
+
+import pytest
+from app.services.pdf_extractor import PDFExtractor, format_page_ranges, parse_page_ranges, to_page_ranges
+
+from tests.conftest import build_pdf
+
+
+class FakeElement:
+    """Stand-in for an unstructured element."""
+
+    def __init__(self, text, category="NarrativeText"):
+        self.text = text
+        self.category = category
+        self.metadata = None
+
+    def __str__(self):
+        return self.text
+
+
+def fake_partition_pdf(filename, **kwargs):
+    """partition_pdf stand-in returning each page's text layer as one element."""
+    from pypdf import PdfReader
+
+    elements = []
+    for page in PdfReader(filename).pages:
+        if elements:
+            elements.append(FakeElement("", "PageBreak"))
+        elements.append(FakeElement(page.extract_text().strip()))
+    return elements
+
+
+class TestPDFExtractor:
+    """Tests for the PDFExtractor service."""
+
+    def test_init_invalid_mode(self):
+        """Test extractor rejects unknown modes."""
+        with pytest.raises(ValueError):
+            PDFExtractor(mode="magic")
+
+    def test_fast_extracts_text_layer(self, sample_pdf, sample_pdf_pages):
+        """Test fast mode reads each page's embedded text layer."""
+        extractor = PDFExtractor(mode="fast")
+        result = extractor.extract_from_bytes(sample_pdf, "sample.pdf")
+
+        assert result["text"] == "\n".join(sample_pdf_pages)
+        assert result["total_pages"] == 3
+        assert result["ocr_applied"] is False
+        assert result["page_ocr_applied"] == [False, False, False]
+        assert result["extractor"] == "pypdf"
+        assert result["processing_time_ms"] >= 0
+
+    def test_fast_page_boundaries(self, sample_pdf, sample_pdf_pages):
+        """Test fast mode page boundaries follow the unstructured convention."""
+        extractor = PDFExtractor(mode="fast")
+        result = extractor.extract_from_bytes(sample_pdf, "sample.pdf")
+
+        position = 0
+        for page_text, (start, end) in zip(sample_pdf_pages, result["page_boundaries"]):
+            assert start == position
+            assert end == start + len(page_text) + 1
+            assert result["text"][start:end - 1] == page_text
+            position = end
+
+    def test_probe(self, sample_pdf):
+        """Test probe reports page count and whether OCR is likely for the mode."""
+        with PDFExtractor._temporary_file(sample_pdf) as path:
+            probe = PDFExtractor(mode="fast").probe(path)
+            assert probe["total_pages"] == 3
+            assert probe["pages"][0] == {"page_number": 1, "text_layer": True, "image_coverage": 0.0}
+            assert (probe["text_layer"], probe["ocr_likely"], probe["ocr_pages"]) == (True, False, 0)
+            assert probe["recommended_mode"] == "fast"
+            assert probe["error"] is None
+            assert PDFExtractor(mode="ocr").probe(path)["ocr_pages"] == 3
+
+        with PDFExtractor._temporary_file(build_pdf(["", ""])) as path:
+            probe = PDFExtractor(mode="fast").probe(path)
+            assert (probe["total_pages"], probe["text_layer"], probe["ocr_likely"]) == (2, False, True)
+
+    def test_probe_scanned_pages(self):
+        """Test probe finds pages without a text layer and measures their image coverage."""
+        from benchmarks.corpus import scanned_pdf
+        from pypdf import PdfReader, PdfWriter
+
+        writer = PdfWriter()
+        for pdf in (build_pdf(["Minutes of the regular meeting of the parks committee."]), scanned_pdf(2, dpi=50)):
+            writer.append(PdfReader(io.BytesIO(pdf)))
+        output = io.BytesIO()
+        writer.write(output)
+
+        with PDFExtractor._temporary_file(output.getvalue()) as path:
+            probe = PDFExtractor(mode="fast", pages=[(2, 3)]).probe(path)
+            full = PDFExtractor(mode="fast").probe(path)
+
+        assert [page["text_layer"] for page in probe["pages"]] == [True, False, False]
+        assert [page["image_coverage"] for page in probe["pages"]] == [0.0, 1.0, 1.0]
+        assert (probe["selected_pages"], probe["ocr_pages"], probe["recommended_mode"]) == (2, 2, "ocr")
+        assert (full["ocr_pages"], full["recommended_mode"]) == (2, "fast")
+        assert probe["estimated_seconds"] > full["estimated_seconds"] / 2
+
+    def test_probe_unprocessable(self):
+        """Test probe reports why password protected and unreadable files cannot be extracted."""
+        from pypdf import PdfReader, PdfWriter
+
+        def encrypted(user_password):
+            writer = PdfWriter(clone_from=PdfReader(io.BytesIO(build_pdf(["Roll call: all members present."]))))
+            writer.encrypt(user_password=user_password, owner_password="owner")
+            output = io.BytesIO()
+            writer.write(output)
+            return output.getvalue()
+
+        with PDFExtractor._temporary_file(encrypted("secret")) as path:
+            probe = PDFExtractor(mode="fast").probe(path)
+            assert (probe["encrypted"], probe["error"]) == (True, "PDF is password protected")
+
+        with PDFExtractor._temporary_file(encrypted("")) as path:
+            probe = PDFExtractor(mode="fast").probe(path)
+            assert (probe["encrypted"], probe["error"], probe["text_layer"]) == (True, None, True)
+            assert PDFExtractor(mode="fast").extract(path)["text"] == "Roll call: all members present."
+
+        with PDFExtractor._temporary_file(b"%PDF-1.4 broken") as path:
+            assert PDFExtractor(mode="fast").probe(path)["error"] == "Not a readable PDF"
+
+    def test_fast_element_offsets(self, sample_pdf):
+        """Test fast mode reports one element per non-empty line, in document offsets."""
+        result = PDFExtractor(mode="fast").extract_from_bytes(sample_pdf, "sample.pdf")
+
+        assert result["elements"]
+        for element in result["elements"]:
+            content = result["text"][element["start"]:element["end"]]
+            assert content.strip()
+            assert "\n" not in content
+            assert element["category"] == "UncategorizedText"
+            start, end = result["page_boundaries"][element["page"] - 1]
+            assert start <= element["start"] and element["end"] < end
+
+    def test_fast_ocr_only_pages_without_text(self, monkeypatch, sample_pdf_pages):
+        """Test fast mode OCRs only pages lacking a usable text layer."""
+        pdf = build_pdf([sample_pdf_pages[0], "", sample_pdf_pages[2]])
+        ocr_calls = []
+
+        def fake_ocr(self, file_path, first_page, last_page):
+            ocr_calls.append((first_page, last_page))
+            return {page: ("Scanned page text", 5) for page in range(first_page, last_page + 1)}
+
+        monkeypatch.setattr(PDFExtractor, "_ocr_page_range", fake_ocr)
+        result = PDFExtractor(mode="fast").extract_from_bytes(pdf, "mixed.pdf")
+
+        assert ocr_calls == [(2, 2)]
+        assert result["ocr_applied"] is True
+        assert result["page_ocr_applied"] == [False, True, False]
+        assert "Scanned page text" in result["text"]
+        start, end = result["page_boundaries"][1]
+        assert result["text"][start:end - 1] == "Scanned page text"
+        assert result["page_timings_ms"][1] >= 5
+
+    def test_ocr_mode_stitches_pages_in_order(self, monkeypatch, sample_pdf):
+        """Test OCR mode splits pages into ranges and reassembles them in order."""
+        ocr_calls = []
+
+        def fake_ocr(self, file_path, first_page, last_page):
+            ocr_calls.append((first_page, last_page))
+            return {page: (f"Page {page} text", page) for page in range(first_page, last_page + 1)}
+
+        monkeypatch.setattr(PDFExtractor, "_ocr_page_range", fake_ocr)
+        extractor = PDFExtractor(mode="ocr", ocr_workers=2, ocr_pages_per_task=2)
+        result = extractor.extract_from_bytes(sample_pdf, "scanned.pdf")
+
+        assert sorted(ocr_calls) == [(1, 2), (3, 3)]
+        assert result["text"] == "Page 1 text\nPage 2 text\nPage 3 text"
+        assert result["page_boundaries"] == [(0, 12), (12, 24), (24, 36)]
+        assert result["page_ocr_applied"] == [True, True, True]
+        assert result["page_timings_ms"] == [1, 2, 3]
+        assert result["extractor"] == "tesseract"
+
+    def test_page_ranges(self):
+        """Test pages are grouped into bounded runs of consecutive pages."""
+        extractor = PDFExtractor(mode="ocr", ocr_pages_per_task=3)
+
+        assert extractor._page_ranges([]) == []
+        assert extractor._page_ranges([1, 2, 3, 4, 5]) == [(1, 3), (4, 5)]
+        assert extractor._page_ranges([2, 3, 7, 9, 10]) == [(2, 3), (7, 7), (9, 10)]
+
+    def test_parse_page_ranges(self):
+        """Test page selections are parsed into sorted inclusive ranges."""
+        assert parse_page_ranges("5, 1-3") == [(1, 3), (5, 5)]
+        assert format_page_ranges(parse_page_ranges("5,1-3")) == "1-3,5"
+        for spec in ("", "0", "3-1", "a", "1-", "2-x"):
+            with pytest.raises(ValueError):
+                parse_page_ranges(spec)
+
+    def test_select_pages(self):
+        """Test pages and max_pages select page numbers within the document."""
+        assert PDFExtractor(mode="fast").select_pages(3) == [1, 2, 3]
+        assert PDFExtractor(mode="fast", max_pages=2).select_pages(5) == [1, 2]
+        assert PDFExtractor(mode="fast", pages=[(2, 3), (3, 9)]).select_pages(5) == [2, 3, 4, 5]
+        assert PDFExtractor(mode="fast", pages=[(2, 2), (4, 5)], max_pages=2).select_pages(5) == [2, 4]
+        with pytest.raises(ValueError):
+            PDFExtractor(mode="fast", max_pages=0)
+
+    def test_page_hashes(self, tmp_path, sample_pdf_pages):
+        """Test pages keep their hash across documents unless their content changes."""
+        amended = [sample_pdf_pages[0], "Action items were reassigned.", sample_pdf_pages[2], "Addendum"]
+        paths = []
+        for name, pages in (("original.pdf", sample_pdf_pages), ("amended.pdf", amended)):
+            path = tmp_path / name
+            path.write_bytes(build_pdf(pages))
+            paths.append(str(path))
+
+        original, changed = (PDFExtractor.page_hashes(path) for path in paths)
+
+        assert len(original) == 3 and len(changed) == 4
+        assert changed[0] == original[0] and changed[2] == original[2]
+        assert changed[1] != original[1]
+        assert len(set(original)) == 3
+
+    def test_restricted_to(self):
+        """Test a restricted copy keeps the settings that affect page text."""
+        extractor = PDFExtractor(mode="fast", ocr_dpi=150, pages=[(1, 9)], max_pages=5)
+        restricted = extractor.restricted_to([5, 2, 3])
+
+        assert to_page_ranges([5, 2, 3, 3]) == [(2, 3), (5, 5)]
+        assert restricted.select_pages(9) == [2, 3, 5]
+        assert restricted.page_cache_params() == extractor.page_cache_params()
+        assert "pages" not in extractor.page_cache_params() and "max_pages" not in extractor.page_cache_params()
+
+    def test_fast_partial_keeps_page_numbers(self, sample_pdf, sample_pdf_pages):
+        """Test a partial extraction only reads selected pages and keeps document page numbers."""
+        extractor = PDFExtractor(mode="fast", pages=[(2, 2)])
+        pages = list(extractor.iter_pages_from_bytes(sample_pdf, "sample.pdf"))
+        result = extractor.extract_from_bytes(sample_pdf, "sample.pdf")
+
+        assert [page["page_number"] for page in pages] == [2]
+        assert result["text"] == sample_pdf_pages[1]
+        assert result["total_pages"] == 3
+        assert result["extracted_pages"] == [2]
+        assert result["page_boundaries"] == [(0, 0), (0, len(sample_pdf_pages[1]) + 1), (len(sample_pdf_pages[1]) + 1,) * 2]
+        assert {element["page"] for element in result["elements"]} == {2}
+        assert extractor.cache_params()["pages"] == "2"
+
+    def test_full_extraction_lists_no_pages(self, sample_pdf):
+        """Test extracted_pages is None when every page was extracted."""
+        result = PDFExtractor(mode="fast").extract_from_bytes(sample_pdf, "sample.pdf")
+
+        assert result["extracted_pages"] is None
+        assert "pages" not in PDFExtractor(mode="fast").cache_params()
+
+    def test_ocr_partial_only_ocrs_selected_pages(self, monkeypatch, sample_pdf):
+        """Test OCR mode rasterizes only the selected pages."""
+        ocr_calls = []
+
+        def fake_ocr(self, file_path, first_page, last_page):
+            ocr_calls.append((first_page, last_page))
+            return {page: (f"Page {page} text", page) for page in range(first_page, last_page + 1)}
+
+        monkeypatch.setattr(PDFExtractor, "_ocr_page_range", fake_ocr)
+        result = PDFExtractor(mode="ocr", max_pages=2).extract_from_bytes(sample_pdf, "scanned.pdf")
+
+        assert ocr_calls == [(1, 2)]
+        assert result["text"] == "Page 1 text\nPage 2 text"
+        assert result["extracted_pages"] == [1, 2]
+        assert result["page_ocr_applied"] == [True, True, False]
+
+    def test_unstructured_partial_partitions_selected_pages(self, monkeypatch, sample_pdf_pages):
+        """Test the unstructured mode partitions a copy of the selected pages and renumbers them."""
+        pdf = build_pdf(sample_pdf_pages + ["Closing remarks and adjournment."])
+        module = types.ModuleType("unstructured.partition.pdf")
+        module.partition_pdf = fake_partition_pdf
+        monkeypatch.setitem(sys.modules, "unstructured", types.ModuleType("unstructured"))
+        monkeypatch.setitem(sys.modules, "unstructured.partition", types.ModuleType("unstructured.partition"))
+        monkeypatch.setitem(sys.modules, "unstructured.partition.pdf", module)
+
+        extractor = PDFExtractor(mode="unstructured", pages=[(2, 2), (4, 4)])
+        result = extractor.extract_from_bytes(pdf, "minutes.pdf")
+
+        assert result["extracted_pages"] == [2, 4]
+        assert result["text"] == sample_pdf_pages[1] + "\nClosing remarks and adjournment."
+        assert result["total_pages"] == 4
+        assert [element["page"] for element in result["elements"]] == [2, 4]
+
+    def test_text_layer_quality(self):
+        """Test short or garbled text layers are not considered usable."""
+        extractor = PDFExtractor(mode="fast", text_layer_min_chars=10, text_layer_min_quality=0.5)
+
+        assert extractor._has_usable_text_layer("A perfectly normal sentence.") is True
+        assert extractor._has_usable_text_layer("Too short") is False
+        assert extractor._has_usable_text_layer("��#@!%^&*()���") is False
+
+    def test_assemble_pages_empty_page(self):
+        """Test empty pages get a zero-length boundary and no extra newline."""
+        text, boundaries = PDFExtractor._assemble_pages(["One", "", "Three"])
+
+        assert text == "One\nThree"
+        assert boundaries == [(0, 4), (4, 4), (4, 10)]
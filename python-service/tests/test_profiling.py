@@ -0,0 +1,145 @@
+import cProfile
+import os
+import pstats
+import time
+
+import pytest
+
+from app.services.profiling import (
+    ProfileStore,
+    ProfilerBusy,
+    RequestProfiler,
+    hot_functions,
+    profiled_iter,
+    to_speedscope
+)
+
+
+def busy(n):
+    return sum(i * i for i in range(n))
+
+
+def outer():
+    return busy(20000) + busy(10000)
+
+
+def count_up(n):
+    for i in range(n):
+        busy(1000)
+        yield i
+
+
+def profile_of(fn):
+    profile = cProfile.Profile()
+    profile.runcall(fn)
+    return pstats.Stats(profile)
+
+
+class TestProfileFunctions:
+    """Tests for profile summary and conversion functions."""
+
+    def test_hot_functions(self):
+        """Test functions are ranked by the time spent in their own code."""
+        functions = hot_functions(profile_of(outer), 3)
+
+        assert len(functions) == 3
+        assert functions[0]["self_ms"] >= functions[1]["self_ms"] >= functions[2]["self_ms"]
+        assert any("busy" in entry["function"] for entry in functions)
+        assert all(entry["cumulative_ms"] >= entry["self_ms"] for entry in functions)
+
+    def test_to_speedscope(self):
+        """Test the speedscope file has a sampled profile with stacks through the call graph."""
+        speedscope = to_speedscope(profile_of(outer), "outer")
+
+        frames = [frame["name"] for frame in speedscope["shared"]["frames"]]
+        profile = speedscope["profiles"][0]
+        assert profile["type"] == "sampled"
+        assert len(profile["samples"]) == len(profile["weights"])
+        assert profile["endValue"] == pytest.approx(sum(profile["weights"]))
+        stacks = [[frames[index] for index in stack] for stack in profile["samples"]]
+        assert ["outer", "busy", "<built-in method builtins.sum>", "<genexpr>"] in stacks
+
+    def test_profiled_iter(self, tmp_path):
+        """Test iterating under cProfile yields every item and dumps the profile."""
+        path = str(tmp_path / "worker.pstats")
+
+        assert list(profiled_iter(count_up, path, 3)) == [0, 1, 2]
+        assert any(function[2] == "busy" for function in pstats.Stats(path).stats)
+
+    def test_profiled_iter_closed_early(self, tmp_path):
+        """Test the profile is dumped when iteration stops early."""
+        path = str(tmp_path / "worker.pstats")
+        items = profiled_iter(count_up, path, 10)
+        next(items)
+        items.close()
+
+        assert os.path.exists(path)
+
+
+class TestProfileStore:
+    """Tests for the ProfileStore service."""
+
+    def test_save_and_load(self, tmp_path):
+        """Test a saved profile can be loaded and listed."""
+        store = ProfileStore(directory=str(tmp_path))
+        profile_id = store.save(profile_of(outer))
+
+        assert store.load(profile_id) is not None
+        assert [entry["profile_id"] for entry in store.list()] == [profile_id]
+        assert store.load("../" + profile_id) is None
+        assert store.load("0" * 32) is None
+
+    def test_max_profiles(self, tmp_path):
+        """Test only the newest max_profiles are kept."""
+        store = ProfileStore(directory=str(tmp_path), max_profiles=2)
+        ids = []
+        for age in (30, 20, 10):
+            ids.append(store.save(profile_of(outer)))
+            mtime = time.time() - age
+            os.utime(store.path(ids[-1]), (mtime, mtime))
+        store.purge()
+
+        assert [entry["profile_id"] for entry in store.list()] == ids[:0:-1]
+
+    def test_ttl(self, tmp_path):
+        """Test expired profiles are not served and get purged."""
+        store = ProfileStore(directory=str(tmp_path), ttl_seconds=60)
+        profile_id = store.save(profile_of(outer))
+        mtime = time.time() - 120
+        os.utime(os.path.join(str(tmp_path), profile_id + store.SUFFIX), (mtime, mtime))
+
+        assert store.path(profile_id) is None
+        store.purge()
+        assert os.listdir(str(tmp_path)) == []
+
+
+class TestRequestProfiler:
+    """Tests for the RequestProfiler service."""
+
+    def test_merges_worker_profiles(self, tmp_path):
+        """Test worker profiles are merged into the stored profile and removed."""
+        store = ProfileStore(directory=str(tmp_path))
+        profiler = RequestProfiler(store, top_functions=5)
+        profiler.start()
+        list(profiled_iter(count_up, profiler.worker_path(), 3))
+        summary = profiler.finish()
+
+        assert len(summary["hot_functions"]) == 5
+        assert any(function[2] == "count_up" for function in store.load(summary["profile_id"]).stats)
+        assert os.listdir(str(tmp_path)) == [summary["profile_id"] + store.SUFFIX]
+
+    def test_one_request_at_a_time(self, tmp_path):
+        """Test a second profiler cannot start while one is active."""
+        store = ProfileStore(directory=str(tmp_path))
+        first = RequestProfiler(store)
+        first.start()
+        try:
+            with pytest.raises(ProfilerBusy):
+                RequestProfiler(store).start()
+        finally:
+            first.discard()
+
+        second = RequestProfiler(store)
+        second.start()
+        second.discard()
+        assert store.list() == []
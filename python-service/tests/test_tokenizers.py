@@ -0,0 +1,41 @@
+import pytest
+from app.services.tokenizers import RegexTokenizer, Tokenizer, get_tokenizer, register_tokenizer
+
+
+class TestTokenizers:
+    """Tests for the pluggable chunking tokenizers."""
+
+    def test_regex_tokens_partition_text(self):
+        """Test regex tokens start at words and punctuation, with leading whitespace."""
+        text = "Budget: 12.5% approved.\n Next"
+        starts = RegexTokenizer().token_starts(text)
+
+        pieces = [text[start:end] for start, end in zip(starts, starts[1:] + [len(text)])]
+        assert "".join(pieces) == text
+        assert pieces == ["Budget", ":", " 12", ".", "5", "%", " approved", ".", "\n Next"]
+
+    def test_regex_tokenizes_from_any_token_start(self):
+        """Test tokenizing a suffix from a token start matches the whole text."""
+        text = "The committee met. Motion carried, 5 to 2."
+        starts = RegexTokenizer().token_starts(text)
+
+        for start in starts:
+            suffix = [start + offset for offset in RegexTokenizer().token_starts(text[start:])]
+            assert suffix == [s for s in starts if s >= start]
+
+    def test_get_tokenizer(self):
+        """Test tokenizers are created from specs and unknown names are rejected."""
+        assert isinstance(get_tokenizer("regex"), RegexTokenizer)
+        with pytest.raises(ValueError):
+            get_tokenizer("magic")
+
+    def test_register_tokenizer(self):
+        """Test custom tokenizers can be registered."""
+        class CharTokenizer(Tokenizer):
+            name = "chars"
+
+            def token_starts(self, text):
+                return list(range(len(text)))
+
+        register_tokenizer("chars", lambda _: CharTokenizer())
+        assert get_tokenizer("chars").token_starts("abc") == [0, 1, 2]